@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""Benchmark the booth's hot paths and a full scripted session.
+
+Covers gradient rendering, prompt building, session logging throughput,
+session dumps at increasing database sizes and end-to-end visits through
+Terminal against the fake LLM client. Results are written as JSON so runs
+can be compared over time.
+
+Usage:
+    ./scripts/benchmark.py                              # everything
+    ./scripts/benchmark.py --quick                      # small sizes, for a smoke run
+    ./scripts/benchmark.py --only theme,prompt
+    ./scripts/benchmark.py --compare logs/benchmarks/20260901T120000Z.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+# Offline, deterministic configuration; must be set before the app modules
+# read it.
+os.environ.pop("DATABASE_URL", None)
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["LLM_PROVIDER_BACKUP"] = ""
+os.environ.setdefault("TRACING", "false")
+
+import pyfiglet
+from rich.console import Console
+
+from data.questions import QUESTIONS, REAL_NAME_QUESTION
+from llm.prompt import build_prompt
+from session_logging import SessionLogger, SessionWriter
+from session_logging.export import write_ndjson
+from session_logging.schema import sessions_table
+from ui.frame import OUTPUT_MODES, estimate_bytes
+from ui.headless import ScriptedVisitor, headless_terminal, run_visit
+from ui.session import MAX_ANSWER_CHARS, MAX_AVOID_NAMES
+from ui.terminal import State
+from ui.theme import FIGLET_FONT_TITLE, GRADIENT_SUNSET, gradient_color_at, make_gradient_text
+
+SECTIONS = ["theme", "prompt", "log", "dump", "session"]
+
+
+def _timings(fn: Callable[[], object], repeat: int) -> dict:
+    """Run ``fn`` ``repeat`` times; return min/median/mean in ms and ops/s."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    median = statistics.median(samples)
+    return {
+        "repeat": repeat,
+        "min_ms": min(samples) * 1000,
+        "median_ms": median * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "ops_per_sec": 1 / median if median else None,
+    }
+
+
+def bench_theme(quick: bool) -> dict:
+    title = pyfiglet.figlet_format("H A N D L E B A R", font=FIGLET_FONT_TITLE, width=200).rstrip("\n")
+    calls = 10_000 if quick else 100_000
+
+    def colors():
+        for i in range(calls):
+            gradient_color_at(GRADIENT_SUNSET, i / calls)
+
+    console = Console(file=io.StringIO(), width=120, force_terminal=True, color_system="truecolor")
+    return {
+        "title_chars": len(title),
+        "make_gradient_text": _timings(lambda: make_gradient_text(title, GRADIENT_SUNSET, bold=True), 20 if quick else 200),
+        "make_gradient_text_banded": _timings(
+            lambda: make_gradient_text(title, GRADIENT_SUNSET, bold=True, bands=8), 20 if quick else 200
+        ),
+        f"gradient_color_at_x{calls}": _timings(colors, 3 if quick else 10),
+        "title_bytes_by_output_mode": {
+            f"{mode.color_system}/{mode.bands}": estimate_bytes(
+                console, make_gradient_text(title, GRADIENT_SUNSET, bold=True, bands=mode.bands), mode.color_system
+            )
+            for mode in OUTPUT_MODES
+        },
+    }
+
+
+def bench_prompt(quick: bool) -> dict:
+    questions = [REAL_NAME_QUESTION] + QUESTIONS
+    qa = [
+        {"question_id": q["question_id"], "question": q["question"], "answer": "dusty " * (MAX_ANSWER_CHARS // 6)}
+        for q in questions
+    ]
+    avoid = [f"Name{i}" for i in range(MAX_AVOID_NAMES)]
+    return {
+        "answers": len(qa),
+        "avoid_names": len(avoid),
+        "build_prompt": _timings(lambda: build_prompt(qa, "m", avoid), 100 if quick else 2000),
+    }
+
+
+def _session_args(i: int) -> dict:
+    return {
+        "style": "m",
+        "qa_transcript": [{"question_id": "vibe", "answer": f"answer {i}"}],
+        "nicknames": ["Dustbunny", "Glimmer", f"Name{i}"],
+        "llm_response_raw": json.dumps({"nicknames": ["Dustbunny", "Glimmer", f"Name{i}"]}),
+    }
+
+
+def bench_log(quick: bool, tmp: Path) -> dict:
+    n = 200 if quick else 2000
+    logger = SessionLogger(db_path=tmp / "log.db", sync=False)
+    started = time.perf_counter()
+    for i in range(n):
+        logger.log_session(**_session_args(i))
+    sync_elapsed = time.perf_counter() - started
+
+    writer = SessionWriter(SessionLogger(db_path=tmp / "writer.db", sync=False))
+    started = time.perf_counter()
+    for i in range(n):
+        writer.log_session(**_session_args(i))
+    enqueue_elapsed = time.perf_counter() - started
+    writer.flush()
+    writer_elapsed = time.perf_counter() - started
+    writer.close()
+    return {
+        "sessions": n,
+        "log_session_per_sec": n / sync_elapsed,
+        "log_session_mean_ms": sync_elapsed / n * 1000,
+        "writer_enqueue_mean_ms": enqueue_elapsed / n * 1000,
+        "writer_sessions_per_sec": n / writer_elapsed,
+    }
+
+
+def _seed(logger: SessionLogger, rows: int) -> None:
+    """Bulk-insert ``rows`` sessions sharing one stored response."""
+    with logger.engine.begin() as conn:
+        template = logger.session_values(**_session_args(0))
+        logger.insert_session(conn, template)
+        stored = conn.execute(sessions_table.select().limit(1)).first()
+        template = {**template, "llm_response_raw": "", "response_hash": stored.response_hash}
+    batch = 10_000
+    for start in range(1, rows, batch):
+        with logger.engine.begin() as conn:
+            conn.execute(sessions_table.insert(), [template] * min(batch, rows - start))
+
+
+def bench_dump(quick: bool, tmp: Path, sizes: list[int]) -> dict:
+    results = {}
+    logger = SessionLogger(db_path=tmp / "dump.db", sync=False)
+    seeded = 0
+    for size in sizes:
+        _seed(logger, size - seeded)
+        seeded = size
+        entry = {}
+        started = time.perf_counter()
+        last_id = write_ndjson(logger.iter_sessions(), io.StringIO())
+        entry["stream_ndjson_s"] = time.perf_counter() - started
+        entry["stream_rows_per_sec"] = size / entry["stream_ndjson_s"]
+        assert last_id is not None
+        if size <= 100_000:
+            # dump_sessions builds the whole document in memory.
+            started = time.perf_counter()
+            logger.dump_sessions()
+            entry["dump_sessions_s"] = time.perf_counter() - started
+        results[str(size)] = entry
+        print(f"  dump {size}: {entry}", file=sys.stderr)
+    return results
+
+
+def bench_session(quick: bool, tmp: Path, latency_ms: int) -> dict:
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(latency_ms)
+    os.environ["FAKE_LLM_JITTER_MS"] = "0"
+    answers = json.loads((ROOT / "answers" / "alex1.json").read_text())
+    terminal = headless_terminal(SessionWriter(SessionLogger(db_path=tmp / "e2e.db", sync=False)))
+    visits = 5 if quick else 30
+    totals, names, overhead = [], [], []
+    for i in range(visits):
+        steps = run_visit(terminal, ScriptedVisitor(answers, rerolls=i % 2))
+        total = sum(seconds for _, seconds in steps)
+        generating = [seconds for state, seconds in steps if state == State.GENERATING]
+        totals.append(total)
+        names.append(generating[0])
+        overhead.append(total - len(generating) * latency_ms / 1000)
+    terminal.logger.close()
+    frames = terminal.frames
+    return {
+        "visits": visits,
+        "fake_latency_ms": latency_ms,
+        "render_bytes_per_visit": frames.bytes_written / visits,
+        "render_writes_per_visit": frames.writes / visits,
+        "render_bytes_per_frame": frames.bytes_written / max(frames.frames, 1),
+        "visit_median_ms": statistics.median(totals) * 1000,
+        "time_to_names_median_ms": statistics.median(names) * 1000,
+        "non_llm_overhead_median_ms": statistics.median(overhead) * 1000,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _flatten(data: dict, prefix: str = "") -> dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(previous: dict, current: dict) -> None:
+    before = _flatten(previous["results"])
+    after = _flatten(current["results"])
+    print(f"\n{'metric':<60}{'before':>12}{'after':>12}{'change':>9}")
+    for name in sorted(before.keys() & after.keys()):
+        old, new = before[name], after[name]
+        change = f"{(new - old) / old:+.0%}" if old else "-"
+        print(f"{name:<60}{old:>12.3f}{new:>12.3f}{change:>9}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="small sizes and repeats")
+    parser.add_argument("--only", help=f"comma-separated sections ({','.join(SECTIONS)})")
+    parser.add_argument("--dump-sizes", help="comma-separated row counts (default 10000,100000,1000000)")
+    parser.add_argument("--fake-latency-ms", type=int, default=200, help="injected LLM latency for session runs")
+    parser.add_argument("--output", help="results file (default logs/benchmarks/<UTC timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to diff against")
+    args = parser.parse_args()
+
+    sections = args.only.split(",") if args.only else SECTIONS
+    if args.dump_sizes:
+        sizes = [int(n) for n in args.dump_sizes.split(",")]
+    else:
+        sizes = [1_000, 10_000] if args.quick else [10_000, 100_000, 1_000_000]
+
+    results: dict = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        for section in sections:
+            print(f"running {section}...", file=sys.stderr)
+            if section == "theme":
+                results[section] = bench_theme(args.quick)
+            elif section == "prompt":
+                results[section] = bench_prompt(args.quick)
+            elif section == "log":
+                results[section] = bench_log(args.quick, tmp)
+            elif section == "dump":
+                results[section] = bench_dump(args.quick, tmp, sizes)
+            elif section == "session":
+                results[section] = bench_session(args.quick, tmp, args.fake_latency_ms)
+            else:
+                parser.error(f"unknown section: {section}")
+
+    now = datetime.now(timezone.utc)
+    report = {
+        "timestamp": now.isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": results,
+    }
+    output = Path(args.output) if args.output else ROOT / "logs" / "benchmarks" / f"{now:%Y%m%dT%H%M%SZ}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(json.dumps(results, indent=2))
+    print(f"\nwrote {output}", file=sys.stderr)
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text()), report)
+
+
+if __name__ == "__main__":
+    main()
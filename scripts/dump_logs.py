@@ -4,6 +4,9 @@
 Usage:
     ./scripts/dump_logs.py          # all sessions
     ./scripts/dump_logs.py 5        # session 5 only
+
+For large databases or incremental exports use
+``python -m session_logging export`` (NDJSON).
 """
 
 import sys
@@ -11,8 +14,10 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
+from session_logging.export import write_json_array
 from session_logging.session_logger import SessionLogger
 
-logger = SessionLogger()
+# Read-only dump: no SyncWorker replicating in the background.
+logger = SessionLogger(sync=False)
 sid = int(sys.argv[1]) if len(sys.argv) > 1 else None
-print(logger.dump_sessions(sid))
+write_json_array(logger.iter_sessions(session_id=sid), sys.stdout)
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Simulate many booths at once with scripted visitors.
+
+Each booth is a separate process running a headless Terminal (prompt_toolkit
+pipe input, in-memory console) against one shared session database, like
+the ttyd processes under start_server.sh. Visitors answer from
+answers/*.json, pause to think, reroll and leave feedback with the given
+probabilities.
+
+Reports p50/p95/p99 time-to-names and visit duration, DB write latency,
+error counts, and CPU time and RSS per session.
+
+Usage:
+    ./scripts/load_test.py --booths 8 --duration 60
+    ./scripts/load_test.py --booths 4 --visits 20 --think-time 0
+    ./scripts/load_test.py --provider claude --booths 2 --visits 5   # real API quota check
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import traceback
+from pathlib import Path
+from typing import Optional
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+DB_SPANS = ("db.log_session", "db.log_feedback", "db.write_batch")
+
+
+class _SpanCollector:
+    """Tracer exporter that keeps DB write durations in memory."""
+
+    def __init__(self) -> None:
+        self.db_write_ms: list[float] = []
+
+    def export(self, record: dict) -> None:
+        if record["span"] in DB_SPANS:
+            self.db_write_ms.append(record["duration_ms"])
+
+    def close(self) -> None:
+        pass
+
+
+def _rss_mb() -> float:
+    """Current resident set size (Linux), else the peak."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _booth(booth: int, args: argparse.Namespace, db_path: Path, deadline: Optional[float], results) -> None:
+    os.environ.pop("DATABASE_URL", None)
+    os.environ.update(
+        LLM_PROVIDER=args.provider,
+        LLM_PROVIDER_BACKUP=args.backup_provider or "",
+        FAKE_LLM_LATENCY_MS=str(args.fake_latency_ms),
+        FAKE_LLM_JITTER_MS=str(args.fake_jitter_ms),
+        FAKE_LLM_ERROR_RATE=str(args.fake_error_rate),
+        ASK_FEEDBACK="1",
+        TRACING="false",
+    )
+    import telemetry
+    from data.styles import STYLES
+    from session_logging import SessionLogger, SessionWriter
+    from ui.headless import ScriptedVisitor, headless_terminal, run_visit
+    from ui.terminal import State
+
+    collector = _SpanCollector()
+    telemetry.get_tracer().exporter = collector
+    rng = random.Random(args.seed * 1000 + booth)
+    answer_sets = [json.loads(p.read_text()) for p in sorted(ROOT.glob(args.answers))]
+    logger = SessionLogger(db_path=db_path, sync=False)
+    if args.async_logging:
+        logger = SessionWriter(logger)
+    terminal = headless_terminal(logger)
+
+    visits = []
+    n = 0
+    while (deadline is None and n < args.visits) or (deadline is not None and time.time() < deadline):
+        n += 1
+        rerolls = 0
+        while rerolls < 3 and rng.random() < args.reroll_prob:
+            rerolls += 1
+        visitor = ScriptedVisitor(
+            rng.choice(answer_sets),
+            style=rng.choice(list(STYLES)),
+            rerolls=rerolls,
+            feedback=rng.random() < args.feedback_prob,
+            think_time=args.think_time,
+            rng=rng,
+        )
+        cpu_before = _cpu_seconds()
+        started = time.perf_counter()
+        visit = {"booth": booth, "rerolls": rerolls}
+        try:
+            steps = run_visit(terminal, visitor)
+            generating = [seconds for state, seconds in steps if state == State.GENERATING]
+            visit["time_to_names_s"] = generating[0] if generating else None
+            visit["generation_failed"] = not terminal.session.candidates
+            visit["service_s"] = sum(seconds for _, seconds in steps)
+        except Exception:
+            visit["error"] = traceback.format_exc(limit=3)
+            terminal = headless_terminal(logger)
+        visit["wall_s"] = time.perf_counter() - started
+        visit["cpu_s"] = _cpu_seconds() - cpu_before
+        visit["rss_mb"] = _rss_mb()
+        visits.append(visit)
+    logger.close()
+    results.put({"booth": booth, "visits": visits, "db_write_ms": collector.db_write_ms})
+
+
+def _percentiles(values: list[float], scale: float = 1.0) -> dict:
+    if not values:
+        return {"n": 0}
+    ordered = sorted(values)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * scale, 2)
+
+    return {"n": len(ordered), "p50": pct(50), "p95": pct(95), "p99": pct(99), "max": round(ordered[-1] * scale, 2)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--booths", type=int, default=4, help="concurrent booth processes")
+    parser.add_argument("--visits", type=int, default=10, help="visits per booth (ignored with --duration)")
+    parser.add_argument("--duration", type=float, help="run for this many seconds instead of a visit count")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean seconds a visitor spends per screen")
+    parser.add_argument("--reroll-prob", type=float, default=0.3, help="chance of each further reroll (max 3)")
+    parser.add_argument("--feedback-prob", type=float, default=0.5, help="chance a visitor leaves feedback")
+    parser.add_argument("--answers", default="answers/*.json", help="glob (relative to the repo) of answer files")
+    parser.add_argument("--provider", default="fake", help="LLM_PROVIDER for the booths (default: fake)")
+    parser.add_argument("--backup-provider", help="LLM_PROVIDER_BACKUP for the booths")
+    parser.add_argument("--fake-latency-ms", type=int, default=1500)
+    parser.add_argument("--fake-jitter-ms", type=int, default=500)
+    parser.add_argument("--fake-error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--async-logging",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="log through SessionWriter like main.py (default: on)",
+    )
+    parser.add_argument("--db", help="shared database path (default: a fresh temporary file)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the full report to this file")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.db:
+        db_path = Path(args.db)
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        db_path = Path(tmp.name) / "load.db"
+
+    os.environ.pop("DATABASE_URL", None)
+    from session_logging import SessionLogger
+
+    SessionLogger(db_path=db_path, sync=False)  # migrate once before the booths race
+
+    deadline = time.time() + args.duration if args.duration else None
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=_booth, args=(i, args, db_path, deadline, results))
+        for i in range(args.booths)
+    ]
+    started = time.perf_counter()
+    for proc in procs:
+        proc.start()
+    booths = []
+    for proc in procs:
+        try:
+            booths.append(results.get(timeout=(args.duration or 3600) + 600))
+        except Exception:
+            print("a booth process did not report back", file=sys.stderr)
+    for proc in procs:
+        proc.join()
+    elapsed = time.perf_counter() - started
+
+    visits = [v for b in booths for v in b["visits"]]
+    errors = [v for v in visits if "error" in v]
+    ok = [v for v in visits if "error" not in v]
+    report = {
+        "booths": args.booths,
+        "provider": args.provider,
+        "elapsed_s": round(elapsed, 2),
+        "visits": len(visits),
+        "visits_per_min": round(len(visits) / elapsed * 60, 1),
+        "generations": sum(1 + v["rerolls"] for v in ok),
+        "errors": {
+            "visit_exceptions": len(errors),
+            "failed_generations": sum(1 for v in ok if v.get("generation_failed")),
+        },
+        "time_to_names_ms": _percentiles([v["time_to_names_s"] for v in ok if v["time_to_names_s"]], 1000),
+        "visit_service_ms": _percentiles([v["service_s"] for v in ok], 1000),
+        "db_write_ms": _percentiles([ms for b in booths for ms in b["db_write_ms"]]),
+        "cpu_ms_per_visit": _percentiles([v["cpu_s"] for v in visits], 1000),
+        "rss_mb_per_booth": _percentiles([max(v["rss_mb"] for v in b["visits"]) for b in booths if b["visits"]]),
+    }
+    print(json.dumps(report, indent=2))
+    for visit in errors[:3]:
+        print(f"\nbooth {visit['booth']} error:\n{visit['error']}", file=sys.stderr)
+    if args.json:
+        Path(args.json).write_text(json.dumps({"report": report, "visits": visits}, indent=2) + "\n")
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
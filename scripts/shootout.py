@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Replay logged visitor transcripts against several providers and models.
+
+Rebuilds each session's prompt with build_prompt() from its logged
+qa_transcript and style, sends it to every model in the matrix
+concurrently, and compares latency, token usage, JSON validity, rule
+compliance and how often the names visitors favorited are reproduced.
+
+Usage:
+    ./scripts/shootout.py --models claude:claude-opus-4-7,claude:claude-haiku-4-5,openai:gpt-5.2
+    ./scripts/shootout.py --models ollama:llama3.2,ollama:qwen2.5 --limit 50 --concurrency 2
+    SHOOTOUT_MODELS=fake:a,fake:b ./scripts/shootout.py --json shootout.json
+
+The database is the one the booth uses (DATABASE_URL or logs/sessions.db).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from dotenv import load_dotenv
+
+from data.questions import QUESTIONS, REAL_NAME_QUESTION
+from llm import LLMError, _create_client
+from llm.parse import ResponseParseError, parse_nicknames, rule_violations
+from llm.prompt import DEFAULT_VARIANT, PROMPT_VARIANTS, build_prompt
+from session_logging import SessionLogger
+
+QUESTION_TEXT = {q["question_id"]: q["question"] for q in [REAL_NAME_QUESTION] + QUESTIONS}
+
+
+def parse_matrix(spec: str) -> list[tuple[str, str]]:
+    """Parse "provider:model,provider:model" (model may contain colons)."""
+    matrix = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        provider, sep, model = item.partition(":")
+        if not sep or not model:
+            raise ValueError(f"expected provider:model, got {item!r}")
+        matrix.append((provider.lower(), model))
+    return matrix
+
+
+def load_sessions(logger: SessionLogger, limit: int, style: str | None) -> list[dict]:
+    """The most recent ``limit`` sessions that have at least one answer."""
+    recent: deque = deque(maxlen=limit)
+    for record in logger.iter_sessions(style=style):
+        if any(qa.get("answer") for qa in record["qa_transcript"] or []):
+            recent.append(record)
+    return list(recent)
+
+
+def rebuild_messages(record: dict, variant: str) -> list[dict]:
+    qa = [
+        {
+            "question_id": qa["question_id"],
+            "question": QUESTION_TEXT.get(qa["question_id"], qa["question_id"]),
+            "answer": qa.get("answer", ""),
+        }
+        for qa in record["qa_transcript"]
+    ]
+    return build_prompt(qa, record["style"], variant=variant)
+
+
+def favorites(record: dict) -> set[str]:
+    return {name.lower() for fb in record["feedback"] for name in fb.get("favorite_names") or []}
+
+
+def run_one(client, record: dict, variant: str) -> dict:
+    outcome: dict = {"session_id": record["session_id"]}
+    try:
+        result = client.generate(rebuild_messages(record, variant))
+    except LLMError as e:
+        outcome["error"] = str(e)
+        return outcome
+    outcome.update(
+        latency_ms=result.latency_ms,
+        input_tokens=result.input_tokens,
+        output_tokens=result.output_tokens,
+    )
+    try:
+        parse_nicknames(result.text, strict=True)
+        outcome["json_valid"] = True
+    except ResponseParseError:
+        outcome["json_valid"] = False
+    try:
+        names = parse_nicknames(result.text)
+    except ResponseParseError:
+        outcome["parsed"] = False
+        return outcome
+    outcome["parsed"] = True
+    outcome["names"] = names
+    outcome["violations"] = rule_violations(names)
+    liked = favorites(record)
+    if liked:
+        outcome["favorite_hit"] = bool(liked & {n.lower() for n in names})
+    return outcome
+
+
+def _pct(values: list, p: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def _rate(outcomes: list[dict], key: str):
+    flagged = [o[key] for o in outcomes if key in o]
+    return sum(flagged) / len(flagged) if flagged else None
+
+
+def summarize(outcomes: list[dict]) -> dict:
+    ok = [o for o in outcomes if "error" not in o]
+    latencies = [o["latency_ms"] for o in ok if o.get("latency_ms") is not None]
+    parsed = [o for o in ok if o.get("parsed")]
+    return {
+        "requests": len(outcomes),
+        "errors": len(outcomes) - len(ok),
+        "latency_ms": {
+            "p50": _pct(latencies, 50),
+            "p95": _pct(latencies, 95),
+            "p99": _pct(latencies, 99),
+            "mean": round(statistics.fmean(latencies)) if latencies else None,
+        },
+        "avg_input_tokens": statistics.fmean(t) if (t := [o["input_tokens"] for o in ok if o.get("input_tokens")]) else None,
+        "avg_output_tokens": statistics.fmean(t) if (t := [o["output_tokens"] for o in ok if o.get("output_tokens")]) else None,
+        "json_valid_rate": _rate(ok, "json_valid"),
+        "parse_rate": _rate(ok, "parsed"),
+        "rule_compliance_rate": (
+            sum(not o["violations"] for o in parsed) / len(parsed) if parsed else None
+        ),
+        "favorite_hit_rate": _rate(parsed, "favorite_hit"),
+        "favorite_sessions": sum(1 for o in parsed if "favorite_hit" in o),
+    }
+
+
+def _fmt(value, spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def print_table(summary: dict) -> None:
+    print(
+        f"{'provider:model':<36}{'reqs':>5}{'err':>5}{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}"
+        f"{'in tok':>8}{'out tok':>8}{'json':>6}{'rules':>7}{'fav':>6}"
+    )
+    for key, s in summary.items():
+        lat = s["latency_ms"]
+        print(
+            f"{key:<36}{s['requests']:>5}{s['errors']:>5}"
+            f"{_fmt(lat['p50'], 'd'):>8}{_fmt(lat['p95'], 'd'):>8}{_fmt(lat['p99'], 'd'):>8}"
+            f"{_fmt(s['avg_input_tokens'], '.0f'):>8}{_fmt(s['avg_output_tokens'], '.0f'):>8}"
+            f"{_fmt(s['json_valid_rate'], '.0%'):>6}{_fmt(s['rule_compliance_rate'], '.0%'):>7}"
+            f"{_fmt(s['favorite_hit_rate'], '.0%'):>6}"
+        )
+
+
+def main() -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--models",
+        default=os.environ.get("SHOOTOUT_MODELS"),
+        help="comma-separated provider:model list (default: SHOOTOUT_MODELS, else the configured LLM_PROVIDER)",
+    )
+    parser.add_argument("--limit", type=int, default=100, help="replay the most recent N sessions")
+    parser.add_argument("--style", help="only sessions with this style key")
+    parser.add_argument("--variant", default=DEFAULT_VARIANT, choices=sorted(PROMPT_VARIANTS), help="prompt variant")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight per model")
+    parser.add_argument("--json", help="write the summary and every outcome to this file")
+    args = parser.parse_args()
+
+    if args.models:
+        matrix = parse_matrix(args.models)
+    else:
+        provider = os.environ.get("LLM_PROVIDER", "claude").lower()
+        matrix = [(provider, _create_client(provider).model)]
+
+    records = load_sessions(SessionLogger(sync=False), args.limit, args.style)
+    if not records:
+        sys.exit("no sessions with answers to replay")
+    print(f"replaying {len(records)} sessions against {len(matrix)} models", file=sys.stderr)
+
+    outcomes: dict[str, list[dict]] = defaultdict(list)
+    # One pool per model, so each model gets its own concurrency budget.
+    pools = {f"{p}:{m}": ThreadPoolExecutor(max_workers=args.concurrency) for p, m in matrix}
+    futures = {}
+    for provider, model in matrix:
+        key = f"{provider}:{model}"
+        try:
+            client = _create_client(provider, model)
+        except LLMError as e:
+            print(f"skipping {key}: {e}", file=sys.stderr)
+            continue
+        for record in records:
+            futures[pools[key].submit(run_one, client, record, args.variant)] = key
+    done = 0
+    for future in as_completed(futures):
+        outcomes[futures[future]].append(future.result())
+        done += 1
+        if done % 25 == 0:
+            print(f"  {done}/{len(futures)}", file=sys.stderr)
+    for pool in pools.values():
+        pool.shutdown()
+
+    summary = {key: summarize(outcomes[key]) for key in pools if outcomes[key]}
+    print_table(summary)
+    if args.json:
+        Path(args.json).write_text(json.dumps({"summary": summary, "outcomes": outcomes}, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Stress the shared SQLite session database with concurrent booth processes.
+
+Spawns N writer processes that each log sessions (plus feedback) as fast as
+they can against one database file, then reports commit throughput and how
+many writes were lost (calls that returned None or rows missing from the
+database).
+
+Usage:
+    ./scripts/sqlite_stress.py                       # 8 writers x 200 sessions
+    ./scripts/sqlite_stress.py --writers 32 --sessions 500
+    ./scripts/sqlite_stress.py --baseline            # no busy_timeout/retries
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sqlalchemy import func, select
+
+from session_logging.schema import feedback_table, sessions_table
+from session_logging.session_logger import SessionLogger
+
+
+def _writer(db_path: Path, sessions: int, feedback_every: int, start, results) -> None:
+    logger = SessionLogger(db_path=db_path)
+    start.wait()
+    ok = failed = 0
+    latencies = []
+    for i in range(sessions):
+        t0 = time.perf_counter()
+        session_id = logger.log_session(
+            style="w",
+            qa_transcript=[{"question_id": "vibe", "answer": f"answer {i}"}],
+            nicknames=["Dustbunny", "Glimmer", f"Name{i}"],
+            llm_response_raw=f'{{"nicknames": ["Dustbunny", "Glimmer", "Name{i}"]}}',
+        )
+        if session_id is not None and feedback_every and i % feedback_every == 0:
+            feedback_id = logger.log_feedback(
+                session_id=session_id,
+                favorite_names=["Glimmer"],
+                helpful_questions=["vibe"],
+                unhelpful_questions=[],
+                suggested_questions="",
+                self_suggested_name="",
+            )
+            if feedback_id is None:
+                failed += 1
+            else:
+                ok += 1
+        latencies.append(time.perf_counter() - t0)
+        if session_id is None:
+            failed += 1
+        else:
+            ok += 1
+    results.put((ok, failed, latencies))
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=8, help="concurrent writer processes")
+    parser.add_argument("--sessions", type=int, default=200, help="sessions per writer")
+    parser.add_argument("--feedback-every", type=int, default=2, help="log feedback for every Nth session (0: never)")
+    parser.add_argument("--db", help="database path (default: a fresh temporary file)")
+    parser.add_argument(
+        "--baseline",
+        action="store_true",
+        help="disable busy_timeout, lock retries and synchronous=NORMAL to compare with the old setup",
+    )
+    args = parser.parse_args()
+
+    os.environ.pop("DATABASE_URL", None)
+    if args.baseline:
+        os.environ.update(SQLITE_BUSY_TIMEOUT_MS="0", SQLITE_LOCK_RETRIES="0", SQLITE_SYNCHRONOUS="FULL")
+
+    tmp = None
+    if args.db:
+        db_path = Path(args.db)
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        db_path = Path(tmp.name) / "stress.db"
+
+    # Create and migrate the schema once, before the writers race.
+    logger = SessionLogger(db_path=db_path)
+    with logger.engine.connect() as conn:
+        sessions_before = conn.execute(select(func.count()).select_from(sessions_table)).scalar_one()
+        feedback_before = conn.execute(select(func.count()).select_from(feedback_table)).scalar_one()
+
+    start = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(
+            target=_writer, args=(db_path, args.sessions, args.feedback_every, start, results)
+        )
+        for _ in range(args.writers)
+    ]
+    for proc in procs:
+        proc.start()
+    time.sleep(0.5)  # let every writer open its engine
+    t0 = time.perf_counter()
+    start.set()
+    outcomes = [results.get() for _ in procs]
+    elapsed = time.perf_counter() - t0
+    for proc in procs:
+        proc.join()
+
+    ok = sum(o[0] for o in outcomes)
+    failed = sum(o[1] for o in outcomes)
+    latencies = [lat for o in outcomes for lat in o[2]]
+    with logger.engine.connect() as conn:
+        sessions = conn.execute(select(func.count()).select_from(sessions_table)).scalar_one() - sessions_before
+        feedback = conn.execute(select(func.count()).select_from(feedback_table)).scalar_one() - feedback_before
+    stored = sessions + feedback
+
+    print(f"writers:        {args.writers} x {args.sessions} sessions{' (baseline)' if args.baseline else ''}")
+    print(f"elapsed:        {elapsed:.2f}s")
+    print(f"commits:        {ok} ok, {failed} failed")
+    print(f"throughput:     {ok / elapsed:.0f} commits/s")
+    print(f"stored rows:    {sessions} sessions, {feedback} feedback")
+    print(f"lost writes:    {failed + max(0, ok - stored)}")
+    print(
+        f"latency:        p50 {_percentile(latencies, 50) * 1000:.1f}ms, "
+        f"p95 {_percentile(latencies, 95) * 1000:.1f}ms, "
+        f"p99 {_percentile(latencies, 99) * 1000:.1f}ms"
+    )
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,5 +4,6 @@ PORT="${1:-8080}"
 DIR="$(cd "$(dirname "$0")/.." && pwd)"
 mkdir -p "$DIR/logs"
 touch "$DIR/logs/app.log"
-tail -f "$DIR/logs/app.log" &
+# -F follows app.log across rotations.
+tail -F "$DIR/logs/app.log" &
 ttyd -W -p "$PORT" -t fontSize=26 "$DIR/src/main.py"
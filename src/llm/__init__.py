@@ -2,22 +2,52 @@
 
 import logging
 import os
+import time
+from typing import Optional
 
-from llm.base import LLMClient, LLMError
+from llm.base import GenerationResult, LLMClient, LLMError
 from llm.claude_client import ClaudeClient
+from llm.fake_client import FakeClient
 from llm.ollama_client import OllamaClient
 from llm.openai_client import OpenAIClient
+from llm.ratelimit import RateLimitedClient, RateLimiter, RateLimitTimeout
+from llm.tiering import TIER_FAST, TIER_QUALITY, TierController, TieredClient, fast_model, latency_slo_ms
+from telemetry import span
 
 log = logging.getLogger(__name__)
 
 
-def _create_client(provider: str) -> LLMClient:
-    """Create an LLM client for the given provider name."""
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def _shared_rate_limiter() -> RateLimiter:
+    """The process's RateLimiter (one SQLite connection shared by all clients)."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter.from_env()
+    return _rate_limiter
+
+
+def _create_client(provider: str, model: Optional[str] = None) -> LLMClient:
+    """Create an LLM client for the given provider name.
+
+    ``model`` overrides the provider's configured model (CLAUDE_MODEL,
+    OPENAI_MODEL, OLLAMA_MODEL). Hosted providers are wrapped in the
+    host-wide rate limiter unless RATE_LIMIT is off; local and fake clients
+    have no quota to share.
+    """
     if provider == "ollama":
-        return OllamaClient()
+        return OllamaClient(model)
     elif provider == "openai":
-        return OpenAIClient()
-    return ClaudeClient()
+        client = OpenAIClient(model)
+    elif provider == "fake":
+        return FakeClient(model)
+    else:
+        provider = "claude"
+        client = ClaudeClient(model)
+    if os.environ.get("RATE_LIMIT", "true").lower() not in ("1", "true", "yes"):
+        return client
+    return RateLimitedClient(client, _shared_rate_limiter(), f"{provider}:{client.model}")
 
 
 class FallbackClient:
@@ -29,26 +59,49 @@ class FallbackClient:
         self.used_backup = False
         self.on_fallback = None
 
-    def generate(self, messages: list[dict]) -> str:
+    def generate(self, messages: list[dict]) -> GenerationResult:
         self.used_backup = False
+        started = time.perf_counter()
         try:
-            return self.primary.generate(messages)
+            with span("llm.attempt", role="primary"):
+                return self.primary.generate(messages)
         except LLMError as primary_err:
             log.warning("Primary LLM failed (%s), falling back to backup", primary_err)
             try:
                 if self.on_fallback:
                     self.on_fallback()
-                result = self.backup.generate(messages)
+                with span("llm.attempt", role="backup"):
+                    result = self.backup.generate(messages)
                 self.used_backup = True
+                result.used_backup = True
+                # What the visitor waited, including the failed primary attempt.
+                result.latency_ms = round((time.perf_counter() - started) * 1000)
                 return result
             except LLMError:
                 raise primary_err
 
 
+def _create_tiered_client(provider: str) -> LLMClient:
+    """The provider's client, tiered by latency SLO when LATENCY_SLO_MS is set."""
+    quality = _create_client(provider)
+    slo_ms = latency_slo_ms()
+    fast = fast_model(provider)
+    if slo_ms is None or not fast or fast == quality.model:
+        return quality
+    return TieredClient(
+        {TIER_QUALITY: quality, TIER_FAST: _create_client(provider, fast)},
+        TierController.from_env(slo_ms),
+    )
+
+
 def get_client() -> LLMClient:
-    """Factory to get configured LLM client."""
+    """Factory to get configured LLM client.
+
+    Create it once and reuse it: tiered clients learn from the latency of
+    earlier generations.
+    """
     provider = os.environ.get("LLM_PROVIDER", "claude").lower()
-    primary = _create_client(provider)
+    primary = _create_tiered_client(provider)
 
     backup_provider = os.environ.get("LLM_PROVIDER_BACKUP", "").lower()
     if backup_provider:
@@ -59,6 +112,6 @@ def get_client() -> LLMClient:
 
 
 __all__ = [
-    "LLMClient", "LLMError", "ClaudeClient", "OllamaClient", "OpenAIClient",
-    "FallbackClient", "get_client",
+    "GenerationResult", "LLMClient", "LLMError", "ClaudeClient", "OllamaClient", "OpenAIClient",
+    "FakeClient", "FallbackClient", "RateLimitTimeout", "TierController", "TieredClient", "get_client",
 ]
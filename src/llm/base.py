@@ -1,13 +1,68 @@
 """Base classes for LLM clients."""
 
-from typing import Protocol
+from typing import Mapping, Optional, Protocol
+
+
+class GenerationResult:
+    """Response text plus the usage and routing metadata of one generation.
+
+    Token counts are None when the provider does not report them.
+    ``headers`` holds the HTTP response headers (rate-limit state) where the
+    client has them; they are not part of metadata() and are not logged.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        provider: str,
+        model: str,
+        request_id: Optional[str] = None,
+        input_tokens: Optional[int] = None,
+        output_tokens: Optional[int] = None,
+        cache_read_tokens: Optional[int] = None,
+        cache_write_tokens: Optional[int] = None,
+        latency_ms: Optional[int] = None,
+        used_backup: bool = False,
+        model_tier: Optional[str] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        self.text = text
+        self.provider = provider
+        self.model = model
+        self.request_id = request_id
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.cache_read_tokens = cache_read_tokens
+        self.cache_write_tokens = cache_write_tokens
+        self.latency_ms = latency_ms
+        self.used_backup = used_backup
+        self.model_tier = model_tier
+        self.headers = headers
+
+    def metadata(self) -> dict:
+        """Everything but the text, keyed like the sessions table columns."""
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "request_id": self.request_id,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "latency_ms": self.latency_ms,
+            "used_backup": self.used_backup,
+            "model_tier": self.model_tier,
+        }
+
+    def __repr__(self) -> str:
+        return f"GenerationResult({self.provider}:{self.model}, {self.latency_ms}ms, {len(self.text)} chars)"
 
 
 class LLMClient(Protocol):
     """Protocol for LLM clients. Implement generate() to create a new provider."""
 
-    def generate(self, messages: list[dict]) -> str:
-        """Send messages to LLM, return raw response text."""
+    def generate(self, messages: list[dict]) -> GenerationResult:
+        """Send messages to LLM, return the response text and its metadata."""
         ...
 
 
@@ -1,16 +1,44 @@
 """Anthropic Claude LLM client implementation."""
 
 import os
+import time
+from typing import Optional
 
 import anthropic
 
-from llm.base import LLMError
+from llm.base import GenerationResult, LLMError
+from telemetry import span
+
+
+def result_from_message(response, started: float, headers=None) -> GenerationResult:
+    """Build a GenerationResult from a Messages API response.
+
+    Raises:
+        LLMError: The response has no text block or no usage.
+    """
+    try:
+        text = next(block.text for block in response.content if getattr(block, "type", "text") == "text")
+        usage = response.usage
+        return GenerationResult(
+            text=text,
+            provider="claude",
+            model=response.model,
+            request_id=getattr(response, "_request_id", None) or response.id,
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cache_read_tokens=getattr(usage, "cache_read_input_tokens", None),
+            cache_write_tokens=getattr(usage, "cache_creation_input_tokens", None),
+            latency_ms=round((time.perf_counter() - started) * 1000),
+            headers=headers,
+        )
+    except (StopIteration, AttributeError) as e:
+        raise LLMError(f"Malformed Claude response: {e!r}") from e
 
 
 class ClaudeClient:
     """Anthropic Claude messages client."""
 
-    def __init__(self, model: str = "claude-opus-4-7"):
+    def __init__(self, model: Optional[str] = None):
         api_key = os.environ.get("ANTHROPIC_API_KEY")
         if not api_key:
             raise LLMError("ANTHROPIC_API_KEY environment variable not set")
@@ -19,10 +47,10 @@ class ClaudeClient:
             api_key=api_key,
             timeout=float(timeout_str) if timeout_str else None,
         )
-        self.model = model
+        self.model = model or os.environ.get("CLAUDE_MODEL", "claude-opus-4-7")
 
-    def generate(self, messages: list[dict]) -> str:
-        """Send messages to Claude and return response text."""
+    def generate(self, messages: list[dict]) -> GenerationResult:
+        """Send messages to Claude and return the response text with usage."""
         system = ""
         user_messages = []
         for msg in messages:
@@ -30,13 +58,17 @@ class ClaudeClient:
                 system = msg["content"]
             else:
                 user_messages.append(msg)
-        try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=1024,
-                system=system,
-                messages=user_messages,
-            )
-            return response.content[0].text
-        except Exception as e:
-            raise LLMError(f"Claude API error: {e}") from e
+        with span("llm.generate", provider="claude", model=self.model):
+            started = time.perf_counter()
+            try:
+                # Raw response for the rate-limit headers (llm.ratelimit).
+                raw = self.client.messages.with_raw_response.create(
+                    model=self.model,
+                    max_tokens=1024,
+                    system=system,
+                    messages=user_messages,
+                )
+                response = raw.parse()
+            except Exception as e:
+                raise LLMError(f"Claude API error: {e}") from e
+            return result_from_message(response, started, headers=raw.headers)
@@ -0,0 +1,72 @@
+"""Offline LLM client with injected latency, for benchmarks and load tests."""
+
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from typing import Optional
+
+from llm.base import GenerationResult, LLMError
+from llm.prompt import estimate_tokens
+from telemetry import span
+
+_WORDS = [
+    "Dust", "Ember", "Glimmer", "Shimmer", "Flutter", "Sprocket", "Zephyr",
+    "Wobble", "Nova", "Tinsel", "Mirage", "Rattle", "Sizzle", "Comet",
+    "Pickle", "Gadget", "Fizz", "Ripple", "Tumble", "Spark", "Velvet",
+    "Cinder", "Marble", "Juniper", "Static", "Bramble", "Drift", "Pixel",
+    "Sundown", "Quasar", "Banjo", "Nimbus", "Taffy", "Lantern", "Mango",
+]
+_COUNT = re.compile(r"exactly (\d+)", re.IGNORECASE)
+
+
+class FakeClient:
+    """Returns plausible nickname JSON after a configurable delay.
+
+    Configured from the environment:
+        FAKE_LLM_LATENCY_MS: mean delay per call (default 800)
+        FAKE_LLM_JITTER_MS: uniform +/- jitter around the mean (default 200)
+        FAKE_LLM_ERROR_RATE: fraction of calls that raise LLMError (default 0)
+    """
+
+    def __init__(self, model: Optional[str] = None) -> None:
+        self.model = model or "fake-1"
+        self.latency_ms = float(os.environ.get("FAKE_LLM_LATENCY_MS", "800"))
+        self.jitter_ms = float(os.environ.get("FAKE_LLM_JITTER_MS", "200"))
+        self.error_rate = float(os.environ.get("FAKE_LLM_ERROR_RATE", "0"))
+        self.rng = random.Random()
+
+    def generate(self, messages: list[dict]) -> GenerationResult:
+        """Sleep for the injected latency and return names derived from the prompt.
+
+        Honors the requested count ("exactly N") and the avoid list, so
+        candidate pools behave as with a real model.
+        """
+        prompt = "".join(m["content"] for m in messages)
+        with span("llm.generate", provider="fake", model=self.model):
+            started = time.perf_counter()
+            delay = self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)
+            time.sleep(max(delay, 0) / 1000)
+            if self.rng.random() < self.error_rate:
+                raise LLMError("Fake LLM error (injected)")
+            # Same prompt, same names: keeps runs comparable.
+            seed = int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:8], "big")
+            match = _COUNT.search(messages[0]["content"]) if messages else None
+            try:
+                avoid = set(json.loads(messages[-1]["content"]).get("avoid_names", []))
+            except (ValueError, AttributeError, IndexError):
+                avoid = set()
+            words = [w for w in _WORDS if w not in avoid]
+            names = random.Random(seed).sample(words, min(int(match.group(1)) if match else 7, len(words)))
+            text = json.dumps({"nicknames": names})
+            return GenerationResult(
+                text=text,
+                provider="fake",
+                model=self.model,
+                request_id=f"fake-{seed:016x}",
+                input_tokens=estimate_tokens(prompt),
+                output_tokens=estimate_tokens(text),
+                latency_ms=round((time.perf_counter() - started) * 1000),
+            )
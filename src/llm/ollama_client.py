@@ -1,18 +1,22 @@
 """Ollama LLM client implementation using OpenAI-compatible API."""
 
 import os
+import time
+from typing import Optional
 
 from openai import OpenAI, APIError
 
-from llm.base import LLMError
+from llm.base import GenerationResult, LLMError
+from llm.openai_client import result_from_completion
+from telemetry import span
 
 
 class OllamaClient:
     """Ollama chat completion client via OpenAI-compatible endpoint."""
 
-    def __init__(self):
+    def __init__(self, model: Optional[str] = None):
         base_url = os.environ.get("OLLAMA_HOST", "http://localhost:11434/v1")
-        model = os.environ.get("OLLAMA_MODEL", "llama3.2")
+        model = model or os.environ.get("OLLAMA_MODEL", "llama3.2")
         self.client = OpenAI(
             base_url=base_url,
             api_key="ollama",
@@ -20,13 +24,15 @@ class OllamaClient:
         )
         self.model = model
 
-    def generate(self, messages: list[dict]) -> str:
-        """Send messages to Ollama and return response text."""
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-            )
-            return response.choices[0].message.content
-        except APIError as e:
-            raise LLMError(f"Ollama API error: {e}") from e
+    def generate(self, messages: list[dict]) -> GenerationResult:
+        """Send messages to Ollama and return the response text with usage."""
+        with span("llm.generate", provider="ollama", model=self.model):
+            started = time.perf_counter()
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                )
+            except APIError as e:
+                raise LLMError(f"Ollama API error: {e}") from e
+            return result_from_completion(response, "ollama", started)
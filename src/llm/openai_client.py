@@ -1,10 +1,38 @@
 """OpenAI LLM client implementation."""
 
 import os
+import time
+from typing import Optional
 
 from openai import OpenAI, APIError
 
-from llm.base import LLMError
+from llm.base import GenerationResult, LLMError
+from telemetry import span
+
+
+def result_from_completion(response, provider: str, started: float, headers=None) -> GenerationResult:
+    """Build a GenerationResult from an OpenAI-compatible chat completion.
+
+    Raises:
+        LLMError: The completion has no choices or no message.
+    """
+    try:
+        text = response.choices[0].message.content
+    except (IndexError, AttributeError, TypeError) as e:
+        raise LLMError(f"Malformed {provider} response: {e!r}") from e
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None) if usage else None
+    return GenerationResult(
+        text=text,
+        provider=provider,
+        model=response.model,
+        request_id=getattr(response, "_request_id", None) or response.id,
+        input_tokens=usage.prompt_tokens if usage else None,
+        output_tokens=usage.completion_tokens if usage else None,
+        cache_read_tokens=getattr(details, "cached_tokens", None),
+        latency_ms=round((time.perf_counter() - started) * 1000),
+        headers=headers,
+    )
 
 
 class OpenAIClient:
@@ -12,7 +40,7 @@ class OpenAIClient:
 
     def __init__(
         self,
-        model: str = "gpt-5.2",
+        model: Optional[str] = None,
     ):
         api_key = os.environ.get("OPENAI_API_KEY")
         if not api_key:
@@ -22,15 +50,19 @@ class OpenAIClient:
             api_key=api_key,
             timeout=float(timeout_str) if timeout_str else None,
         )
-        self.model = model
-
-    def generate(self, messages: list[dict]) -> str:
-        """Send messages to OpenAI and return response text."""
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-            )
-            return response.choices[0].message.content
-        except APIError as e:
-            raise LLMError(f"OpenAI API error: {e}") from e
+        self.model = model or os.environ.get("OPENAI_MODEL", "gpt-5.2")
+
+    def generate(self, messages: list[dict]) -> GenerationResult:
+        """Send messages to OpenAI and return the response text with usage."""
+        with span("llm.generate", provider="openai", model=self.model):
+            started = time.perf_counter()
+            try:
+                # Raw response for the rate-limit headers (llm.ratelimit).
+                raw = self.client.chat.completions.with_raw_response.create(
+                    model=self.model,
+                    messages=messages,
+                )
+                response = raw.parse()
+            except APIError as e:
+                raise LLMError(f"OpenAI API error: {e}") from e
+            return result_from_completion(response, "openai", started, headers=raw.headers)
@@ -0,0 +1,89 @@
+"""Parsing and validation of nickname responses.
+
+Shared by the booth and the offline tools (scripts/shootout.py) so both
+judge model output the same way.
+"""
+
+import json
+import re
+from typing import Iterable
+
+# Mirrors the rules in the system prompts.
+EXPECTED_COUNT = 7
+MIN_LENGTH = 3
+MAX_LENGTH = 28
+MAX_WORDS = 2
+_ALLOWED = re.compile(r"^[A-Za-z'\-]+( [A-Za-z'\-]+)?$")
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*(.*?)\s*```$", re.DOTALL)
+
+
+class ResponseParseError(ValueError):
+    """The response is not a JSON object with a list of string nicknames."""
+
+    pass
+
+
+def parse_nicknames(text: str, strict: bool = False) -> list[str]:
+    """Extract the nickname list from a raw LLM response.
+
+    Unless ``strict``, a surrounding Markdown code fence is tolerated (the
+    prompt forbids it, but some models add one anyway).
+
+    Raises:
+        ResponseParseError: if the response cannot be used.
+    """
+    body = text.strip()
+    if not strict:
+        fenced = _CODE_FENCE.match(body)
+        if fenced:
+            body = fenced.group(1)
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise ResponseParseError(f"invalid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise ResponseParseError("response is not a JSON object")
+    names = data.get("nicknames", [])
+    if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+        raise ResponseParseError("'nicknames' is not a list of strings")
+    return names
+
+
+def name_violations(name: str) -> list[str]:
+    """Describe every way a single name breaks the prompt's rules."""
+    problems = []
+    if not MIN_LENGTH <= len(name) <= MAX_LENGTH:
+        problems.append(f"{name!r}: length {len(name)} outside {MIN_LENGTH}-{MAX_LENGTH}")
+    if len(name.split()) > MAX_WORDS:
+        problems.append(f"{name!r}: more than {MAX_WORDS} words")
+    if not _ALLOWED.match(name):
+        problems.append(f"{name!r}: characters outside letters, apostrophes, hyphens")
+    return problems
+
+
+def rule_violations(names: list[str], expected: int = EXPECTED_COUNT) -> list[str]:
+    """Describe every way ``names`` breaks the prompt's rules (empty if none)."""
+    problems = []
+    if len(names) != expected:
+        problems.append(f"expected {expected} names, got {len(names)}")
+    for name in names:
+        problems.extend(name_violations(name))
+    if len({n.lower() for n in names}) != len(names):
+        problems.append("duplicate names")
+    return problems
+
+
+def clean_names(names: list[str], exclude: Iterable[str] = ()) -> list[str]:
+    """Keep the valid names, first occurrence only, minus any in ``exclude``.
+
+    Comparison is case-insensitive, as visitors would see it.
+    """
+    seen = {n.lower() for n in exclude}
+    kept = []
+    for name in names:
+        name = name.strip()
+        if name.lower() in seen or name_violations(name):
+            continue
+        seen.add(name.lower())
+        kept.append(name)
+    return kept
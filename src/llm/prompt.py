@@ -1,9 +1,16 @@
 """Prompt builder for LLM nickname generation."""
 
 import json
+import logging
+import os
+import random
 from typing import Optional
 
 from data.styles import STYLES
+from llm.parse import EXPECTED_COUNT
+from telemetry import span
+
+log = logging.getLogger(__name__)
 
 SYSTEM_PROMPT = """
 You are a playa name generator for Burning Man participants. Your job is to
@@ -17,7 +24,7 @@ Respond with valid JSON only:
 Don't wrap it in a code block.
 
 ## Rules
-- Generate exactly 7 nickname candidates
+- Generate exactly {count} nickname candidates
 - Each nickname: 1-2 words, Title Case
 - Length: 3-28 characters total
 - Allowed characters: letters, apostrophes, hyphens
@@ -54,16 +61,75 @@ Chuckles - funny, ironic because his stoic and grumpy (sometimes)
 Sir Bear - Big furry guy with big presence
 Captain T-Bag - funny name, maybe there is a story"""
 
-"""
-- NO real names, insults, slurs, or protected traits
-{"nicknames": [{"name": "Name One", "explanation": "Brief explanation of how this name connects to the answers"}, ...]}
+SHORT_SYSTEM_PROMPT = """
+You generate playa names for Burning Man participants from their answers.
+
+Respond with JSON only, no code block:
+{"nicknames": ["Name One", "Nametwo", ...]}
+
+Rules:
+- Exactly {count} candidates, Title Case, 1-2 words (mostly 1), 3-28 characters
+- Letters, apostrophes and hyphens only
+- Playful, evocative, shoutable across a dance floor at 4am
+- If a real name is given, riff on it for some names (its front, a rhyme)
+- At most 1/4 alliterations
+- Aim for a contradiction, an action, a thing, a trait, irony or humor that
+  could only belong to this person
+
+Examples: Flutter, Danimal, Shimmer, Maculate, Yardsale, Chuckles, Sir Bear"""
+
+# Prompt variants for A/B testing. IDs are recorded with each session, so
+# never change a variant's text in place: add a new ID instead. "{count}" is
+# replaced with the number of names requested (EXPECTED_COUNT per screen).
+PROMPT_VARIANTS: dict[str, str] = {
+    "baseline": SYSTEM_PROMPT,
+    "short-v1": SHORT_SYSTEM_PROMPT,
+}
+DEFAULT_VARIANT = "baseline"
+
+
+def variant_weights() -> dict[str, float]:
+    """Parse PROMPT_VARIANT_WEIGHTS, e.g. "baseline=3,short-v1=1".
+
+    Unknown IDs and non-positive weights are ignored; with nothing valid
+    configured every session uses DEFAULT_VARIANT.
+    """
+    weights: dict[str, float] = {}
+    for item in os.environ.get("PROMPT_VARIANT_WEIGHTS", "").split(","):
+        variant, _, weight = item.partition("=")
+        variant = variant.strip()
+        if not variant:
+            continue
+        if variant not in PROMPT_VARIANTS:
+            log.warning("Ignoring unknown prompt variant %r", variant)
+            continue
+        try:
+            value = float(weight) if weight.strip() else 1.0
+        except ValueError:
+            log.warning("Ignoring bad weight for prompt variant %r: %r", variant, weight)
+            continue
+        if value > 0:
+            weights[variant] = value
+    return weights or {DEFAULT_VARIANT: 1.0}
+
+
+def choose_variant(rng: Optional[random.Random] = None) -> str:
+    """Pick a prompt variant for a new session according to the weights."""
+    weights = variant_weights()
+    return (rng or random).choices(list(weights), weights=list(weights.values()))[0]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for providers without usage data."""
+    return (len(text) + 3) // 4
 
-"""
 
 def build_prompt(
     qa_transcript: list[dict],
     style_mode: str,
     avoid_list: Optional[list[str]] = None,
+    variant: str = DEFAULT_VARIANT,
+    count: int = EXPECTED_COUNT,
 ) -> list[dict]:
     """
     Build OpenAI-compatible messages array.
@@ -72,26 +138,33 @@ def build_prompt(
         qa_transcript: List of {"question_id": id, "question": text, "answer": text} dicts
         style_mode: Style key ("m", "y", "c", "z")
         avoid_list: Optional list of nicknames to avoid
+        variant: Prompt variant ID from PROMPT_VARIANTS
+        count: Number of nicknames to ask for (more than one screen's worth
+            fills the candidate pool)
 
     Returns:
         List of message dicts: [{"role": "system", "content": "..."}, ...]
     """
-    # Build user message as structured JSON
-    style = STYLES.get(style_mode, STYLES["m"])
-
-    user_data = {
-        "style": style["prompt_modifier"],
-        "answers": {
-            qa["question"]: qa["answer"]
-            for qa in qa_transcript
-            if qa["answer"]  # Only include answered questions
-        },
-    }
-
-    if avoid_list:
-        user_data["avoid_names"] = avoid_list
-
-    return [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": json.dumps(user_data, indent=2)},
-    ]
\ No newline at end of file
+    with span(
+        "build_prompt", answers=len(qa_transcript), avoid=len(avoid_list or []), variant=variant, count=count
+    ):
+        # Build user message as structured JSON
+        style = STYLES.get(style_mode, STYLES["m"])
+
+        user_data = {
+            "style": style["prompt_modifier"],
+            "answers": {
+                qa["question"]: qa["answer"]
+                for qa in qa_transcript
+                if qa["answer"]  # Only include answered questions
+            },
+        }
+
+        if avoid_list:
+            user_data["avoid_names"] = avoid_list
+
+        system = PROMPT_VARIANTS.get(variant, SYSTEM_PROMPT).replace("{count}", str(count))
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": json.dumps(user_data, indent=2)},
+        ]
\ No newline at end of file
@@ -0,0 +1,360 @@
+"""Host-wide request and token rate limiting for LLM providers.
+
+Every booth process on the host shares one small SQLite file
+(logs/ratelimit.db by default), holding a token bucket per provider:model
+for requests per minute and tokens per minute, plus a FIFO queue of waiting
+requests. Capacities come from RATE_LIMIT_RPM / RATE_LIMIT_TPM when set and
+are otherwise learned from the provider's rate-limit response headers, which
+also correct the bucket levels and carry retry-after back-off to every
+process.
+
+This uses the stdlib sqlite3 module rather than SQLAlchemy so each
+read-modify-write can run under BEGIN IMMEDIATE, which serialises the
+processes without any extra locking. If that file can't be used (locked
+past the timeout, unwritable logs/ directory) generations go ahead
+unthrottled rather than failing.
+"""
+
+import contextvars
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Callable, Iterator, Mapping, Optional
+
+from llm.base import GenerationResult, LLMClient, LLMError
+from llm.prompt import estimate_tokens
+
+log = logging.getLogger(__name__)
+
+# Output tokens reserved per request before the real count is known.
+EXPECTED_OUTPUT_TOKENS = 300
+POLL_SECONDS = 0.25
+
+# (ahead, wait_seconds) -> None; called while a request waits in the queue.
+WaitCallback = Callable[[int, float], None]
+
+_on_wait: contextvars.ContextVar[Optional[WaitCallback]] = contextvars.ContextVar(
+    "rate_limit_on_wait", default=None
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    rpm REAL,
+    tpm REAL,
+    requests REAL,
+    tokens REAL,
+    updated REAL NOT NULL,
+    blocked_until REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS queue (
+    ticket INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    enqueued REAL NOT NULL
+);
+"""
+
+
+class RateLimitTimeout(LLMError):
+    """A request waited longer than RATE_LIMIT_MAX_WAIT_SECONDS for quota."""
+
+    pass
+
+
+@contextmanager
+def waiting_callback(callback: WaitCallback) -> Iterator[None]:
+    """Call ``callback(ahead, wait_seconds)`` while generations in this context queue."""
+    token = _on_wait.set(callback)
+    try:
+        yield
+    finally:
+        _on_wait.reset(token)
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds to back off from retry-after-ms / retry-after (seconds or HTTP date)."""
+    ms = _number(headers.get("retry-after-ms"))
+    if ms is not None:
+        return ms / 1000
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    seconds = _number(value)
+    if seconds is not None:
+        return seconds
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_rate_limit_headers(headers: Mapping[str, str]) -> dict[str, Optional[float]]:
+    """Normalise Anthropic and OpenAI rate-limit headers.
+
+    Returns requests_limit, requests_remaining, tokens_limit,
+    tokens_remaining and retry_after (seconds); each is None if absent.
+    """
+    h = {k.lower(): v for k, v in headers.items()}
+
+    def first(*names: str) -> Optional[float]:
+        for name in names:
+            value = _number(h.get(name))
+            if value is not None:
+                return value
+        return None
+
+    return {
+        "requests_limit": first("anthropic-ratelimit-requests-limit", "x-ratelimit-limit-requests"),
+        "requests_remaining": first("anthropic-ratelimit-requests-remaining", "x-ratelimit-remaining-requests"),
+        "tokens_limit": first(
+            "anthropic-ratelimit-tokens-limit", "anthropic-ratelimit-input-tokens-limit", "x-ratelimit-limit-tokens"
+        ),
+        "tokens_remaining": first(
+            "anthropic-ratelimit-tokens-remaining",
+            "anthropic-ratelimit-input-tokens-remaining",
+            "x-ratelimit-remaining-tokens",
+        ),
+        "retry_after": _retry_after(h),
+    }
+
+
+class RateLimiter:
+    """Token buckets and a wait queue shared through a SQLite file.
+
+    Args:
+        path: The shared database file.
+        rpm: Requests per minute for keys the provider hasn't reported on
+            (None: unlimited until headers say otherwise).
+        tpm: Tokens per minute, likewise.
+        max_wait: Longest a request queues before RateLimitTimeout.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        max_wait: float = 20.0,
+    ) -> None:
+        self.path = path
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_wait = max_wait
+        # Opened on first use, so building a client never touches the disk.
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        default = Path(__file__).parent.parent.parent / "logs" / "ratelimit.db"
+        return cls(
+            Path(os.environ.get("RATE_LIMIT_DB", default)),
+            rpm=_number(os.environ.get("RATE_LIMIT_RPM")),
+            tpm=_number(os.environ.get("RATE_LIMIT_TPM")),
+            max_wait=float(os.environ.get("RATE_LIMIT_MAX_WAIT_SECONDS", "20")),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(_SCHEMA)
+        return db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            if self._db is None:
+                self._db = self._connect()
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def _bucket(self, db: sqlite3.Connection, key: str, now: float) -> dict:
+        """Load (creating if needed) and refill ``key``'s bucket to ``now``."""
+        row = db.execute(
+            "SELECT rpm, tpm, requests, tokens, updated, blocked_until FROM buckets WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            bucket = {"rpm": self.rpm, "tpm": self.tpm, "requests": self.rpm, "tokens": self.tpm, "blocked_until": 0.0}
+        else:
+            rpm, tpm, requests, tokens, updated, blocked_until = row
+            elapsed = max(now - updated, 0.0)
+            bucket = {
+                "rpm": rpm,
+                "tpm": tpm,
+                "requests": min(rpm, requests + elapsed * rpm / 60) if rpm else None,
+                "tokens": min(tpm, tokens + elapsed * tpm / 60) if tpm else None,
+                "blocked_until": blocked_until,
+            }
+        bucket["updated"] = now
+        return bucket
+
+    def _save(self, db: sqlite3.Connection, key: str, bucket: dict) -> None:
+        db.execute(
+            "INSERT OR REPLACE INTO buckets (key, rpm, tpm, requests, tokens, updated, blocked_until)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, bucket["rpm"], bucket["tpm"], bucket["requests"], bucket["tokens"],
+             bucket["updated"], bucket["blocked_until"]),
+        )
+
+    @staticmethod
+    def _wait_seconds(bucket: dict, tokens: float, now: float) -> float:
+        """How long until ``bucket`` can serve a request of ``tokens``."""
+        wait = bucket["blocked_until"] - now
+        if bucket["rpm"] and bucket["requests"] < 1:
+            wait = max(wait, (1 - bucket["requests"]) * 60 / bucket["rpm"])
+        if bucket["tpm"]:
+            # Never ask for more than a full bucket, or the request could never run.
+            needed = min(tokens, bucket["tpm"])
+            if bucket["tokens"] < needed:
+                wait = max(wait, (needed - bucket["tokens"]) * 60 / bucket["tpm"])
+        return wait
+
+    def acquire(self, key: str, tokens: float, on_wait: Optional[WaitCallback] = None) -> float:
+        """Take one request and ``tokens`` tokens from ``key``'s buckets.
+
+        Requests are served in arrival order across processes. Returns the
+        seconds spent queueing.
+
+        Raises:
+            RateLimitTimeout: if quota isn't available within max_wait.
+        """
+        started = time.time()
+        ticket = None
+        try:
+            while True:
+                now = time.time()
+                with self._transaction() as db:
+                    # Tickets left behind by crashed processes expire.
+                    db.execute("DELETE FROM queue WHERE enqueued < ?", (now - 2 * self.max_wait - 60,))
+                    bucket = self._bucket(db, key, now)
+                    if ticket is None:
+                        ahead = db.execute("SELECT COUNT(*) FROM queue WHERE key = ?", (key,)).fetchone()[0]
+                    else:
+                        ahead = db.execute(
+                            "SELECT COUNT(*) FROM queue WHERE key = ? AND ticket < ?", (key, ticket)
+                        ).fetchone()[0]
+                    wait = self._wait_seconds(bucket, tokens, now)
+                    if ahead == 0 and wait <= 0:
+                        if bucket["rpm"]:
+                            bucket["requests"] -= 1
+                        if bucket["tpm"]:
+                            bucket["tokens"] -= tokens
+                        self._save(db, key, bucket)
+                        return now - started
+                    if ticket is None:
+                        ticket = db.execute(
+                            "INSERT INTO queue (key, enqueued) VALUES (?, ?)", (key, now)
+                        ).lastrowid
+                if now + max(wait, 0) - started > self.max_wait:
+                    raise RateLimitTimeout(f"{key}: rate limited, no quota within {self.max_wait:.0f}s")
+                if on_wait:
+                    on_wait(ahead, max(wait, 0.0))
+                time.sleep(min(max(wait, POLL_SECONDS), 2.0) if ahead == 0 else POLL_SECONDS)
+        finally:
+            if ticket is not None:
+                with self._transaction() as db:
+                    db.execute("DELETE FROM queue WHERE ticket = ?", (ticket,))
+
+    def settle(self, key: str, reserved: float, used: float) -> None:
+        """Return (or charge) the difference between reserved and actual tokens."""
+        with self._transaction() as db:
+            bucket = self._bucket(db, key, time.time())
+            if bucket["tpm"]:
+                bucket["tokens"] = min(bucket["tpm"], bucket["tokens"] + reserved - used)
+                self._save(db, key, bucket)
+
+    def observe(self, key: str, headers: Mapping[str, str]) -> None:
+        """Adopt the provider's view of ``key``'s limits from response headers."""
+        info = parse_rate_limit_headers(headers)
+        if all(value is None for value in info.values()):
+            return
+        now = time.time()
+        with self._transaction() as db:
+            bucket = self._bucket(db, key, now)
+            for kind, level in (("requests", "rpm"), ("tokens", "tpm")):
+                limit, remaining = info[f"{kind}_limit"], info[f"{kind}_remaining"]
+                if limit is not None:
+                    if bucket[level] is None:
+                        bucket[kind] = limit
+                    bucket[level] = limit
+                if remaining is not None and bucket[level]:
+                    bucket[kind] = min(bucket[kind], remaining)
+            if info["retry_after"] is not None:
+                bucket["blocked_until"] = max(bucket["blocked_until"], now + info["retry_after"])
+                log.warning("%s: provider asked to retry after %.1fs", key, info["retry_after"])
+            self._save(db, key, bucket)
+
+
+def _error_response(err: LLMError) -> tuple[Optional[int], Mapping[str, str]]:
+    """Status code and headers of the SDK HTTP error behind ``err``, if any."""
+    response = getattr(err.__cause__, "response", None)
+    if response is None:
+        return None, {}
+    return getattr(response, "status_code", None), getattr(response, "headers", {}) or {}
+
+
+class RateLimitedClient:
+    """Queues generations on a shared RateLimiter before calling ``client``.
+
+    Errors from the limiter's database fail open: the generation runs
+    unthrottled and a warning is logged.
+    """
+
+    def __init__(self, client: LLMClient, limiter: RateLimiter, key: str) -> None:
+        self.client = client
+        self.limiter = limiter
+        self.key = key
+
+    @property
+    def model(self) -> str:
+        return self.client.model
+
+    def _limit(self, step: Callable, *args, **kwargs):
+        """Run a limiter step, failing open if its database is unusable."""
+        try:
+            return step(self.key, *args, **kwargs)
+        except (sqlite3.Error, OSError) as e:
+            log.warning("%s: rate limiter unavailable (%s), not throttling", self.key, e)
+            return None
+
+    def generate(self, messages: list[dict]) -> GenerationResult:
+        reserved = sum(estimate_tokens(m["content"]) for m in messages) + EXPECTED_OUTPUT_TOKENS
+        on_wait = _on_wait.get()
+        requeued = False
+        while True:
+            self._limit(self.limiter.acquire, reserved, on_wait=on_wait)
+            try:
+                result = self.client.generate(messages)
+                break
+            except LLMError as e:
+                status, headers = _error_response(e)
+                self._limit(self.limiter.observe, headers)
+                if status != 429 or requeued:
+                    raise
+                # Queue again behind the provider's retry-after instead of failing.
+                log.warning("%s: 429 from provider, requeueing", self.key)
+                requeued = True
+        self._limit(self.limiter.observe, result.headers or {})
+        used = (result.input_tokens or 0) + (result.output_tokens or 0)
+        if used:
+            self._limit(self.limiter.settle, reserved, used)
+        return result
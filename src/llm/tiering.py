@@ -0,0 +1,151 @@
+"""Latency-SLO-driven switching between a provider's quality and fast models.
+
+Each provider can have two tiers: ``quality`` (the configured model, e.g.
+CLAUDE_MODEL) and ``fast`` (e.g. CLAUDE_FAST_MODEL). TierController watches
+a rolling percentile of quality-tier latency; when it breaches
+LATENCY_SLO_MS the booth drops to the fast tier, and an occasional probe
+request on the quality tier decides when it has recovered.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from llm.base import GenerationResult, LLMClient, LLMError
+
+log = logging.getLogger(__name__)
+
+TIER_QUALITY = "quality"
+TIER_FAST = "fast"
+
+# Used when <PROVIDER>_FAST_MODEL is not set. Providers without an entry
+# (ollama, fake) only tier when a fast model is configured explicitly.
+DEFAULT_FAST_MODELS = {
+    "claude": "claude-haiku-4-5",
+    "openai": "gpt-5-mini",
+}
+
+
+def fast_model(provider: str) -> Optional[str]:
+    """The fast-tier model for ``provider``, or None if it has none."""
+    return os.environ.get(f"{provider.upper()}_FAST_MODEL") or DEFAULT_FAST_MODELS.get(provider)
+
+
+def latency_slo_ms() -> Optional[float]:
+    """LATENCY_SLO_MS as a number, or None when tiering is off."""
+    value = os.environ.get("LATENCY_SLO_MS", "").strip()
+    return float(value) if value else None
+
+
+class TierController:
+    """Picks the tier for each generation from recent quality-tier latency.
+
+    Args:
+        slo_ms: Target latency for the ``percentile`` of the window.
+        window: Number of recent quality-tier samples considered.
+        percentile: Which percentile of the window is held to the SLO.
+        min_samples: Samples needed before switching either way.
+        recover_ratio: Switch back only once the percentile is below
+            ``slo_ms * recover_ratio``, so the tier doesn't flap at the edge.
+        probe_every: While on the fast tier, every Nth generation goes to the
+            quality tier to measure whether it has recovered.
+    """
+
+    def __init__(
+        self,
+        slo_ms: float,
+        window: int = 20,
+        percentile: float = 90,
+        min_samples: int = 5,
+        recover_ratio: float = 0.8,
+        probe_every: int = 5,
+    ) -> None:
+        self.slo_ms = slo_ms
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.recover_ratio = recover_ratio
+        self.probe_every = probe_every
+        self.tier = TIER_QUALITY
+        self.samples: deque[float] = deque(maxlen=window)
+        self._since_probe = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, slo_ms: float) -> "TierController":
+        return cls(
+            slo_ms,
+            window=int(os.environ.get("LATENCY_SLO_WINDOW", "20")),
+            percentile=float(os.environ.get("LATENCY_SLO_PERCENTILE", "90")),
+            min_samples=int(os.environ.get("LATENCY_SLO_MIN_SAMPLES", "5")),
+            probe_every=int(os.environ.get("TIER_PROBE_EVERY", "5")),
+        )
+
+    def current_latency_ms(self) -> Optional[float]:
+        """The windowed percentile of quality-tier latency (None if no samples)."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+
+    def choose(self) -> str:
+        """Tier for the next generation."""
+        with self._lock:
+            if self.tier == TIER_QUALITY or self.probe_every <= 0:
+                return self.tier
+            self._since_probe += 1
+            if self._since_probe >= self.probe_every:
+                self._since_probe = 0
+                return TIER_QUALITY
+            return TIER_FAST
+
+    def record(self, tier: str, latency_ms: float) -> None:
+        """Feed back how long a generation on ``tier`` took; may switch tiers."""
+        if tier != TIER_QUALITY:
+            return
+        with self._lock:
+            self.samples.append(latency_ms)
+            if len(self.samples) < self.min_samples:
+                return
+            observed = self.current_latency_ms()
+            if self.tier == TIER_QUALITY and observed > self.slo_ms:
+                self._switch(TIER_FAST, observed)
+            elif self.tier == TIER_FAST and observed <= self.slo_ms * self.recover_ratio:
+                self._switch(TIER_QUALITY, observed)
+
+    def _switch(self, tier: str, observed: float) -> None:
+        log.warning(
+            "Switching to %s tier: p%g latency %.0fms vs SLO %.0fms",
+            tier, self.percentile, observed, self.slo_ms,
+        )
+        self.tier = tier
+        # Judge the new state on fresh quality-tier samples only.
+        self.samples.clear()
+        self._since_probe = 0
+
+
+class TieredClient:
+    """Routes each generation to a provider's quality or fast model."""
+
+    def __init__(self, clients: dict[str, LLMClient], controller: TierController) -> None:
+        self.clients = clients
+        self.controller = controller
+
+    @property
+    def model(self) -> str:
+        return self.clients[TIER_QUALITY].model
+
+    def generate(self, messages: list[dict]) -> GenerationResult:
+        tier = self.controller.choose()
+        started = time.perf_counter()
+        try:
+            result = self.clients[tier].generate(messages)
+        except LLMError:
+            # A failed or timed-out call still cost the visitor this long.
+            self.controller.record(tier, (time.perf_counter() - started) * 1000)
+            raise
+        self.controller.record(tier, result.latency_ms or (time.perf_counter() - started) * 1000)
+        result.model_tier = tier
+        return result
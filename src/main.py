@@ -2,15 +2,18 @@
 """Entry point for the Playa Nickname Booth."""
 
 import argparse
+import atexit
 import json
 import logging
 import os
 import sys
 from pathlib import Path
+from typing import Optional
 
 from dotenv import load_dotenv
 
-from session_logging import SessionLogger
+import telemetry
+from session_logging import SessionLogger, SessionWriter
 from ui.terminal import Terminal
 
 
@@ -23,14 +26,36 @@ def load_answers(filepath: str) -> dict[str, str]:
 
 
 def setup_logging():
-    """Configure file-based logging for error visibility in Replit console."""
-    log_dir = Path(__file__).resolve().parent.parent / "logs"
-    log_dir.mkdir(exist_ok=True)
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-        handlers=[logging.FileHandler(log_dir / "app.log")],
-    )
+    """Log to logs/app.log (or LOG_FILE) through a background writer with rotation."""
+    default_path = Path(__file__).resolve().parent.parent / "logs" / "app.log"
+    telemetry.configure_logging(Path(os.getenv("LOG_FILE") or default_path))
+
+
+def setup_telemetry():
+    """Export spans to a local JSONL file and optionally serve /metrics.
+
+    TRACE_FILE overrides the default logs/traces.jsonl; set TRACING=false to
+    keep spans in memory only. METRICS_PORT enables the Prometheus endpoint.
+    """
+    if os.getenv("TRACING", "true").lower() in ("1", "true", "yes"):
+        default_path = Path(__file__).resolve().parent.parent / "logs" / "traces.jsonl"
+        telemetry.configure(Path(os.getenv("TRACE_FILE") or default_path))
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        telemetry.start_metrics_server(int(metrics_port))
+
+
+def setup_memory_watchdog() -> Optional[telemetry.MemoryWatchdog]:
+    """Checkpoint memory at every start screen unless MEMORY_WATCHDOG=false.
+
+    Snapshots go to MEMORY_SNAPSHOT_FILE (default logs/memory.jsonl).
+    Created before the terminal and LLM clients so tracemalloc, when
+    TRACEMALLOC_FRAMES turns it on, sees them built.
+    """
+    if os.getenv("MEMORY_WATCHDOG", "true").lower() not in ("1", "true", "yes"):
+        return None
+    default_path = Path(__file__).resolve().parent.parent / "logs" / "memory.jsonl"
+    return telemetry.MemoryWatchdog.from_env(Path(os.getenv("MEMORY_SNAPSHOT_FILE") or default_path))
 
 
 def validate_provider_key(provider: str, label: str) -> None:
@@ -47,10 +72,12 @@ def validate_provider_key(provider: str, label: str) -> None:
 
 def main():
     """Run the Playa Nickname Booth application."""
+    load_dotenv()
     setup_logging()
     log = logging.getLogger(__name__)
 
-    load_dotenv()
+    memory = setup_memory_watchdog()
+    setup_telemetry()
 
     provider = os.getenv("LLM_PROVIDER", "openai").lower()
     validate_provider_key(provider, "primary")
@@ -73,12 +100,24 @@ def main():
         prefill_answers = load_answers(args.answers)
 
     session_logger = SessionLogger()
-    terminal = Terminal(prefill_answers=prefill_answers, logger=session_logger)
+    if os.getenv("ASYNC_LOGGING", "true").lower() in ("1", "true", "yes"):
+        session_logger = SessionWriter(session_logger)
+    atexit.register(session_logger.close)
+    terminal = Terminal(prefill_answers=prefill_answers, logger=session_logger, memory=memory)
+    recycle = False
     try:
         terminal.run()
+    except telemetry.RecycleProcess as e:
+        log.warning("Recycling booth process: %s", e)
+        recycle = True
     except Exception:
         log.exception("Terminal crashed")
         sys.exit(1)
+    finally:
+        session_logger.close()
+    if recycle:
+        # Same pty, same arguments; the visitor just sees the start screen.
+        telemetry.restart_process()
 
 
 if __name__ == "__main__":
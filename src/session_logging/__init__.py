@@ -1,5 +1,6 @@
 """Session logging module for tracking nickname generation sessions."""
 
 from session_logging.session_logger import SessionLogger
+from session_logging.writer import SessionRef, SessionTicket, SessionWriter
 
-__all__ = ["SessionLogger"]
+__all__ = ["SessionLogger", "SessionRef", "SessionTicket", "SessionWriter"]
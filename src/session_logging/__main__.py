@@ -1,14 +1,171 @@
-"""Dump sessions as pretty-printed JSON.
+"""Command-line access to the session database.
 
 Usage:
-    python -m session_logging          # all sessions
-    python -m session_logging 5        # session 5 only
+    python -m session_logging                  # all sessions, pretty-printed JSON
+    python -m session_logging 5                # session 5 only
+    python -m session_logging export           # all sessions as NDJSON
+    python -m session_logging export --since 1200 --style y
+    python -m session_logging export --start 2026-08-25 --end 2026-08-26
+    python -m session_logging export --watermark-file logs/export.watermark
+    python -m session_logging stats            # feedback analytics from rollups
+    python -m session_logging compact          # compress/dedupe stored raw responses
+    python -m session_logging maintain --archive-days 3   # archive, vacuum, checkpoint
+    python -m session_logging sync             # push pending rows to DATABASE_URL (hybrid mode)
+    python -m session_logging variants         # prompt variant A/B comparison
 """
 
+import argparse
+import json
+import os
 import sys
+from pathlib import Path
 
+from session_logging.export import write_json_array, write_ndjson
+from session_logging.maintenance import archive_after_days, maintain
+from session_logging.rollups import format_stats, read_stats, refresh_rollups
 from session_logging.session_logger import SessionLogger
+from session_logging.sync import SyncWorker, hybrid_enabled
+from session_logging.variants import format_variant_report, variant_report
 
-logger = SessionLogger()
-sid = int(sys.argv[1]) if len(sys.argv) > 1 else None
-print(logger.dump_sessions(sid))
+
+def _add_filter_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--start", help="only sessions at or after this ISO timestamp/date (UTC)")
+    parser.add_argument("--end", help="only sessions before this ISO timestamp/date (UTC)")
+    parser.add_argument("--style", help="only sessions with this style key")
+    parser.add_argument("--process-id", help="only sessions from this booth process")
+    parser.add_argument(
+        "--include-raw",
+        action="store_true",
+        help="include the raw LLM response (decompressed)",
+    )
+    parser.add_argument(
+        "--has-feedback",
+        action=argparse.BooleanOptionalAction,
+        help="only sessions with (or, with --no-has-feedback, without) feedback",
+    )
+
+
+def _filters(args: argparse.Namespace) -> dict:
+    return {
+        "start": args.start,
+        "end": args.end,
+        "style": args.style,
+        "process_id": args.process_id,
+        "has_feedback": args.has_feedback,
+        "include_raw": args.include_raw,
+    }
+
+
+def cmd_dump(logger: SessionLogger, args: argparse.Namespace) -> None:
+    write_json_array(logger.iter_sessions(session_id=args.session_id), sys.stdout)
+
+
+def cmd_export(logger: SessionLogger, args: argparse.Namespace) -> None:
+    since = args.since
+    watermark = Path(args.watermark_file) if args.watermark_file else None
+    if since is None and watermark is not None and watermark.exists():
+        since = int(watermark.read_text().strip() or 0)
+    last_id = write_ndjson(logger.iter_sessions(since=since, **_filters(args)), sys.stdout)
+    sys.stdout.flush()
+    if watermark is not None and last_id is not None:
+        watermark.write_text(f"{last_id}\n")
+
+
+def cmd_stats(logger: SessionLogger, args: argparse.Namespace) -> None:
+    if not args.no_refresh:
+        refresh_rollups(logger.engine)
+    stats = read_stats(logger.engine)
+    print(json.dumps(stats, indent=2) if args.json else format_stats(stats))
+
+
+def cmd_compact(logger: SessionLogger, args: argparse.Namespace) -> None:
+    totals = logger.compact_responses()
+    print(
+        f"compacted {totals['rows']} sessions "
+        f"({totals['raw_bytes']} raw bytes, {totals['stored_payloads']} new distinct payloads)"
+    )
+    if totals["rows"]:
+        print("run `python -m session_logging maintain` to return the freed space to disk")
+
+
+def cmd_maintain(logger: SessionLogger, args: argparse.Namespace) -> None:
+    archive_dir = Path(args.archive_dir) if args.archive_dir else Path(logger.db_path).parent / "archive"
+    report = maintain(logger.engine, archive_days=args.archive_days, archive_dir=archive_dir)
+    print(json.dumps(report, indent=2))
+
+
+def cmd_sync(logger: SessionLogger, args: argparse.Namespace) -> None:
+    if not hybrid_enabled():
+        sys.exit("sync needs HYBRID_SYNC=true and DATABASE_URL")
+    sent = SyncWorker(logger.engine, os.environ["DATABASE_URL"]).sync_once()
+    print(f"synced {sent['sessions']} sessions and {sent['feedback']} feedback rows")
+
+
+def cmd_variants(logger: SessionLogger, args: argparse.Namespace) -> None:
+    report = variant_report(logger.engine, start=args.start, end=args.end)
+    print(json.dumps(report, indent=2) if args.json else format_variant_report(report))
+
+
+def main(argv: list[str]) -> None:
+    # Bare `python -m session_logging [ID]` keeps its original meaning.
+    if not argv or argv[0].isdigit():
+        args = argparse.Namespace(session_id=int(argv[0]) if argv else None)
+        cmd_dump(SessionLogger(sync=False), args)
+        return
+
+    parser = argparse.ArgumentParser(prog="python -m session_logging")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="stream sessions as NDJSON")
+    export.add_argument("--since", type=int, help="only sessions with session_id above this watermark")
+    export.add_argument(
+        "--watermark-file",
+        help="read --since from this file and store the last exported session_id back",
+    )
+    _add_filter_args(export)
+    export.set_defaults(handler=cmd_export)
+
+    stats = commands.add_parser("stats", help="feedback analytics from the rollup tables")
+    stats.add_argument("--json", action="store_true", help="print raw JSON")
+    stats.add_argument(
+        "--no-refresh",
+        action="store_true",
+        help="skip folding in sessions logged since the last refresh",
+    )
+    stats.set_defaults(handler=cmd_stats)
+
+    compact = commands.add_parser("compact", help="move raw responses into the compressed store")
+    compact.set_defaults(handler=cmd_compact)
+
+    maintain_cmd = commands.add_parser(
+        "maintain",
+        help="archive old sessions, vacuum and checkpoint (best run while the booth is closed)",
+    )
+    maintain_cmd.add_argument(
+        "--archive-days",
+        type=float,
+        default=archive_after_days(),
+        help="move sessions older than this many days to archive databases "
+        "(default: ARCHIVE_AFTER_DAYS, else no archival)",
+    )
+    maintain_cmd.add_argument(
+        "--archive-dir",
+        help="where to write sessions-YYYY-MM-DD.db archives (default: logs/archive)",
+    )
+    maintain_cmd.set_defaults(handler=cmd_maintain)
+
+    sync = commands.add_parser("sync", help="replicate pending local rows to DATABASE_URL now")
+    sync.set_defaults(handler=cmd_sync)
+
+    variants = commands.add_parser("variants", help="compare prompt variants on tokens, latency and quality")
+    variants.add_argument("--start", help="only sessions at or after this ISO timestamp/date (UTC)")
+    variants.add_argument("--end", help="only sessions before this ISO timestamp/date (UTC)")
+    variants.add_argument("--json", action="store_true", help="print raw JSON")
+    variants.set_defaults(handler=cmd_variants)
+
+    args = parser.parse_args(argv)
+    args.handler(SessionLogger(sync=False), args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
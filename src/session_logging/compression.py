@@ -0,0 +1,50 @@
+"""Compression codecs for stored LLM responses.
+
+zstd is used when the optional ``zstandard`` package is installed,
+otherwise zlib from the standard library.
+"""
+
+import hashlib
+import os
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+ENCODINGS = ("zstd", "zlib", "none")
+
+
+def default_encoding() -> str:
+    """Encoding for new rows: RESPONSE_COMPRESSION, else zstd if available, else zlib."""
+    configured = os.environ.get("RESPONSE_COMPRESSION", "").lower()
+    if configured in ENCODINGS:
+        if configured == "zstd" and zstandard is None:
+            return "zlib"
+        return configured
+    return "zstd" if zstandard is not None else "zlib"
+
+
+def content_hash(text: str) -> str:
+    """Stable key used to deduplicate identical payloads."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def encode(text: str, encoding: str) -> bytes:
+    raw = text.encode("utf-8")
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(raw)
+    if encoding == "zlib":
+        return zlib.compress(raw, 9)
+    return raw
+
+
+def decode(payload: bytes, encoding: str) -> str:
+    if encoding == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd-compressed response but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload).decode("utf-8")
+    if encoding == "zlib":
+        return zlib.decompress(payload).decode("utf-8")
+    return payload.decode("utf-8")
@@ -0,0 +1,30 @@
+"""Streaming writers for session exports."""
+
+import json
+from typing import Iterable, Optional, TextIO
+
+
+def write_ndjson(records: Iterable[dict], out: TextIO) -> Optional[int]:
+    """Write one JSON object per line.
+
+    Returns:
+        The last session_id written (the next ``--since`` watermark), or None
+        if nothing was written.
+    """
+    last_id = None
+    for record in records:
+        out.write(json.dumps(record, separators=(",", ":")) + "\n")
+        last_id = record["session_id"]
+    return last_id
+
+
+def write_json_array(records: Iterable[dict], out: TextIO) -> None:
+    """Write a pretty-printed JSON array without holding it in memory."""
+    out.write("[")
+    first = True
+    for record in records:
+        out.write("\n" if first else ",\n")
+        body = json.dumps(record, indent=2)
+        out.write("  " + body.replace("\n", "\n  "))
+        first = False
+    out.write("\n]\n" if not first else "]\n")
@@ -0,0 +1,25 @@
+"""Write transactions that hold the database write lock from the start.
+
+pysqlite only sends a (deferred) BEGIN right before the first INSERT,
+UPDATE or DELETE, so anything a transaction reads first -- a watermark, a
+schema version -- can be changed by another booth process before the
+transaction writes. ``write_transaction`` starts SQLite transactions with
+BEGIN IMMEDIATE instead, which takes the write lock up front (waiting up
+to busy_timeout for it) so read-then-write sequences are serialized across
+processes. Server databases use their normal transactions; callers lock
+the rows they read with SELECT ... FOR UPDATE.
+"""
+
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import Connection, Engine
+
+
+@contextmanager
+def write_transaction(engine: Engine) -> Iterator[Connection]:
+    """Like ``engine.begin()``, but holding SQLite's write lock for the whole transaction."""
+    with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        yield conn
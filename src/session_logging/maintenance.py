@@ -0,0 +1,294 @@
+"""Housekeeping for long-running SQLite session databases.
+
+WAL checkpoints, incremental vacuum, and archival of old sessions into
+dated archive databases. Everything here is a no-op on non-SQLite engines
+except archival, which works on any backend.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import Connection, Engine, Select, create_engine, delete, exists, select
+from sqlalchemy.dialects import sqlite
+
+from session_logging.migrations import migrate
+from session_logging.rollups import refresh_rollups
+from session_logging.schema import feedback_table, llm_responses_table, sessions_table, sync_state_table
+from session_logging.sync import hybrid_enabled
+from telemetry import span
+
+log = logging.getLogger(__name__)
+
+ARCHIVE_BATCH_SIZE = 500
+# Truncate the WAL during idle maintenance once it grows past this size.
+WAL_TRUNCATE_BYTES = 64 * 1024 * 1024
+# Pages returned to the filesystem per idle incremental vacuum.
+IDLE_VACUUM_PAGES = 2000
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def is_sqlite(engine: Engine) -> bool:
+    return engine.dialect.name == "sqlite"
+
+
+def checkpoint(engine: Engine, mode: str = "PASSIVE") -> Optional[tuple[int, int, int]]:
+    """Run ``PRAGMA wal_checkpoint(mode)``.
+
+    Returns:
+        (busy, wal_pages, checkpointed_pages), or None for non-SQLite engines.
+    """
+    if not is_sqlite(engine):
+        return None
+    mode = mode.upper()
+    if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"Unknown checkpoint mode: {mode}")
+    with engine.connect() as conn:
+        row = conn.exec_driver_sql(f"PRAGMA wal_checkpoint({mode})").fetchone()
+    return tuple(row)
+
+
+def enable_incremental_vacuum(engine: Engine) -> bool:
+    """Switch the database to auto_vacuum=INCREMENTAL (one full VACUUM).
+
+    The VACUUM rewrites the whole file and needs exclusive access, so this is
+    only done from the maintain command, never during a booth session.
+
+    Returns:
+        True if the database was converted, False if it already was.
+    """
+    if not is_sqlite(engine):
+        return False
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == AUTO_VACUUM_INCREMENTAL:
+            return False
+        conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+    return True
+
+
+def incremental_vacuum(engine: Engine, pages: Optional[int] = None) -> int:
+    """Return up to ``pages`` free pages to the filesystem (all if None).
+
+    Returns:
+        Number of free pages before vacuuming.
+    """
+    if not is_sqlite(engine):
+        return 0
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        free = conn.exec_driver_sql("PRAGMA freelist_count").scalar() or 0
+        if free:
+            arg = f"({pages})" if pages else ""
+            # incremental_vacuum only does work as its result rows are stepped.
+            conn.exec_driver_sql(f"PRAGMA incremental_vacuum{arg}").fetchall()
+    return free
+
+
+def delete_orphan_responses(engine: Engine) -> int:
+    """Delete stored raw responses no remaining session points at."""
+    referenced = select(sessions_table.c.response_hash).where(
+        sessions_table.c.response_hash.is_not(None)
+    )
+    with engine.begin() as conn:
+        result = conn.execute(
+            delete(llm_responses_table).where(
+                llm_responses_table.c.response_hash.not_in(referenced)
+            )
+        )
+    return result.rowcount
+
+
+def _archive_engine(archive_dir: Path, day: str) -> Engine:
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    engine = create_engine(f"sqlite:///{archive_dir / f'sessions-{day}.db'}")
+    migrate(engine)
+    return engine
+
+
+def _only_synced(conn: Connection, query: Select) -> Select:
+    """Restrict a sessions query to rows that, with all their feedback, reached DATABASE_URL."""
+    watermarks = {
+        name: value for name, value in conn.execute(select(sync_state_table.c.name, sync_state_table.c.value))
+    }
+    unsynced_feedback = exists().where(
+        feedback_table.c.session_id == sessions_table.c.session_id,
+        feedback_table.c.feedback_id > watermarks.get("last_feedback_id", 0),
+    )
+    return query.where(sessions_table.c.session_id <= watermarks.get("last_session_id", 0)).where(
+        ~unsynced_feedback
+    )
+
+
+def archive_sessions(engine: Engine, older_than_days: float, archive_dir: Path) -> dict[str, int]:
+    """Move sessions older than N days (and their feedback and responses) to
+    per-day archive databases named ``sessions-YYYY-MM-DD.db``.
+
+    Only for a booth's local SQLite database; a shared DATABASE_URL is left
+    alone. In hybrid mode, sessions not yet replicated (or with feedback not
+    yet replicated) stay until a later run.
+
+    Archive rows are written and committed before the originals are deleted,
+    and archive inserts ignore rows that already exist, so an interrupted run
+    can simply be repeated.
+
+    Returns:
+        Counts of archived sessions and feedback rows.
+    """
+    totals = {"sessions": 0, "feedback": 0}
+    if not is_sqlite(engine):
+        log.warning("Not archiving: %s is not a local SQLite database", engine.url.get_backend_name())
+        return totals
+    # Fold everything into the rollups first; they must outlive the rows.
+    refresh_rollups(engine)
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=older_than_days)).isoformat()
+    archives: dict[str, Engine] = {}
+    try:
+        while True:
+            with engine.connect() as conn:
+                query = (
+                    select(sessions_table)
+                    .where(sessions_table.c.timestamp < cutoff)
+                    .order_by(sessions_table.c.session_id)
+                    .limit(ARCHIVE_BATCH_SIZE)
+                )
+                if hybrid_enabled():
+                    query = _only_synced(conn, query)
+                sessions = conn.execute(query).fetchall()
+                if not sessions:
+                    return totals
+                ids = [row.session_id for row in sessions]
+                feedback = conn.execute(
+                    select(feedback_table).where(feedback_table.c.session_id.in_(ids))
+                ).fetchall()
+                hashes = {row.response_hash for row in sessions if row.response_hash}
+                responses = conn.execute(
+                    select(llm_responses_table).where(llm_responses_table.c.response_hash.in_(hashes))
+                ).fetchall() if hashes else []
+
+            by_day: dict[str, list] = defaultdict(list)
+            for row in sessions:
+                by_day[row.timestamp[:10]].append(row)
+            session_day = {row.session_id: row.timestamp[:10] for row in sessions}
+            response_by_hash = {row.response_hash: row for row in responses}
+
+            for day, day_sessions in by_day.items():
+                if day not in archives:
+                    archives[day] = _archive_engine(archive_dir, day)
+                day_feedback = [fb for fb in feedback if session_day[fb.session_id] == day]
+                day_responses = {
+                    row.response_hash for row in day_sessions if row.response_hash
+                }
+                with archives[day].begin() as conn:
+                    for table, rows in (
+                        (llm_responses_table, [response_by_hash[h] for h in day_responses if h in response_by_hash]),
+                        (sessions_table, day_sessions),
+                        (feedback_table, day_feedback),
+                    ):
+                        if rows:
+                            conn.execute(
+                                sqlite.insert(table).on_conflict_do_nothing(),
+                                [dict(row._mapping) for row in rows],
+                            )
+
+            with engine.begin() as conn:
+                conn.execute(delete(feedback_table).where(feedback_table.c.session_id.in_(ids)))
+                conn.execute(delete(sessions_table).where(sessions_table.c.session_id.in_(ids)))
+            totals["sessions"] += len(sessions)
+            totals["feedback"] += len(feedback)
+            log.info("Archived %d sessions older than %s", len(sessions), cutoff)
+    finally:
+        for archive in archives.values():
+            archive.dispose()
+        if totals["sessions"]:
+            delete_orphan_responses(engine)
+
+
+def maintain(
+    engine: Engine,
+    archive_days: Optional[float] = None,
+    archive_dir: Optional[Path] = None,
+) -> dict:
+    """Full offline maintenance pass for the maintain command."""
+    report: dict = {"rollups": refresh_rollups(engine)}
+    if archive_days is not None and archive_dir is not None:
+        report["archived"] = archive_sessions(engine, archive_days, archive_dir)
+    report["orphan_responses_deleted"] = delete_orphan_responses(engine)
+    if is_sqlite(engine):
+        report["converted_to_incremental_vacuum"] = enable_incremental_vacuum(engine)
+        report["free_pages_vacuumed"] = incremental_vacuum(engine)
+        report["checkpoint"] = checkpoint(engine, "TRUNCATE")
+    return report
+
+
+def archive_after_days() -> Optional[float]:
+    """ARCHIVE_AFTER_DAYS, or None when archival is off (the default)."""
+    value = os.environ.get("ARCHIVE_AFTER_DAYS")
+    return float(value) if value else None
+
+
+class IdleMaintainer:
+    """Runs cheap maintenance in the background between visitors.
+
+    ``run_idle`` is safe to call on every return to the start screen: it
+    does nothing until ``interval`` seconds have passed since the last run,
+    and never runs two passes at once.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        archive_dir: Optional[Path] = None,
+        archive_days: Optional[float] = None,
+        interval: Optional[float] = None,
+    ) -> None:
+        self.engine = engine
+        self.archive_dir = archive_dir
+        # Archival is for a booth's own database, never a shared server.
+        self.archive_days = archive_days if is_sqlite(engine) else None
+        self.interval = (
+            interval if interval is not None
+            else float(os.environ.get("MAINTENANCE_INTERVAL_SECONDS", "600"))
+        )
+        database = engine.url.database if is_sqlite(engine) else None
+        self.wal_path = Path(f"{database}-wal") if database else None
+        self._last_run = time.monotonic()
+        self._lock = threading.Lock()
+
+    def run_idle(self) -> Optional[threading.Thread]:
+        """Start a background pass if one is due. Returns its thread, if any."""
+        if self.interval <= 0 or time.monotonic() - self._last_run < self.interval:
+            return None
+        if not self._lock.acquire(blocking=False):
+            return None
+        self._last_run = time.monotonic()
+        thread = threading.Thread(target=self._run, name="db-maintenance", daemon=True)
+        thread.start()
+        return thread
+
+    def _run(self) -> None:
+        try:
+            with span("db.idle_maintenance") as trace:
+                if self.archive_days is not None and self.archive_dir is not None:
+                    trace["archived"] = archive_sessions(
+                        self.engine, self.archive_days, self.archive_dir
+                    )["sessions"]
+                else:
+                    refresh_rollups(self.engine)
+                if self.wal_path is None:
+                    return
+                wal_size = self.wal_path.stat().st_size if self.wal_path.exists() else 0
+                mode = "TRUNCATE" if wal_size > WAL_TRUNCATE_BYTES else "PASSIVE"
+                trace["checkpoint"] = mode
+                trace["wal_bytes"] = wal_size
+                checkpoint(self.engine, mode)
+                incremental_vacuum(self.engine, IDLE_VACUUM_PAGES)
+        except Exception:
+            log.exception("Idle maintenance failed")
+        finally:
+            self._lock.release()
@@ -0,0 +1,232 @@
+"""Versioned schema migrations for the session database.
+
+Each migration is a function taking an open connection; it runs inside its
+own transaction and bumps ``schema_version`` on success. Startup only needs
+to read the current version; the migrations themselves run once per
+database.
+"""
+
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Callable
+
+from sqlalchemy import (
+    Column,
+    Connection,
+    Engine,
+    Table,
+    Text,
+    func,
+    inspect,
+    select,
+    text,
+    type_coerce,
+)
+from sqlalchemy.exc import DBAPIError
+
+from session_logging.locking import write_transaction
+from session_logging.rollups import ROLLUP_TABLES
+from session_logging.schema import (
+    feedback_table,
+    llm_responses_table,
+    schema_version_table,
+    sessions_table,
+    spool_progress_table,
+    sync_state_table,
+)
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+# Advisory lock id serializing migrations on PostgreSQL ("HBMG").
+MIGRATION_LOCK_KEY = 0x48424D47
+
+
+def _add_column(conn: Connection, table: Table, name: str) -> None:
+    """ALTER TABLE ... ADD COLUMN for a column declared in schema.py, if missing."""
+    existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+    if name in existing:
+        return
+    column = table.c[name]
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}"))
+
+
+def _baseline(conn: Connection) -> None:
+    """Create the original tables (no-op for databases that predate migrations)."""
+    sessions_table.create(conn, checkfirst=True)
+    feedback_table.create(conn, checkfirst=True)
+
+
+def _normalize_json_columns(conn: Connection, table: Table, pk: Column, columns: list[str]) -> int:
+    """Rewrite string-encoded JSON values (e.g. '"[\\"a\\"]"') as real JSON."""
+    fixed = 0
+    last_id = 0
+    raw_columns = [type_coerce(table.c[name], Text).label(name) for name in columns]
+    while True:
+        rows = conn.execute(
+            select(pk, *raw_columns).where(pk > last_id).order_by(pk).limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            return fixed
+        for row in rows:
+            updates = {}
+            for name in columns:
+                raw = getattr(row, name)
+                if raw is None:
+                    continue
+                value = json.loads(raw)
+                if isinstance(value, str):
+                    updates[name] = json.loads(value)
+            if updates:
+                conn.execute(table.update().where(pk == row[0]).values(**updates))
+                fixed += 1
+        last_id = rows[-1][0]
+
+
+def _normalize_legacy_json(conn: Connection) -> None:
+    """Decode legacy rows that stored JSON columns as JSON-encoded strings."""
+    sessions = _normalize_json_columns(
+        conn, sessions_table, sessions_table.c.session_id, ["qa_transcript", "nicknames"]
+    )
+    feedback = _normalize_json_columns(
+        conn,
+        feedback_table,
+        feedback_table.c.feedback_id,
+        ["favorite_names", "helpful_questions", "unhelpful_questions"],
+    )
+    log.info("Normalized legacy JSON in %d sessions and %d feedback rows", sessions, feedback)
+
+
+def _create_indexes(conn: Connection, names: set[str]) -> None:
+    for table in (sessions_table, feedback_table):
+        for index in table.indexes:
+            if index.name in names:
+                index.create(conn, checkfirst=True)
+
+
+def _add_lookup_indexes(conn: Connection) -> None:
+    """Index feedback.session_id and the session columns queries filter on."""
+    _create_indexes(
+        conn,
+        {"ix_sessions_timestamp", "ix_sessions_style", "ix_sessions_process_id", "ix_feedback_session_id"},
+    )
+
+
+def _create_rollup_tables(conn: Connection) -> None:
+    """Create the analytics rollups; the first refresh backfills them."""
+    for table in ROLLUP_TABLES:
+        table.create(conn, checkfirst=True)
+
+
+def _add_response_store(conn: Connection) -> None:
+    """Add the deduplicated, compressed raw response store."""
+    llm_responses_table.create(conn, checkfirst=True)
+    _add_column(conn, sessions_table, "response_hash")
+
+
+def _add_sync_columns(conn: Connection) -> None:
+    """Add origin keys for idempotent replication and the local sync watermarks."""
+    _add_column(conn, sessions_table, "origin_session_id")
+    _add_column(conn, feedback_table, "origin_process_id")
+    _add_column(conn, feedback_table, "origin_feedback_id")
+    _create_indexes(conn, {"ux_sessions_origin", "ux_feedback_origin"})
+    sync_state_table.create(conn, checkfirst=True)
+
+
+def _add_generation_metrics(conn: Connection) -> None:
+    """Add per-generation prompt variant, latency, token and parse columns."""
+    for name in ("prompt_variant", "reroll_index", "latency_ms", "input_tokens", "output_tokens", "parse_error"):
+        _add_column(conn, sessions_table, name)
+
+
+def _add_usage_metadata(conn: Connection) -> None:
+    """Add provider, model, request id, cache usage and fallback columns."""
+    for name in ("provider", "model", "request_id", "cache_read_tokens", "cache_write_tokens", "used_backup"):
+        _add_column(conn, sessions_table, name)
+
+
+def _add_model_tier(conn: Connection) -> None:
+    """Add the model tier chosen by the latency SLO controller."""
+    _add_column(conn, sessions_table, "model_tier")
+
+
+def _add_visit_id(conn: Connection) -> None:
+    """Add the visit id and rebuild the rollups, which now count visits rather than rows."""
+    _add_column(conn, sessions_table, "visit_id")
+    _create_indexes(conn, {"ix_sessions_visit_id"})
+    for table in ROLLUP_TABLES:
+        conn.execute(table.delete())
+
+
+def _add_alternate_flag(conn: Connection) -> None:
+    """Flag multi-style generations the visitor never looked at."""
+    _add_column(conn, sessions_table, "alternate")
+
+
+def _create_spool_progress(conn: Connection) -> None:
+    """Track replayed spool records so a replay is never repeated."""
+    spool_progress_table.create(conn, checkfirst=True)
+
+
+MIGRATIONS: list[tuple[int, Callable[[Connection], None]]] = [
+    (1, _baseline),
+    (2, _normalize_legacy_json),
+    (3, _add_lookup_indexes),
+    (4, _create_rollup_tables),
+    (5, _add_response_store),
+    (6, _add_sync_columns),
+    (7, _add_generation_metrics),
+    (8, _add_usage_metadata),
+    (9, _add_model_tier),
+    (10, _add_visit_id),
+    (11, _add_alternate_flag),
+    (12, _create_spool_progress),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(engine: Engine) -> int:
+    """Return the applied schema version, or 0 for an unversioned database."""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(func.max(schema_version_table.c.version))).scalar() or 0
+    except DBAPIError:
+        # schema_version does not exist yet
+        return 0
+
+
+def migrate(engine: Engine) -> int:
+    """Bring the database up to LATEST_VERSION and return the resulting version.
+
+    Each step re-reads the version under the database write lock, so booth
+    processes starting at once apply every migration exactly once; the
+    others wait and then find it done.
+    """
+    version = current_version(engine)
+    if version >= LATEST_VERSION:
+        return version
+
+    for target, migration in MIGRATIONS:
+        if target <= version:
+            continue
+        with write_transaction(engine) as conn:
+            if conn.dialect.name == "postgresql":
+                conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            schema_version_table.create(conn, checkfirst=True)
+            version = conn.execute(select(func.max(schema_version_table.c.version))).scalar() or 0
+            if version >= target:
+                continue
+            log.info("Applying schema migration %d (%s)", target, migration.__name__)
+            migration(conn)
+            conn.execute(
+                schema_version_table.insert().values(
+                    version=target,
+                    applied_at=datetime.now(timezone.utc).isoformat(),
+                )
+            )
+        version = target
+    return version
@@ -0,0 +1,338 @@
+"""Incremental feedback analytics rollups.
+
+``refresh_rollups`` folds sessions and feedback logged since the last run
+(tracked by watermarks in ``rollup_state``) into small counter tables, so
+reading stats never scans or decodes the sessions table.
+
+Question and style counts are per visit: the rerolls, pool refills and
+other-style generations of one visit (same ``visit_id``) count once, and a
+style counts for a visit only if the visitor saw it -- multi-style
+generations they never switched to (``alternate``) are left out. Rows
+without a visit id predate it; there only first generations
+(``reroll_index`` 0 or NULL) count as visits.
+"""
+
+import logging
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import Column, Connection, Engine, Table, func, select
+
+from session_logging.locking import write_transaction
+
+from session_logging.schema import (
+    favorite_position_stats_table,
+    feedback_table,
+    question_stats_table,
+    rollup_state_table,
+    sessions_table,
+    style_stats_table,
+)
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+ROLLUP_TABLES = [
+    question_stats_table,
+    style_stats_table,
+    favorite_position_stats_table,
+    rollup_state_table,
+]
+
+
+def _bump(conn: Connection, table: Table, key: Column, key_value, counts: dict[str, int]) -> None:
+    """Add ``counts`` to one rollup row, creating it if needed."""
+    counts = {name: n for name, n in counts.items() if n}
+    if not counts:
+        return
+    result = conn.execute(
+        table.update()
+        .where(key == key_value)
+        .values({table.c[name]: table.c[name] + n for name, n in counts.items()})
+    )
+    if result.rowcount == 0:
+        defaults = {c.name: 0 for c in table.c if c is not key}
+        conn.execute(table.insert().values({**defaults, **counts, key.name: key_value}))
+
+
+def _read_state(conn: Connection, name: str) -> int:
+    # FOR UPDATE locks the row on server databases; SQLite needs the whole
+    # transaction started with write_transaction().
+    value = conn.execute(
+        select(rollup_state_table.c.value)
+        .where(rollup_state_table.c.name == name)
+        .with_for_update()
+    ).scalar()
+    return value or 0
+
+
+def _set_state(conn: Connection, name: str, value: int) -> None:
+    result = conn.execute(
+        rollup_state_table.update()
+        .where(rollup_state_table.c.name == name)
+        .values(value=value)
+    )
+    if result.rowcount == 0:
+        conn.execute(rollup_state_table.insert().values(name=name, value=value))
+
+
+def _fold_sessions(conn: Connection, batch_size: int) -> int:
+    """Fold one batch of new sessions into the rollups. Returns rows folded."""
+    watermark = _read_state(conn, "last_session_id")
+    rows = conn.execute(
+        select(
+            sessions_table.c.session_id,
+            sessions_table.c.style,
+            sessions_table.c.qa_transcript,
+            sessions_table.c.visit_id,
+            sessions_table.c.reroll_index,
+            sessions_table.c.alternate,
+        )
+        .where(sessions_table.c.session_id > watermark)
+        .order_by(sessions_table.c.session_id)
+        .limit(batch_size)
+    ).fetchall()
+    if not rows:
+        return 0
+
+    # Visits (and visit/style pairs) already counted by earlier batches.
+    visit_ids = {row.visit_id for row in rows if row.visit_id}
+    counted_styles: set[tuple[str, str]] = set()
+    if visit_ids:
+        counted_styles = {
+            (visit_id, style)
+            for visit_id, style in conn.execute(
+                select(sessions_table.c.visit_id, sessions_table.c.style)
+                .where(sessions_table.c.visit_id.in_(visit_ids))
+                .where(sessions_table.c.session_id <= watermark)
+                .where(sessions_table.c.alternate.is_not(True))
+                .distinct()
+            )
+        }
+    counted_visits = {visit_id for visit_id, _ in counted_styles}
+
+    visits = 0
+    styles: Counter = Counter()
+    asked: Counter = Counter()
+    skipped: Counter = Counter()
+    for row in rows:
+        if row.alternate:
+            continue
+        if row.visit_id is None:
+            if row.reroll_index:
+                continue
+            styles[row.style] += 1
+        else:
+            if (row.visit_id, row.style) not in counted_styles:
+                counted_styles.add((row.visit_id, row.style))
+                styles[row.style] += 1
+            if row.visit_id in counted_visits:
+                continue
+            counted_visits.add(row.visit_id)
+        visits += 1
+        for qa in row.qa_transcript or []:
+            asked[qa["question_id"]] += 1
+            if not qa.get("answer"):
+                skipped[qa["question_id"]] += 1
+
+    for style, n in styles.items():
+        _bump(conn, style_stats_table, style_stats_table.c.style, style, {"sessions": n})
+    for question_id, n in asked.items():
+        _bump(
+            conn,
+            question_stats_table,
+            question_stats_table.c.question_id,
+            question_id,
+            {"asked": n, "skipped": skipped[question_id]},
+        )
+    state = rollup_state_table.c.name
+    _bump(conn, rollup_state_table, state, "sessions", {"value": len(rows)})
+    _bump(conn, rollup_state_table, state, "visits", {"value": visits})
+    _set_state(conn, "last_session_id", rows[-1].session_id)
+    return len(rows)
+
+
+def _fold_feedback(conn: Connection, batch_size: int) -> int:
+    """Fold one batch of new feedback into the rollups. Returns rows folded."""
+    watermark = _read_state(conn, "last_feedback_id")
+    rows = conn.execute(
+        select(feedback_table)
+        .where(feedback_table.c.feedback_id > watermark)
+        .order_by(feedback_table.c.feedback_id)
+        .limit(batch_size)
+    ).fetchall()
+    if not rows:
+        return 0
+
+    session_ids = {row.session_id for row in rows}
+    sessions = {
+        row.session_id: row
+        for row in conn.execute(
+            select(sessions_table.c.session_id, sessions_table.c.style, sessions_table.c.nicknames)
+            .where(sessions_table.c.session_id.in_(session_ids))
+        )
+    }
+    already_counted = set(
+        conn.execute(
+            select(feedback_table.c.session_id)
+            .where(feedback_table.c.session_id.in_(session_ids))
+            .where(feedback_table.c.feedback_id <= watermark)
+            .distinct()
+        ).scalars()
+    )
+
+    helpful: Counter = Counter()
+    unhelpful: Counter = Counter()
+    positions: Counter = Counter()
+    styles_with_feedback: Counter = Counter()
+    for row in rows:
+        helpful.update(row.helpful_questions or [])
+        unhelpful.update(row.unhelpful_questions or [])
+        session = sessions.get(row.session_id)
+        if session is None:
+            continue
+        nicknames = session.nicknames or []
+        for name in row.favorite_names or []:
+            if name in nicknames:
+                positions[nicknames.index(name) + 1] += 1
+        if row.session_id not in already_counted:
+            already_counted.add(row.session_id)
+            styles_with_feedback[session.style] += 1
+
+    for question_id in helpful.keys() | unhelpful.keys():
+        _bump(
+            conn,
+            question_stats_table,
+            question_stats_table.c.question_id,
+            question_id,
+            {"helpful": helpful[question_id], "unhelpful": unhelpful[question_id]},
+        )
+    for position, n in positions.items():
+        _bump(
+            conn,
+            favorite_position_stats_table,
+            favorite_position_stats_table.c.position,
+            position,
+            {"favorites": n},
+        )
+    for style, n in styles_with_feedback.items():
+        _bump(conn, style_stats_table, style_stats_table.c.style, style, {"sessions_with_feedback": n})
+    state = rollup_state_table.c.name
+    _bump(conn, rollup_state_table, state, "feedback", {"value": len(rows)})
+    _bump(conn, rollup_state_table, state, "sessions_with_feedback", {"value": sum(styles_with_feedback.values())})
+    _set_state(conn, "last_feedback_id", rows[-1].feedback_id)
+    return len(rows)
+
+
+def _has_new_rows(engine: Engine, kind: str) -> bool:
+    """Cheap unlocked check so an idle refresh never takes the write lock."""
+    table, key = {
+        "sessions": (sessions_table, sessions_table.c.session_id),
+        "feedback": (feedback_table, feedback_table.c.feedback_id),
+    }[kind]
+    with engine.connect() as conn:
+        latest = conn.execute(select(func.max(key)).select_from(table)).scalar() or 0
+        watermark = conn.execute(
+            select(rollup_state_table.c.value).where(rollup_state_table.c.name == f"last_{key.name}")
+        ).scalar() or 0
+    return latest > watermark
+
+
+def refresh_rollups(engine: Engine, batch_size: int = BATCH_SIZE) -> dict[str, int]:
+    """Fold everything logged since the last refresh into the rollup tables.
+
+    Each batch reads its watermark and commits together with the new one in
+    a write transaction, so concurrent refreshes from several booth
+    processes take turns instead of folding the same rows, and an
+    interrupted refresh resumes where it stopped without double counting.
+
+    Returns:
+        Number of sessions and feedback rows folded in.
+    """
+    folded = {"sessions": 0, "feedback": 0}
+    # Sessions first, so feedback always finds its session's style counted.
+    for kind, fold in (("sessions", _fold_sessions), ("feedback", _fold_feedback)):
+        if not _has_new_rows(engine, kind):
+            continue
+        while True:
+            with write_transaction(engine) as conn:
+                n = fold(conn, batch_size)
+            folded[kind] += n
+            if n < batch_size:
+                break
+    if any(folded.values()):
+        log.info("Rollups refreshed: %s", folded)
+    return folded
+
+
+def read_stats(engine: Engine) -> dict:
+    """Read the rollups into a plain dict (no scans of sessions or feedback)."""
+    with engine.connect() as conn:
+        state = {row.name: row.value for row in conn.execute(select(rollup_state_table))}
+        questions = {
+            row.question_id: {
+                "asked": row.asked,
+                "skipped": row.skipped,
+                "helpful": row.helpful,
+                "unhelpful": row.unhelpful,
+            }
+            for row in conn.execute(select(question_stats_table).order_by(question_stats_table.c.question_id))
+        }
+        styles = {
+            row.style: {"sessions": row.sessions, "sessions_with_feedback": row.sessions_with_feedback}
+            for row in conn.execute(select(style_stats_table).order_by(style_stats_table.c.style))
+        }
+        positions = {
+            row.position: row.favorites
+            for row in conn.execute(
+                select(favorite_position_stats_table).order_by(favorite_position_stats_table.c.position)
+            )
+        }
+    return {
+        "sessions": state.get("sessions", 0),
+        "visits": state.get("visits", 0),
+        "feedback": state.get("feedback", 0),
+        "sessions_with_feedback": state.get("sessions_with_feedback", 0),
+        "questions": questions,
+        "styles": styles,
+        "favorite_positions": positions,
+    }
+
+
+def _rate(numerator: int, denominator: int) -> Optional[float]:
+    return numerator / denominator if denominator else None
+
+
+def format_stats(stats: dict) -> str:
+    """Render ``read_stats`` output as a plain-text report."""
+    lines = [
+        f"sessions: {stats['sessions']}",
+        f"visits: {stats['visits']}",
+        f"feedback rows: {stats['feedback']}",
+        f"sessions with feedback: {stats['sessions_with_feedback']}"
+        + (
+            f" ({stats['sessions_with_feedback'] / stats['visits']:.1%} of visits)"
+            if stats["visits"]
+            else ""
+        ),
+        "",
+        f"{'question':<16}{'asked':>7}{'skip%':>8}{'helpful':>9}{'unhelpful':>11}{'help%':>8}",
+    ]
+    for question_id, q in stats["questions"].items():
+        skip = _rate(q["skipped"], q["asked"])
+        votes = q["helpful"] + q["unhelpful"]
+        help_rate = _rate(q["helpful"], votes)
+        lines.append(
+            f"{question_id:<16}{q['asked']:>7}"
+            f"{(f'{skip:.0%}' if skip is not None else '-'):>8}"
+            f"{q['helpful']:>9}{q['unhelpful']:>11}"
+            f"{(f'{help_rate:.0%}' if help_rate is not None else '-'):>8}"
+        )
+    lines += ["", f"{'style':<16}{'visits':>9}{'w/ feedback':>13}"]
+    for style, s in stats["styles"].items():
+        lines.append(f"{style:<16}{s['sessions']:>9}{s['sessions_with_feedback']:>13}")
+    lines += ["", f"{'position':<16}{'favorites':>10}"]
+    for position, n in stats["favorite_positions"].items():
+        lines.append(f"{position:<16}{n:>10}")
+    return "\n".join(lines)
@@ -0,0 +1,191 @@
+"""Database schema for session logging."""
+
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    MetaData,
+    String,
+    Table,
+    Text,
+)
+
+metadata = MetaData()
+
+sessions_table = Table(
+    "sessions",
+    metadata,
+    Column("session_id", Integer, primary_key=True, autoincrement=True),
+    Column("process_id", String, nullable=False),
+    Column("timestamp", String, nullable=False),
+    Column("style", String, nullable=False),
+    Column("qa_transcript", JSON, nullable=False),
+    Column("nicknames", JSON, nullable=False),
+    Column("llm_response_raw", Text, nullable=False),
+    # Set when the raw response lives (compressed) in llm_responses; the
+    # llm_response_raw column is then left empty.
+    Column("response_hash", String),
+    # Set on rows replicated from a booth's local database: the session_id
+    # it had there. Together with process_id this identifies the row.
+    Column("origin_session_id", Integer),
+    # Generation metrics for prompt A/B comparisons (session_logging.variants).
+    Column("prompt_variant", String),
+    Column("reroll_index", Integer),
+    Column("latency_ms", Integer),
+    Column("input_tokens", Integer),
+    Column("output_tokens", Integer),
+    Column("parse_error", Boolean),
+    # Provider usage and routing metadata (llm.base.GenerationResult).
+    Column("provider", String),
+    Column("model", String),
+    Column("request_id", String),
+    Column("cache_read_tokens", Integer),
+    Column("cache_write_tokens", Integer),
+    Column("used_backup", Boolean),
+    # Tier chosen by llm.tiering (quality/fast); NULL when tiering is off.
+    Column("model_tier", String),
+    # Shared by every generation of one booth visit (first screen, rerolls,
+    # pool refills, other styles); NULL on rows logged before it existed.
+    Column("visit_id", String),
+    # Multi-style mode: true for names generated for a style the visitor
+    # never switched to, so analytics can tell them from what was shown.
+    Column("alternate", Boolean),
+)
+
+GENERATION_METRIC_COLUMNS = [
+    "prompt_variant",
+    "reroll_index",
+    "latency_ms",
+    "input_tokens",
+    "output_tokens",
+    "parse_error",
+    "provider",
+    "model",
+    "request_id",
+    "cache_read_tokens",
+    "cache_write_tokens",
+    "used_backup",
+    "model_tier",
+    "visit_id",
+    "alternate",
+]
+
+feedback_table = Table(
+    "feedback",
+    metadata,
+    Column("feedback_id", Integer, primary_key=True, autoincrement=True),
+    Column(
+        "session_id",
+        Integer,
+        ForeignKey("sessions.session_id"),
+        nullable=False,
+    ),
+    Column("timestamp", String, nullable=False),
+    Column("favorite_name", String),
+    Column("favorite_names", JSON),
+    Column("helpful_questions", JSON),
+    Column("unhelpful_questions", JSON),
+    Column("suggested_questions", String),
+    Column("self_suggested_name", String),
+    Column("other_feedback", String),
+    # Replicated rows: process_id of the session and feedback_id in the
+    # booth's local database.
+    Column("origin_process_id", String),
+    Column("origin_feedback_id", Integer),
+)
+
+# Content-addressed, compressed raw LLM responses shared by identical payloads.
+llm_responses_table = Table(
+    "llm_responses",
+    metadata,
+    Column("response_hash", String, primary_key=True),
+    Column("encoding", String, nullable=False),
+    Column("raw_size", Integer, nullable=False),
+    Column("payload", LargeBinary, nullable=False),
+)
+
+# Lookups the dashboards and exports filter on. SQLite appends the rowid
+# (session_id) to every index entry, so these also serve keyset pagination.
+Index("ix_sessions_timestamp", sessions_table.c.timestamp)
+Index("ix_sessions_style", sessions_table.c.style)
+Index("ix_sessions_process_id", sessions_table.c.process_id)
+Index("ix_sessions_visit_id", sessions_table.c.visit_id)
+Index("ix_feedback_session_id", feedback_table.c.session_id)
+
+# Make replication from booth databases idempotent.
+Index(
+    "ux_sessions_origin",
+    sessions_table.c.process_id,
+    sessions_table.c.origin_session_id,
+    unique=True,
+)
+Index(
+    "ux_feedback_origin",
+    feedback_table.c.origin_process_id,
+    feedback_table.c.origin_feedback_id,
+    unique=True,
+)
+
+# Rollups maintained incrementally by session_logging.rollups.
+question_stats_table = Table(
+    "question_stats",
+    metadata,
+    Column("question_id", String, primary_key=True),
+    Column("asked", Integer, nullable=False, default=0),
+    Column("skipped", Integer, nullable=False, default=0),
+    Column("helpful", Integer, nullable=False, default=0),
+    Column("unhelpful", Integer, nullable=False, default=0),
+)
+
+style_stats_table = Table(
+    "style_stats",
+    metadata,
+    Column("style", String, primary_key=True),
+    Column("sessions", Integer, nullable=False, default=0),
+    Column("sessions_with_feedback", Integer, nullable=False, default=0),
+)
+
+favorite_position_stats_table = Table(
+    "favorite_position_stats",
+    metadata,
+    Column("position", Integer, primary_key=True),
+    Column("favorites", Integer, nullable=False, default=0),
+)
+
+# Named counters and watermarks (last_session_id, last_feedback_id, ...).
+rollup_state_table = Table(
+    "rollup_state",
+    metadata,
+    Column("name", String, primary_key=True),
+    Column("value", Integer, nullable=False, default=0),
+)
+
+# Local replication watermarks (last_session_id, last_feedback_id) for the
+# hybrid-mode sync worker.
+sync_state_table = Table(
+    "sync_state",
+    metadata,
+    Column("name", String, primary_key=True),
+    Column("value", Integer, nullable=False, default=0),
+)
+
+# Records of each spool file (by the id in its header) already replayed,
+# committed with them so a crash before the file is removed never replays
+# them twice.
+spool_progress_table = Table(
+    "spool_progress",
+    metadata,
+    Column("spool_id", String, primary_key=True),
+    Column("records", Integer, nullable=False, default=0),
+)
+
+schema_version_table = Table(
+    "schema_version",
+    metadata,
+    Column("version", Integer, primary_key=True),
+    Column("applied_at", String, nullable=False),
+)
@@ -3,81 +3,88 @@
 import json
 import logging
 import os
+import random
 import sqlite3
+import time
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterator, Mapping, Optional, TypeVar
 
 log = logging.getLogger(__name__)
 
 from sqlalchemy import (
-    JSON,
-    Column,
+    Connection,
     Engine,
-    ForeignKey,
-    Integer,
-    MetaData,
-    String,
-    Table,
-    Text,
     create_engine,
     event,
+    func,
     select,
 )
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import OperationalError
 
-metadata = MetaData()
-
-sessions_table = Table(
-    "sessions",
-    metadata,
-    Column("session_id", Integer, primary_key=True, autoincrement=True),
-    Column("process_id", String, nullable=False),
-    Column("timestamp", String, nullable=False),
-    Column("style", String, nullable=False),
-    Column("qa_transcript", JSON, nullable=False),
-    Column("nicknames", JSON, nullable=False),
-    Column("llm_response_raw", Text, nullable=False),
+from session_logging import compression
+from session_logging.maintenance import IdleMaintainer, archive_after_days
+from session_logging.migrations import migrate
+from session_logging.rollups import read_stats, refresh_rollups
+from session_logging.schema import (
+    GENERATION_METRIC_COLUMNS,
+    feedback_table,
+    llm_responses_table,
+    sessions_table,
 )
+from session_logging.sync import SyncWorker, hybrid_enabled
+from telemetry import span
+
+
+T = TypeVar("T")
 
-feedback_table = Table(
-    "feedback",
-    metadata,
-    Column("feedback_id", Integer, primary_key=True, autoincrement=True),
-    Column(
-        "session_id",
-        Integer,
-        ForeignKey("sessions.session_id"),
-        nullable=False,
-    ),
-    Column("timestamp", String, nullable=False),
-    Column("favorite_name", String),
-    Column("favorite_names", JSON),
-    Column("helpful_questions", JSON),
-    Column("unhelpful_questions", JSON),
-    Column("suggested_questions", String),
-    Column("self_suggested_name", String),
-    Column("other_feedback", String),
-)
+
+def _int_env(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
 
 
 @event.listens_for(Engine, "connect")
 def _set_sqlite_wal(dbapi_connection, connection_record):
+    """Concurrency profile for many booth processes sharing one SQLite file."""
     if isinstance(dbapi_connection, sqlite3.Connection):
         cursor = dbapi_connection.cursor()
+        # Only takes effect on a new database; existing ones are converted
+        # by `python -m session_logging maintain`.
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
         cursor.execute("PRAGMA journal_mode=WAL")
+        # Wait for a competing writer instead of failing with "database is locked".
+        cursor.execute(f"PRAGMA busy_timeout={_int_env('SQLITE_BUSY_TIMEOUT_MS', 5000)}")
+        # NORMAL is durable across application crashes in WAL mode and avoids
+        # an fsync per commit; only an OS crash can lose the last commits.
+        synchronous = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+        if synchronous in ("OFF", "NORMAL", "FULL", "EXTRA"):
+            cursor.execute(f"PRAGMA synchronous={synchronous}")
+        cursor.execute(f"PRAGMA cache_size=-{_int_env('SQLITE_CACHE_KB', 8192)}")
+        cursor.execute(f"PRAGMA mmap_size={_int_env('SQLITE_MMAP_MB', 64) * 1024 * 1024}")
         cursor.close()
 
 
+def is_lock_error(exc: BaseException) -> bool:
+    """True for SQLite lock contention that is worth retrying."""
+    if not isinstance(exc, OperationalError):
+        return False
+    message = str(exc.orig).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
 class SessionLogger:
     """Logs nickname generation sessions to a database."""
 
-    def __init__(self, db_path: Optional[Path] = None):
+    def __init__(self, db_path: Optional[Path] = None, sync: bool = True):
         """Initialize the session logger.
 
         Args:
             db_path: Path to the SQLite database. Defaults to ./logs/sessions.db
-                     relative to the project root. Ignored when DATABASE_URL is set.
+                     relative to the project root. Ignored when DATABASE_URL is set,
+                     unless HYBRID_SYNC is on (see session_logging.sync).
+            sync: In hybrid mode, start the background sync worker.
         """
         if db_path is None:
             db_path = Path(__file__).parent.parent.parent / "logs" / "sessions.db"
@@ -85,27 +92,197 @@ class SessionLogger:
         self.process_id = str(uuid.uuid4())
         database_url = os.environ.get("DATABASE_URL")
         log.info(
-            "SessionLogger init: db_path=%s, DATABASE_URL=%s",
+            "SessionLogger init: db_path=%s, DATABASE_URL=%s, hybrid=%s",
             db_path,
             "set" if database_url else "not set",
+            hybrid_enabled(),
         )
         self.engine = self._create_engine(db_path)
+        self.response_encoding: Optional[str] = None
+        if os.environ.get("COMPRESS_RESPONSES", "true").lower() in ("1", "true", "yes"):
+            self.response_encoding = compression.default_encoding()
         self._init_db()
+        self.maintainer = IdleMaintainer(
+            self.engine,
+            archive_dir=Path(db_path).parent / "archive",
+            archive_days=archive_after_days(),
+        )
+        self.sync_worker: Optional[SyncWorker] = None
+        if sync and hybrid_enabled():
+            self.sync_worker = SyncWorker(self.engine, database_url)
+            self.sync_worker.start()
 
     @staticmethod
     def _create_engine(db_path: Path) -> Engine:
         database_url = os.environ.get("DATABASE_URL")
-        if database_url:
+        if database_url and not hybrid_enabled():
             return create_engine(database_url, pool_pre_ping=True)
         db_path.parent.mkdir(parents=True, exist_ok=True)
         return create_engine(f"sqlite:///{db_path}")
 
     def _init_db(self) -> None:
-        """Create tables if they don't exist."""
+        """Apply pending schema migrations (a single version check when current)."""
         try:
-            metadata.create_all(self.engine)
+            migrate(self.engine)
         except Exception:
-            log.exception("Failed to create database tables")
+            log.exception("Failed to migrate database schema")
+
+    def session_values(
+        self,
+        style: str,
+        qa_transcript: list[dict],
+        nicknames: list[str],
+        llm_response_raw: str,
+        **metrics,
+    ) -> dict:
+        """Build the sessions row for a generation, stamped with the current time.
+
+        ``metrics`` may set any of GENERATION_METRIC_COLUMNS.
+        """
+        unknown = metrics.keys() - set(GENERATION_METRIC_COLUMNS)
+        if unknown:
+            raise TypeError(f"Unknown session metrics: {sorted(unknown)}")
+        return {
+            "process_id": self.process_id,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "style": style,
+            "qa_transcript": qa_transcript,
+            "nicknames": nicknames,
+            "llm_response_raw": llm_response_raw,
+            **metrics,
+        }
+
+    @staticmethod
+    def feedback_values(
+        favorite_names: Optional[list[str]],
+        helpful_questions: list[str],
+        unhelpful_questions: list[str],
+        suggested_questions: str,
+        self_suggested_name: str,
+        other_feedback: str = "",
+    ) -> dict:
+        """Build the feedback row (minus session_id), stamped with the current time."""
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "favorite_names": favorite_names,
+            "helpful_questions": helpful_questions,
+            "unhelpful_questions": unhelpful_questions,
+            "suggested_questions": suggested_questions,
+            "self_suggested_name": self_suggested_name,
+            "other_feedback": other_feedback,
+        }
+
+    def insert_session(self, conn: Connection, values: dict) -> int:
+        """Insert a sessions row on an open connection and return its id.
+
+        With compression enabled the raw response goes to the deduplicated
+        llm_responses store and the row only keeps its hash.
+        """
+        if self.response_encoding and values.get("llm_response_raw"):
+            response_hash = self._store_response(conn, values["llm_response_raw"])
+            values = {**values, "llm_response_raw": "", "response_hash": response_hash}
+        result = conn.execute(sessions_table.insert().values(**values))
+        return result.inserted_primary_key[0]
+
+    def _store_response(self, conn: Connection, raw: str) -> str:
+        """Store a raw response once per distinct payload and return its hash."""
+        response_hash = compression.content_hash(raw)
+        values = {
+            "response_hash": response_hash,
+            "encoding": self.response_encoding,
+            "raw_size": len(raw.encode("utf-8")),
+            "payload": compression.encode(raw, self.response_encoding),
+        }
+        dialect = conn.dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+            conn.execute(insert(llm_responses_table).values(**values).on_conflict_do_nothing())
+        elif conn.execute(
+            select(llm_responses_table.c.response_hash)
+            .where(llm_responses_table.c.response_hash == response_hash)
+        ).first() is None:
+            conn.execute(llm_responses_table.insert().values(**values))
+        return response_hash
+
+    @staticmethod
+    def _load_responses(conn: Connection, hashes: set[str]) -> dict[str, str]:
+        """Decode stored responses for a set of hashes."""
+        if not hashes:
+            return {}
+        rows = conn.execute(
+            select(llm_responses_table).where(llm_responses_table.c.response_hash.in_(hashes))
+        )
+        return {
+            row.response_hash: compression.decode(row.payload, row.encoding) for row in rows
+        }
+
+    def compact_responses(self, batch_size: int = 500) -> dict[str, int]:
+        """Move inline raw responses of existing rows into the compressed store.
+
+        Returns:
+            Rows converted, plus raw and stored byte counts for the new payloads.
+        """
+        encoding = self.response_encoding or compression.default_encoding()
+        saved_encoding, self.response_encoding = self.response_encoding, encoding
+        totals = {"rows": 0, "raw_bytes": 0, "stored_payloads": 0}
+        last_id = 0
+        try:
+            while True:
+                with self.engine.begin() as conn:
+                    rows = conn.execute(
+                        select(sessions_table.c.session_id, sessions_table.c.llm_response_raw)
+                        .where(sessions_table.c.session_id > last_id)
+                        .where(sessions_table.c.response_hash.is_(None))
+                        .where(sessions_table.c.llm_response_raw != "")
+                        .order_by(sessions_table.c.session_id)
+                        .limit(batch_size)
+                    ).fetchall()
+                    if not rows:
+                        return totals
+                    before = conn.execute(select(func.count()).select_from(llm_responses_table)).scalar_one()
+                    for row in rows:
+                        response_hash = self._store_response(conn, row.llm_response_raw)
+                        conn.execute(
+                            sessions_table.update()
+                            .where(sessions_table.c.session_id == row.session_id)
+                            .values(llm_response_raw="", response_hash=response_hash)
+                        )
+                        totals["raw_bytes"] += len(row.llm_response_raw.encode("utf-8"))
+                    after = conn.execute(select(func.count()).select_from(llm_responses_table)).scalar_one()
+                totals["rows"] += len(rows)
+                totals["stored_payloads"] += after - before
+                last_id = rows[-1].session_id
+        finally:
+            self.response_encoding = saved_encoding
+
+    def transaction(self, work: Callable[[Connection], T]) -> T:
+        """Run ``work`` in a transaction, retrying on SQLite lock contention.
+
+        busy_timeout covers most contention, but SQLite still returns
+        SQLITE_BUSY at once when upgrading a read transaction would deadlock,
+        so the whole transaction is retried with jittered backoff.
+        """
+        retries = _int_env("SQLITE_LOCK_RETRIES", 5)
+        delay = 0.05
+        attempt = 0
+        while True:
+            try:
+                with self.engine.begin() as conn:
+                    return work(conn)
+            except OperationalError as exc:
+                if attempt >= retries or not is_lock_error(exc):
+                    raise
+                attempt += 1
+                log.warning("Database locked, retrying in ~%.2fs (attempt %d)", delay, attempt)
+                time.sleep(delay * (0.5 + random.random()))
+                delay *= 2
+
+    def insert_feedback(self, conn: Connection, session_id: int, values: dict) -> int:
+        """Insert a feedback row on an open connection and return its id."""
+        result = conn.execute(
+            feedback_table.insert().values(session_id=session_id, **values)
+        )
+        return result.inserted_primary_key[0]
 
     def log_session(
         self,
@@ -113,6 +290,7 @@ class SessionLogger:
         qa_transcript: list[dict],
         nicknames: list[str],
         llm_response_raw: str,
+        **metrics,
     ) -> Optional[int]:
         """Log a nickname generation session.
 
@@ -121,28 +299,21 @@ class SessionLogger:
             qa_transcript: List of Q&A dicts with 'q' and 'a' keys.
             nicknames: List of generated nicknames.
             llm_response_raw: Raw LLM response string.
+            **metrics: Any of GENERATION_METRIC_COLUMNS: prompt variant,
+                reroll index and parse_error, plus the provider usage and
+                routing metadata from llm.base.GenerationResult.metadata().
 
         Returns:
             The session_id of the logged session, or None if logging failed.
         """
-        try:
-            timestamp = datetime.now(timezone.utc).isoformat()
-            with self.engine.connect() as conn:
-                result = conn.execute(
-                    sessions_table.insert().values(
-                        process_id=self.process_id,
-                        timestamp=timestamp,
-                        style=style,
-                        qa_transcript=qa_transcript,
-                        nicknames=nicknames,
-                        llm_response_raw=llm_response_raw,
-                    )
-                )
-                conn.commit()
-                return result.inserted_primary_key[0]
-        except Exception:
-            log.exception("Failed to log session")
-            return None
+        with span("db.log_session") as trace:
+            try:
+                values = self.session_values(style, qa_transcript, nicknames, llm_response_raw, **metrics)
+                return self.transaction(lambda conn: self.insert_session(conn, values))
+            except Exception:
+                log.exception("Failed to log session")
+                trace["status"] = "error"
+                return None
 
     def log_feedback(
         self,
@@ -159,103 +330,210 @@ class SessionLogger:
         Returns:
             The feedback_id, or None if logging failed.
         """
-        try:
-            timestamp = datetime.now(timezone.utc).isoformat()
-            with self.engine.connect() as conn:
-                result = conn.execute(
-                    feedback_table.insert().values(
-                        session_id=session_id,
-                        timestamp=timestamp,
-                        favorite_names=favorite_names,
-                        helpful_questions=helpful_questions,
-                        unhelpful_questions=unhelpful_questions,
-                        suggested_questions=suggested_questions,
-                        self_suggested_name=self_suggested_name,
-                        other_feedback=other_feedback,
-                    )
+        with span("db.log_feedback") as trace:
+            try:
+                values = self.feedback_values(
+                    favorite_names,
+                    helpful_questions,
+                    unhelpful_questions,
+                    suggested_questions,
+                    self_suggested_name,
+                    other_feedback,
                 )
-                conn.commit()
-                return result.inserted_primary_key[0]
-        except Exception:
-            log.exception("Failed to log feedback for session_id=%s", session_id)
-            return None
+                return self.transaction(lambda conn: self.insert_feedback(conn, session_id, values))
+            except Exception:
+                log.exception("Failed to log feedback for session_id=%s", session_id)
+                trace["status"] = "error"
+                return None
 
-    def dump_sessions(self, session_id: Optional[int] = None) -> str:
-        """Return sessions as pretty-printed JSON.
+    def _session_filters(
+        self,
+        session_id: Optional[int] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        style: Optional[str] = None,
+        process_id: Optional[str] = None,
+        has_feedback: Optional[bool] = None,
+    ) -> list:
+        conditions = []
+        if session_id is not None:
+            conditions.append(sessions_table.c.session_id == session_id)
+        if start is not None:
+            conditions.append(sessions_table.c.timestamp >= start)
+        if end is not None:
+            conditions.append(sessions_table.c.timestamp < end)
+        if style is not None:
+            conditions.append(sessions_table.c.style == style)
+        if process_id is not None:
+            conditions.append(sessions_table.c.process_id == process_id)
+        if has_feedback is not None:
+            exists = (
+                select(feedback_table.c.feedback_id)
+                .where(feedback_table.c.session_id == sessions_table.c.session_id)
+                .exists()
+            )
+            conditions.append(exists if has_feedback else ~exists)
+        return conditions
+
+    def query_sessions(
+        self,
+        after_id: Optional[int] = None,
+        limit: int = 100,
+        include_raw: bool = False,
+        **filters,
+    ) -> list[dict]:
+        """Return one page of sessions in session_id order.
+
+        Pass the last session_id of a page as ``after_id`` to get the next one.
 
         Args:
-            session_id: If provided, dump only that session. Otherwise dump all.
+            after_id: Keyset cursor; only sessions with a greater session_id.
+            limit: Maximum sessions in the page.
+            include_raw: Also return ``llm_response_raw``, decompressed.
+            **filters: session_id, start, end (ISO 8601 UTC, end exclusive),
+                style, process_id, has_feedback.
 
         Returns:
-            Pretty-printed JSON string.
+            Session dicts, each with a ``feedback`` list (oldest first).
         """
+        columns = [
+            c for c in sessions_table.c if include_raw or c.name != "llm_response_raw"
+        ]
         query = (
-            select(
-                sessions_table,
-                feedback_table.c.feedback_id,
-                feedback_table.c.favorite_names,
-                feedback_table.c.helpful_questions,
-                feedback_table.c.unhelpful_questions,
-                feedback_table.c.suggested_questions,
-                feedback_table.c.self_suggested_name,
-                feedback_table.c.other_feedback,
-            )
-            .select_from(
-                sessions_table.outerjoin(
-                    feedback_table,
-                    sessions_table.c.session_id == feedback_table.c.session_id,
+            select(*columns)
+            .where(*self._session_filters(**filters))
+            .order_by(sessions_table.c.session_id)
+            .limit(limit)
+        )
+        if after_id is not None:
+            query = query.where(sessions_table.c.session_id > after_id)
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).fetchall()
+            if not rows:
+                return []
+            feedback = self._feedback_for(conn, [row.session_id for row in rows])
+            responses = {}
+            if include_raw:
+                responses = self._load_responses(
+                    conn, {row.response_hash for row in rows if row.response_hash}
                 )
-            )
+        records = []
+        for row in rows:
+            record = self._session_record(row._mapping, feedback.get(row.session_id, []))
+            if include_raw:
+                record["llm_response_raw"] = responses.get(row.response_hash, row.llm_response_raw)
+            records.append(record)
+        return records
+
+    def count_sessions(self, **filters) -> int:
+        """Count sessions matching the same filters as ``query_sessions``."""
+        query = select(func.count()).select_from(sessions_table).where(
+            *self._session_filters(**filters)
         )
+        with self.engine.connect() as conn:
+            return conn.execute(query).scalar_one()
 
-        if session_id is not None:
-            query = query.where(sessions_table.c.session_id == session_id)
-        else:
-            query = query.order_by(sessions_table.c.session_id)
+    def iter_sessions(
+        self,
+        since: Optional[int] = None,
+        page_size: int = 500,
+        **filters,
+    ) -> Iterator[dict]:
+        """Yield sessions one at a time in session_id order.
 
-        with self.engine.connect() as conn:
-            rows = conn.execute(query).fetchall()
+        Pages through ``query_sessions`` by keyset on session_id, so memory
+        stays constant however many sessions there are.
 
-        sessions = []
+        Args:
+            since: Watermark; only sessions with session_id greater than this.
+            page_size: Rows fetched per query.
+            **filters: As for ``query_sessions``.
+        """
+        after_id = since
+        while True:
+            page = self.query_sessions(after_id=after_id, limit=page_size, **filters)
+            yield from page
+            if len(page) < page_size:
+                return
+            after_id = page[-1]["session_id"]
+
+    @staticmethod
+    def _feedback_for(conn: Connection, session_ids: list[int]) -> dict[int, list[Mapping]]:
+        """Fetch feedback for a page of sessions, grouped by session_id."""
+        rows = conn.execute(
+            select(feedback_table)
+            .where(feedback_table.c.session_id.in_(session_ids))
+            .order_by(feedback_table.c.feedback_id)
+        ).fetchall()
+        grouped: dict[int, list[Mapping]] = {}
         for row in rows:
-            row_map = row._mapping
-            qa = row_map["qa_transcript"]
-            nicks = row_map["nicknames"]
-            # Handle both raw JSON strings (legacy SQLite data) and
-            # already-deserialized objects (SQLAlchemy JSON type)
-            if isinstance(qa, str):
-                qa = json.loads(qa)
-            if isinstance(nicks, str):
-                nicks = json.loads(nicks)
-
-            session = {
-                "session_id": row_map["session_id"],
-                "process_id": row_map["process_id"],
-                "timestamp": row_map["timestamp"],
-                "style": row_map["style"],
-                "qa_transcript": qa,
-                "nicknames": nicks,
-            }
-            if row_map["feedback_id"] is not None:
-                helpful = row_map["helpful_questions"]
-                unhelpful = row_map["unhelpful_questions"]
-                if isinstance(helpful, str):
-                    helpful = json.loads(helpful)
-                if isinstance(unhelpful, str):
-                    unhelpful = json.loads(unhelpful)
-                fav = row_map["favorite_names"]
-                if isinstance(fav, str):
-                    fav = json.loads(fav)
-                session["feedback"] = {
-                    "favorite_names": fav,
-                    "helpful_questions": helpful,
-                    "unhelpful_questions": unhelpful,
-                    "suggested_questions": row_map["suggested_questions"],
-                    "self_suggested_name": row_map["self_suggested_name"],
-                    "other_feedback": row_map["other_feedback"],
+            grouped.setdefault(row.session_id, []).append(row._mapping)
+        return grouped
+
+    @staticmethod
+    def _session_record(session: Mapping, feedback: list[Mapping]) -> dict:
+        # Legacy string-encoded JSON is normalized by schema migration 2,
+        # so columns come back already deserialized.
+        return {
+            "session_id": session["session_id"],
+            "process_id": session["process_id"],
+            "timestamp": session["timestamp"],
+            "style": session["style"],
+            "qa_transcript": session["qa_transcript"],
+            "nicknames": session["nicknames"],
+            **{name: session[name] for name in GENERATION_METRIC_COLUMNS},
+            "feedback": [
+                {
+                    "feedback_id": fb["feedback_id"],
+                    "timestamp": fb["timestamp"],
+                    "favorite_names": fb["favorite_names"],
+                    "helpful_questions": fb["helpful_questions"],
+                    "unhelpful_questions": fb["unhelpful_questions"],
+                    "suggested_questions": fb["suggested_questions"],
+                    "self_suggested_name": fb["self_suggested_name"],
+                    "other_feedback": fb["other_feedback"],
                 }
-            else:
-                session["feedback"] = None
-            sessions.append(session)
+                for fb in feedback
+            ],
+        }
+
+    def dump_sessions(self, session_id: Optional[int] = None, include_raw: bool = False) -> str:
+        """Return sessions as pretty-printed JSON.
+
+        Builds the whole document in memory; use ``iter_sessions`` (or
+        ``python -m session_logging export``) for large databases.
+
+        Args:
+            session_id: If provided, dump only that session. Otherwise dump all.
+            include_raw: Include the (decompressed) raw LLM response.
+
+        Returns:
+            Pretty-printed JSON string.
+        """
+        sessions = self.iter_sessions(session_id=session_id, include_raw=include_raw)
+        return json.dumps(list(sessions), indent=2)
+
+    def question_stats(self, refresh: bool = False) -> dict[str, dict[str, int]]:
+        """Per-question asked/skipped/helpful/unhelpful counts from the rollups.
+
+        By default this only reads the rollup rows, as they were at the last
+        refresh (idle maintenance refreshes them between visitors), so it is
+        cheap enough for the UI thread.
+
+        Args:
+            refresh: Fold in sessions logged since the last refresh first.
+        """
+        if refresh:
+            refresh_rollups(self.engine)
+        return read_stats(self.engine)["questions"]
+
+    def idle_maintenance(self) -> None:
+        """Kick off background checkpoint/vacuum/archival if one is due."""
+        self.maintainer.run_idle()
+        if self.sync_worker is not None:
+            self.sync_worker.trigger()
 
-        return json.dumps(sessions, indent=2)
+    def close(self) -> None:
+        """Stop background sync (after a final attempt). Safe to call twice."""
+        if self.sync_worker is not None:
+            self.sync_worker.stop()
@@ -0,0 +1,227 @@
+"""Background replication from a booth's local SQLite database to DATABASE_URL.
+
+In hybrid mode (``HYBRID_SYNC=true`` plus ``DATABASE_URL``) every write goes
+to the local database, so booth latency never depends on the uplink. A
+``SyncWorker`` thread copies new sessions and feedback to the central
+database in batches whenever it is reachable.
+
+Replicated rows carry their origin key -- ``(process_id, origin_session_id)``
+for sessions and ``(origin_process_id, origin_feedback_id)`` for feedback --
+with unique indexes on both, so re-sending a batch (after a crash between
+the remote commit and the local watermark update, or from two booth
+processes sharing one local database) inserts nothing twice. Watermarks
+live in the local ``sync_state`` table and survive restarts.
+"""
+
+import logging
+import os
+import threading
+from typing import Optional
+
+from sqlalchemy import Connection, Engine, Table, create_engine, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from session_logging.migrations import migrate
+from session_logging.schema import (
+    feedback_table,
+    llm_responses_table,
+    sessions_table,
+    sync_state_table,
+)
+from telemetry import span
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = 200
+MAX_BACKOFF_SECONDS = 300.0
+
+
+def hybrid_enabled() -> bool:
+    """True when writes should go local-first and sync to DATABASE_URL."""
+    return bool(os.environ.get("DATABASE_URL")) and os.environ.get(
+        "HYBRID_SYNC", "false"
+    ).lower() in ("1", "true", "yes")
+
+
+def _insert_ignoring_duplicates(conn: Connection, table: Table, rows: list[dict]) -> None:
+    if not rows:
+        return
+    dialect = conn.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        conn.execute(insert(table).on_conflict_do_nothing(), rows)
+        return
+    for row in rows:
+        try:
+            with conn.begin_nested():
+                conn.execute(table.insert().values(**row))
+        except IntegrityError:
+            pass
+
+
+def _read_watermark(conn: Connection, name: str) -> int:
+    value = conn.execute(
+        select(sync_state_table.c.value).where(sync_state_table.c.name == name)
+    ).scalar()
+    return value or 0
+
+
+def _set_watermark(conn: Connection, name: str, value: int) -> None:
+    result = conn.execute(
+        sync_state_table.update().where(sync_state_table.c.name == name).values(value=value)
+    )
+    if result.rowcount == 0:
+        conn.execute(sync_state_table.insert().values(name=name, value=value))
+
+
+class SyncWorker:
+    """Replicates the local session database to a remote one in the background."""
+
+    def __init__(
+        self,
+        local: Engine,
+        remote_url: str,
+        interval: Optional[float] = None,
+        batch_size: int = BATCH_SIZE,
+    ) -> None:
+        self.local = local
+        self.remote_url = remote_url
+        self.interval = (
+            interval if interval is not None
+            else float(os.environ.get("SYNC_INTERVAL_SECONDS", "30"))
+        )
+        self.batch_size = batch_size
+        self._remote: Optional[Engine] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="session-sync", daemon=True)
+        self._thread.start()
+
+    def trigger(self) -> None:
+        """Sync soon instead of waiting for the next interval."""
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the worker after one last best-effort sync. Safe to call twice."""
+        if self._thread is None or self._stop.is_set():
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        if self._remote is not None:
+            self._remote.dispose()
+
+    def _run(self) -> None:
+        delay = self.interval
+        while True:
+            try:
+                self.sync_once()
+                delay = self.interval
+            except Exception as exc:
+                # Expected while the uplink is down; keep it to one line.
+                log.warning("Session sync failed (%s), retrying in %.0fs", exc, delay)
+                delay = min(delay * 2, MAX_BACKOFF_SECONDS)
+            if self._stop.is_set():
+                return
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def remote(self) -> Engine:
+        if self._remote is None:
+            engine = create_engine(self.remote_url, pool_pre_ping=True)
+            migrate(engine)
+            self._remote = engine
+        return self._remote
+
+    def sync_once(self) -> dict[str, int]:
+        """Replicate everything pending. Returns rows sent per table."""
+        sent = {"sessions": 0, "feedback": 0}
+        with span("db.sync") as trace:
+            remote = self.remote()
+            for kind, push in (("sessions", self._push_sessions), ("feedback", self._push_feedback)):
+                while True:
+                    n = push(remote)
+                    sent[kind] += n
+                    if n < self.batch_size:
+                        break
+            trace.update(sent)
+        if any(sent.values()):
+            log.info("Synced %s to central database", sent)
+        return sent
+
+    def _push_sessions(self, remote: Engine) -> int:
+        with self.local.connect() as conn:
+            watermark = _read_watermark(conn, "last_session_id")
+            rows = conn.execute(
+                select(sessions_table)
+                .where(sessions_table.c.session_id > watermark)
+                .order_by(sessions_table.c.session_id)
+                .limit(self.batch_size)
+            ).fetchall()
+            hashes = {row.response_hash for row in rows if row.response_hash}
+            responses = conn.execute(
+                select(llm_responses_table).where(llm_responses_table.c.response_hash.in_(hashes))
+            ).fetchall() if hashes else []
+        if not rows:
+            return 0
+
+        sessions = []
+        for row in rows:
+            values = dict(row._mapping)
+            values["origin_session_id"] = values.pop("session_id")
+            sessions.append(values)
+        with remote.begin() as conn:
+            _insert_ignoring_duplicates(conn, llm_responses_table, [dict(r._mapping) for r in responses])
+            _insert_ignoring_duplicates(conn, sessions_table, sessions)
+        with self.local.begin() as conn:
+            _set_watermark(conn, "last_session_id", rows[-1].session_id)
+        return len(rows)
+
+    def _push_feedback(self, remote: Engine) -> int:
+        with self.local.connect() as conn:
+            watermark = _read_watermark(conn, "last_feedback_id")
+            rows = conn.execute(
+                select(feedback_table, sessions_table.c.process_id)
+                .join(sessions_table, sessions_table.c.session_id == feedback_table.c.session_id)
+                .where(feedback_table.c.feedback_id > watermark)
+                .order_by(feedback_table.c.feedback_id)
+                .limit(self.batch_size)
+            ).fetchall()
+        if not rows:
+            return 0
+
+        with remote.begin() as conn:
+            remote_ids = {
+                (r.process_id, r.origin_session_id): r.session_id
+                for r in conn.execute(
+                    select(
+                        sessions_table.c.session_id,
+                        sessions_table.c.process_id,
+                        sessions_table.c.origin_session_id,
+                    ).where(sessions_table.c.origin_session_id.in_({row.session_id for row in rows}))
+                )
+            }
+            feedback = []
+            for row in rows:
+                session_id = remote_ids.get((row.process_id, row.session_id))
+                if session_id is None:
+                    # Sessions are pushed first, so this should not happen;
+                    # stop here and retry next sync rather than lose the row.
+                    log.error("Holding back feedback %d: session %d not replicated", row.feedback_id, row.session_id)
+                    break
+                values = dict(row._mapping)
+                del values["process_id"]
+                values["origin_feedback_id"] = values.pop("feedback_id")
+                values["origin_process_id"] = row.process_id
+                values["session_id"] = session_id
+                feedback.append(values)
+            _insert_ignoring_duplicates(conn, feedback_table, feedback)
+        if not feedback:
+            return 0
+        with self.local.begin() as conn:
+            _set_watermark(conn, "last_feedback_id", feedback[-1]["origin_feedback_id"])
+        return len(feedback)
@@ -0,0 +1,119 @@
+"""Prompt variant A/B report.
+
+Compares the prompt variants recorded with each generation (see
+``llm.prompt.PROMPT_VARIANTS``) on cost, speed and name quality.
+"""
+
+from collections import defaultdict
+from typing import Optional
+
+from sqlalchemy import Connection, Engine, case, func, select
+
+from session_logging.schema import feedback_table, sessions_table
+
+UNTAGGED = "(untagged)"
+
+
+def _float(value) -> Optional[float]:
+    # AVG comes back as Decimal on Postgres, which json.dumps rejects.
+    return None if value is None else float(value)
+
+
+def _percentile(conn: Connection, variant: Optional[str], count: int, pct: float, conditions: list) -> Optional[int]:
+    """Nearest-rank latency percentile, picked in the database rather than by loading every row."""
+    if not count:
+        return None
+    s = sessions_table.c
+    matches_variant = s.prompt_variant.is_(None) if variant is None else s.prompt_variant == variant
+    return conn.execute(
+        select(s.latency_ms)
+        .where(matches_variant, s.latency_ms.is_not(None), *conditions)
+        .order_by(s.latency_ms)
+        .offset(min(count - 1, int(count * pct / 100)))
+        .limit(1)
+    ).scalar()
+
+
+def variant_report(engine: Engine, start: Optional[str] = None, end: Optional[str] = None) -> dict:
+    """Per-variant generation and feedback metrics.
+
+    Reroll rate is the share of generations that were rerolls of an earlier
+    one; favorite rate is the share of sessions with feedback where the
+    visitor picked at least one favorite name.
+    """
+    s = sessions_table.c
+    conditions = []
+    if start is not None:
+        conditions.append(s.timestamp >= start)
+    if end is not None:
+        conditions.append(s.timestamp < end)
+
+    report: dict[str, dict] = {}
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(
+                s.prompt_variant,
+                func.count().label("generations"),
+                func.avg(s.input_tokens).label("input_tokens"),
+                func.avg(s.output_tokens).label("output_tokens"),
+                func.avg(s.latency_ms).label("latency_ms"),
+                func.count(s.latency_ms).label("latencies"),
+                func.sum(case((s.parse_error, 1), else_=0)).label("parse_errors"),
+                func.sum(case((s.reroll_index > 0, 1), else_=0)).label("rerolls"),
+            )
+            .where(*conditions)
+            .group_by(s.prompt_variant)
+        )
+        for row in rows.all():
+            report[row.prompt_variant or UNTAGGED] = {
+                "generations": row.generations,
+                "avg_input_tokens": _float(row.input_tokens),
+                "avg_output_tokens": _float(row.output_tokens),
+                "avg_latency_ms": _float(row.latency_ms),
+                "parse_error_rate": (row.parse_errors or 0) / row.generations,
+                "reroll_rate": (row.rerolls or 0) / row.generations,
+                "p50_latency_ms": _percentile(conn, row.prompt_variant, row.latencies, 50, conditions),
+                "p95_latency_ms": _percentile(conn, row.prompt_variant, row.latencies, 95, conditions),
+            }
+
+        with_feedback: dict[str, set[int]] = defaultdict(set)
+        with_favorite: dict[str, set[int]] = defaultdict(set)
+        for row in conn.execute(
+            select(s.prompt_variant, feedback_table.c.session_id, feedback_table.c.favorite_names)
+            .join(sessions_table, s.session_id == feedback_table.c.session_id)
+            .where(*conditions)
+        ):
+            variant = row.prompt_variant or UNTAGGED
+            with_feedback[variant].add(row.session_id)
+            if row.favorite_names:
+                with_favorite[variant].add(row.session_id)
+
+    for variant, metrics in report.items():
+        metrics["sessions_with_feedback"] = len(with_feedback[variant])
+        metrics["favorite_rate"] = (
+            len(with_favorite[variant]) / len(with_feedback[variant])
+            if with_feedback[variant]
+            else None
+        )
+    return dict(sorted(report.items()))
+
+
+def _fmt(value, spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def format_variant_report(report: dict) -> str:
+    """Render ``variant_report`` output as a plain-text table."""
+    lines = [
+        f"{'variant':<14}{'gens':>6}{'in tok':>8}{'out tok':>8}{'avg ms':>8}{'p95 ms':>8}"
+        f"{'parse err':>10}{'reroll':>8}{'fb':>5}{'fav':>6}"
+    ]
+    for variant, m in report.items():
+        lines.append(
+            f"{variant:<14}{m['generations']:>6}"
+            f"{_fmt(m['avg_input_tokens'], '.0f'):>8}{_fmt(m['avg_output_tokens'], '.0f'):>8}"
+            f"{_fmt(m['avg_latency_ms'], '.0f'):>8}{_fmt(m['p95_latency_ms'], 'd'):>8}"
+            f"{m['parse_error_rate']:>10.1%}{m['reroll_rate']:>8.1%}"
+            f"{m['sessions_with_feedback']:>5}{_fmt(m['favorite_rate'], '.0%'):>6}"
+        )
+    return "\n".join(lines)
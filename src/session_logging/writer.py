@@ -0,0 +1,399 @@
+"""Write-behind queue that takes session logging off the UI thread."""
+
+import json
+import logging
+import os
+import queue
+import threading
+import uuid
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Optional, Union
+
+from sqlalchemy import Connection, delete, select
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+from session_logging.schema import spool_progress_table
+from session_logging.session_logger import SessionLogger
+from telemetry import span
+
+log = logging.getLogger(__name__)
+
+_STOP = object()
+
+# How many recently written session refs to remember for linking feedback.
+MAX_REMEMBERED_SESSIONS = 1000
+
+
+class SessionTicket(Future):
+    """Future for a queued session's id.
+
+    Resolves to the database session_id once the write commits, or to None
+    if the write was spooled to disk instead. Pass the ticket itself to
+    ``SessionWriter.log_feedback``; the writer links the two even when the
+    session only reaches the database later from the spool.
+    """
+
+    def __init__(self, ref: str) -> None:
+        super().__init__()
+        self.ref = ref
+
+    def __str__(self) -> str:
+        if self.done() and self.result() is not None:
+            return str(self.result())
+        return f"pending:{self.ref[:8]}"
+
+
+# What log_session returns: a row id, or a ticket for one when writes are queued.
+SessionRef = Union[int, SessionTicket]
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # running as another user
+    return True
+
+
+def _is_transient(exc: Exception) -> bool:
+    """True for errors that say the database is unavailable, not that a record is bad."""
+    if isinstance(exc, DBAPIError) and exc.connection_invalidated:
+        return True
+    return isinstance(exc, (OperationalError, InterfaceError))
+
+
+def _set_spool_progress(conn: Connection, spool_id: str, records: int) -> None:
+    result = conn.execute(
+        spool_progress_table.update().where(spool_progress_table.c.spool_id == spool_id).values(records=records)
+    )
+    if result.rowcount == 0:
+        conn.execute(spool_progress_table.insert().values(spool_id=spool_id, records=records))
+
+
+class SessionWriter:
+    """Batches session and feedback inserts on a background thread.
+
+    Exposes the same ``log_session``/``log_feedback`` calls as SessionLogger
+    but returns immediately. Records that cannot be written (database down,
+    locked, unreachable) are appended to a local JSONL spool file and replayed
+    before the next batch.
+
+    Each process spools to its own file (``sessions.spool.<pid>.jsonl``), so
+    booth processes never append to or replay each other's spools. On
+    startup a writer adopts spools left by processes that are no longer
+    running, including ones a crashed writer was adopting; renaming a spool
+    to ``<spool>.<pid>.adopting`` claims it, so only one writer does.
+
+    Every spool file starts with a header carrying a random id. Replayed
+    records are counted per id in ``spool_progress`` in the same transaction
+    that inserts them, so a crash before the file is removed does not insert
+    them again. A record the database rejects on its own (not because the
+    database is down) goes to ``sessions.deadletter.jsonl`` instead of
+    holding up everything spooled behind it.
+    """
+
+    def __init__(
+        self,
+        logger: SessionLogger,
+        spool_path: Optional[Path] = None,
+        batch_size: int = 50,
+        linger: float = 0.05,
+    ) -> None:
+        self.logger = logger
+        self.spool_path = spool_path or Path(logger.db_path).with_suffix(f".spool.{os.getpid()}.jsonl")
+        self.dead_letter_path = self.spool_path.parent / f"{Path(logger.db_path).stem}.deadletter.jsonl"
+        # Other processes' spools claimed by this writer, replayed before our own.
+        self._adopted: list[Path] = []
+        self.batch_size = batch_size
+        self.linger = linger
+        self._queue: queue.Queue = queue.Queue()
+        # ref -> session_id for sessions written by this process
+        self._session_ids: dict[str, int] = {}
+        self._spool_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="session-writer", daemon=True)
+        self._thread.start()
+
+    def log_session(
+        self,
+        style: str,
+        qa_transcript: list[dict],
+        nicknames: list[str],
+        llm_response_raw: str,
+        **metrics,
+    ) -> SessionTicket:
+        """Queue a session row and return a ticket for its id."""
+        ticket = SessionTicket(uuid.uuid4().hex)
+        values = self.logger.session_values(style, qa_transcript, nicknames, llm_response_raw, **metrics)
+        self._queue.put({"kind": "session", "ref": ticket.ref, "values": values, "ticket": ticket})
+        return ticket
+
+    def log_feedback(
+        self,
+        session_id: Union[int, SessionTicket],
+        favorite_names: Optional[list[str]],
+        helpful_questions: list[str],
+        unhelpful_questions: list[str],
+        suggested_questions: str,
+        self_suggested_name: str,
+        other_feedback: str = "",
+    ) -> Future:
+        """Queue a feedback row for a session id or a pending SessionTicket."""
+        values = self.logger.feedback_values(
+            favorite_names,
+            helpful_questions,
+            unhelpful_questions,
+            suggested_questions,
+            self_suggested_name,
+            other_feedback,
+        )
+        record = {"kind": "feedback", "values": values, "ticket": Future()}
+        if isinstance(session_id, SessionTicket):
+            record["session_ref"] = session_id.ref
+        else:
+            record["session_id"] = session_id
+        self._queue.put(record)
+        return record["ticket"]
+
+    def question_stats(self, refresh: bool = False) -> dict[str, dict[str, int]]:
+        """Read per-question stats directly; see SessionLogger.question_stats."""
+        return self.logger.question_stats(refresh=refresh)
+
+    def idle_maintenance(self) -> None:
+        """See SessionLogger.idle_maintenance."""
+        self.logger.idle_maintenance()
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until everything queued so far has been written or spooled."""
+        marker = Future()
+        self._queue.put({"kind": "flush", "ticket": marker})
+        marker.result(timeout)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Drain the queue and stop the writer thread. Safe to call twice."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            log.error("Session writer did not drain within %.1fs", timeout)
+        self.logger.close()
+
+    # -- background thread ---------------------------------------------------
+
+    def _run(self) -> None:
+        self._adopt_orphaned_spools()
+        self._replay_spool()
+        while True:
+            batch, stop = self._next_batch()
+            if batch:
+                self._write_batch(batch)
+            if stop:
+                return
+
+    def _next_batch(self) -> tuple[list[dict], bool]:
+        """Block for one record, then gather whatever arrives within ``linger``."""
+        batch: list[dict] = []
+        item = self._queue.get()
+        while True:
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch, False
+            try:
+                item = self._queue.get(timeout=self.linger)
+            except queue.Empty:
+                return batch, False
+
+    def _write_batch(self, batch: list[dict]) -> None:
+        records = [r for r in batch if r["kind"] != "flush"]
+        if records:
+            if self._spool_has_data():
+                self._replay_spool()
+            ids: list[Optional[int]] = [None] * len(records)
+            if self._spool_has_data():
+                # Still offline: queue behind the spool to keep records in order.
+                self._spool(records)
+            else:
+                try:
+                    with span("db.write_batch", records=len(records)):
+                        ids = self._insert(records)
+                except Exception:
+                    log.exception("Session batch write failed, spooling %d records", len(records))
+                    self._spool(records)
+            for record, row_id in zip(records, ids):
+                record["ticket"].set_result(row_id)
+        for marker in (r for r in batch if r["kind"] == "flush"):
+            marker["ticket"].set_result(None)
+
+    def _insert(self, records: list[dict], progress: Optional[tuple[str, int]] = None) -> list[Optional[int]]:
+        """Insert records in one transaction, returning their ids in order.
+
+        ``progress`` is (spool_id, records replayed) to commit along with them.
+        """
+        pending: dict[str, int] = {}
+
+        def work(conn) -> list[Optional[int]]:
+            # Reset on every attempt; a retried transaction starts from scratch.
+            pending.clear()
+            ids: list[Optional[int]] = []
+            for record in records:
+                if record["kind"] == "session":
+                    row_id = self.logger.insert_session(conn, record["values"])
+                    pending[record["ref"]] = row_id
+                else:
+                    session_id = record.get("session_id")
+                    if session_id is None:
+                        ref = record["session_ref"]
+                        session_id = pending.get(ref, self._session_ids.get(ref))
+                    if session_id is None:
+                        log.error("Dropping feedback for unknown session ref %s", record.get("session_ref"))
+                        ids.append(None)
+                        continue
+                    row_id = self.logger.insert_feedback(conn, session_id, record["values"])
+                ids.append(row_id)
+            if progress is not None:
+                _set_spool_progress(conn, *progress)
+            return ids
+
+        ids = self.logger.transaction(work)
+        self._session_ids.update(pending)
+        while len(self._session_ids) > MAX_REMEMBERED_SESSIONS:
+            del self._session_ids[next(iter(self._session_ids))]
+        return ids
+
+    # -- spool -----------------------------------------------------------------
+
+    def _adopt_orphaned_spools(self) -> None:
+        """Claim spools of processes that have exited (and the old shared ``sessions.spool.jsonl``)."""
+        stem = Path(self.logger.db_path).stem
+        for path in sorted(self.spool_path.parent.glob(f"{stem}.spool.*")):
+            if path == self.spool_path:
+                continue
+            if path.name.endswith(".adopting"):
+                # Left by a writer that crashed while replaying it (or by
+                # this process before an in-place restart).
+                base, adopter, _ = path.name.rsplit(".", 2)
+                if adopter.isdigit() and int(adopter) != os.getpid() and _pid_alive(int(adopter)):
+                    continue
+            elif path.name.endswith(".jsonl"):
+                base = path.name
+                owner = base[len(f"{stem}.spool."):-len(".jsonl")]
+                if owner.isdigit() and _pid_alive(int(owner)):
+                    continue
+            else:
+                continue
+            claimed = path.with_name(f"{base}.{os.getpid()}.adopting")
+            if claimed != path:
+                try:
+                    os.rename(path, claimed)
+                except FileNotFoundError:
+                    # Another writer claimed it first.
+                    continue
+            self._adopted.append(claimed)
+            log.info("Adopted spool %s", base)
+
+    def _spool_has_data(self) -> bool:
+        if self._adopted:
+            return True
+        try:
+            return self.spool_path.stat().st_size > 0
+        except FileNotFoundError:
+            return False
+
+    def _spool(self, records: list[dict]) -> None:
+        with self._spool_lock:
+            self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spool_path, "a", encoding="utf-8") as f:
+                if f.tell() == 0:
+                    f.write(json.dumps({"kind": "header", "spool_id": uuid.uuid4().hex}) + "\n")
+                for record in records:
+                    record = {k: v for k, v in record.items() if k != "ticket"}
+                    # Pin feedback to sessions that already made it to the
+                    # database, since the ref map does not survive a restart.
+                    if record.get("session_ref") in self._session_ids:
+                        record["session_id"] = self._session_ids[record.pop("session_ref")]
+                    f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _replay_spool(self) -> None:
+        """Write adopted and our own spooled records to the database, removing each file once done."""
+        with self._spool_lock:
+            while self._adopted:
+                if not self._replay_file(self._adopted[0]):
+                    return
+                self._adopted.pop(0)
+            if self._spool_has_data():
+                self._replay_file(self.spool_path)
+
+    def _replay_file(self, path: Path) -> bool:
+        """Replay one spool file; False if the database is still unavailable."""
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        if records and records[0].get("kind") == "header":
+            spool_id = records.pop(0)["spool_id"]
+        else:
+            # Written before spools had headers; track it under a fresh id.
+            spool_id = uuid.uuid4().hex
+            self._write_spool_file(path, spool_id, records)
+        try:
+            with self.logger.engine.connect() as conn:
+                done = conn.execute(
+                    select(spool_progress_table.c.records).where(spool_progress_table.c.spool_id == spool_id)
+                ).scalar() or 0
+        except Exception:
+            log.warning("Database still unavailable, keeping %d spooled records", len(records))
+            return False
+        try:
+            remaining = records[done:]
+            with span("db.replay_spool", records=len(remaining)):
+                self._insert(remaining, progress=(spool_id, len(records)))
+        except Exception as e:
+            if _is_transient(e):
+                log.warning("Database still unavailable, keeping %d spooled records", len(records))
+                return False
+            # Something in the batch is rejected on its own: find it.
+            if not self._replay_one_by_one(spool_id, records, done):
+                return False
+        path.unlink()
+        try:
+            with self.logger.engine.begin() as conn:
+                conn.execute(delete(spool_progress_table).where(spool_progress_table.c.spool_id == spool_id))
+        except Exception:
+            log.warning("Could not clear progress for replayed spool %s", spool_id, exc_info=True)
+        log.info("Replayed %d spooled records from %s", len(records) - done, path.name)
+        return True
+
+    def _replay_one_by_one(self, spool_id: str, records: list[dict], done: int) -> bool:
+        for position in range(done, len(records)):
+            record = records[position]
+            try:
+                self._insert([record], progress=(spool_id, position + 1))
+            except Exception as e:
+                if _is_transient(e):
+                    log.warning("Database unavailable mid-replay, keeping %d spooled records", len(records) - position)
+                    return False
+                log.error("Moving rejected %s record to %s: %s", record["kind"], self.dead_letter_path.name, e)
+                with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({**record, "error": str(e)}) + "\n")
+                with self.logger.engine.begin() as conn:
+                    _set_spool_progress(conn, spool_id, position + 1)
+        return True
+
+    @staticmethod
+    def _write_spool_file(path: Path, spool_id: str, records: list[dict]) -> None:
+        """Atomically rewrite ``path`` with a header."""
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"kind": "header", "spool_id": spool_id}) + "\n")
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
@@ -0,0 +1,14 @@
+"""Span tracing and local metrics for the nickname generation pipeline."""
+
+from telemetry.logs import SharedRotatingFileHandler, configure_logging, set_log_session, shutdown_logging
+from telemetry.memory import MemoryWatchdog, RecycleProcess, restart_process
+from telemetry.metrics import REGISTRY, MetricsRegistry
+from telemetry.server import start_metrics_server
+from telemetry.tracing import JsonlExporter, Tracer, configure, get_tracer, shutdown_tracing, span
+
+__all__ = [
+    "REGISTRY", "MetricsRegistry", "JsonlExporter", "SharedRotatingFileHandler", "Tracer",
+    "configure", "get_tracer", "shutdown_tracing", "span", "start_metrics_server",
+    "MemoryWatchdog", "RecycleProcess", "restart_process",
+    "configure_logging", "set_log_session", "shutdown_logging",
+]
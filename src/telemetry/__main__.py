@@ -0,0 +1,77 @@
+"""Serve Prometheus metrics aggregated from the shared span log.
+
+Every booth process appends its spans to the same JSONL file, so this gives
+one scrape target for the whole host, even under ttyd where each visitor
+gets their own process.
+
+Usage:
+    python -m telemetry                          # logs/traces.jsonl on :9464
+    python -m telemetry --port 9100 --trace-file /tmp/traces.jsonl
+"""
+
+import argparse
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from telemetry.metrics import MetricsRegistry
+from telemetry.server import start_metrics_server
+
+DEFAULT_TRACE_FILE = Path(__file__).parent.parent.parent / "logs" / "traces.jsonl"
+
+
+class TraceFileFollower:
+    """Fold new span lines from a JSONL file into a registry on demand."""
+
+    def __init__(self, path: Path, registry: MetricsRegistry) -> None:
+        self.path = path
+        self.registry = registry
+        self.offset = 0
+        self.inode: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def poll(self) -> None:
+        with self._lock:
+            if not self.path.exists():
+                return
+            stat = self.path.stat()
+            if stat.st_ino != self.inode or stat.st_size < self.offset:
+                self.offset = 0  # file was rotated or truncated
+                self.inode = stat.st_ino
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break  # partial line still being written
+                    self.offset += len(raw)
+                    try:
+                        self.registry.observe_span(json.loads(raw))
+                    except (ValueError, KeyError):
+                        continue
+
+    def render(self) -> str:
+        self.poll()
+        return self.registry.render_prometheus()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve metrics from the span log")
+    parser.add_argument("--trace-file", type=Path, default=DEFAULT_TRACE_FILE)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9464)
+    args = parser.parse_args()
+
+    follower = TraceFileFollower(args.trace_file, MetricsRegistry())
+    if start_metrics_server(args.port, args.host, render=follower.render) is None:
+        raise SystemExit(1)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
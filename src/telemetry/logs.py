@@ -0,0 +1,218 @@
+"""Non-blocking application logging with rotation.
+
+Loggers hand records to an in-memory queue (a dict copy and an append) and
+a background QueueListener does the formatting and file I/O, so logging
+never waits on the disk in the middle of an interaction. If the writer
+falls behind, records are dropped rather than blocking or growing the
+queue without bound.
+
+Under ttyd every visitor gets their own booth process, all appending to the
+same logs/app.log, so the file rotates by size (LOG_MAX_BYTES, keeping
+LOG_BACKUP_COUNT old files) with SharedRotatingFileHandler: one process
+rotates under a lock file and the others follow it to the new file.
+LOG_MAX_BYTES=0 leaves rotation to logrotate instead. Time-based rotation
+(LOG_ROTATE_WHEN) is only safe with one process per file, e.g. with
+``{pid}`` in LOG_FILE, which expands to the process id.
+
+LOG_FORMAT=json writes one JSON object per line with the process id and the
+current visitor's session id; LOG_LEVEL and LOG_LEVELS set levels overall
+and per module.
+"""
+
+import atexit
+import contextvars
+import copy
+import fcntl
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from telemetry.metrics import REGISTRY
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(process)d %(name)s: %(message)s"
+
+_session_id: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("handlebar_log_session", default=None)
+_listener: Optional[logging.handlers.QueueListener] = None
+
+REGISTRY.describe("handlebar_log_records_dropped_total", "Log records dropped because the log writer fell behind.")
+
+
+def set_log_session(session_id: Optional[int]) -> None:
+    """Tag log records from this thread with ``session_id`` (None clears it)."""
+    _session_id.set(session_id)
+
+
+class SessionFilter(logging.Filter):
+    """Stamps records with the session id while still on the logging thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.session_id = _session_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, pid, session."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "pid": record.process,
+            "thread": record.threadName,
+            "session_id": getattr(record, "session_id", None),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking."""
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            REGISTRY.inc("handlebar_log_records_dropped_total")
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike the base class, keep the message and traceback separate so
+        # the file's formatter (text or JSON) lays them out itself.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class SharedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Size-based rotation for a file that several processes append to.
+
+    Each record first checks whether the path still names the open file and
+    reopens it if another process rotated it, so writes land in the current
+    file. Sizes come from the file itself, not this process's position, and
+    a rollover happens under an flock on ``<file>.lock`` and only if the
+    file is still over the limit, so two processes never rotate twice.
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.stream is not None and self._rotated_away():
+            self._reopen()
+        super().emit(record)
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.maxBytes <= 0:
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        size = os.fstat(self.stream.fileno()).st_size
+        return size > 0 and size + len(self.format(record)) + 1 > self.maxBytes
+
+    def doRollover(self) -> None:
+        with open(f"{self.baseFilename}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if self.stream is None or self._rotated_away():
+                self._reopen()
+                return
+            super().doRollover()
+
+    def _rotated_away(self) -> bool:
+        try:
+            current = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return True
+        opened = os.fstat(self.stream.fileno())
+        return (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino)
+
+    def _reopen(self) -> None:
+        if self.stream is not None:
+            self.stream.close()
+        self.stream = self._open()
+
+
+def _file_handler(path: Path) -> logging.Handler:
+    backups = int(os.environ.get("LOG_BACKUP_COUNT", "5"))
+    when = os.environ.get("LOG_ROTATE_WHEN", "").strip()
+    if when:
+        return logging.handlers.TimedRotatingFileHandler(path, when=when, backupCount=backups, encoding="utf-8")
+    max_bytes = int(os.environ.get("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    if max_bytes <= 0:
+        # Rotation is external; reopen the file after logrotate moves it.
+        return logging.handlers.WatchedFileHandler(path, encoding="utf-8")
+    return SharedRotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+
+
+def _parse_levels(spec: str) -> dict[str, str]:
+    """``"llm=DEBUG,httpx=WARNING"`` -> {"llm": "DEBUG", "httpx": "WARNING"}."""
+    levels = {}
+    for part in spec.split(","):
+        if "=" in part:
+            name, level = part.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(path: Path) -> logging.handlers.QueueListener:
+    """Send all logging to ``path`` through a background writer thread.
+
+    Replaces any handlers already on the root logger. ``{pid}`` in ``path``
+    is replaced with the process id; see the module docstring for running
+    several processes against one file.
+    """
+    global _listener
+    shutdown_logging(flush_handlers=False)
+    path = Path(str(path).replace("{pid}", str(os.getpid())))
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    handler = _file_handler(path)
+    if os.environ.get("LOG_FORMAT", "text").lower() == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    log_queue: queue.Queue = queue.Queue(maxsize=int(os.environ.get("LOG_QUEUE_SIZE", "10000")))
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(SessionFilter())
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+        existing.close()
+    root.addHandler(queue_handler)
+    root.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+    for name, level in _parse_levels(os.environ.get("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.unregister(shutdown_logging)
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging(flush_handlers: bool = True) -> None:
+    """Write out everything still queued, then close the log handlers."""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+    if flush_handlers:
+        logging.shutdown()
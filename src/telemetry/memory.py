@@ -0,0 +1,180 @@
+"""Memory watchdog for booths that run unattended for days.
+
+Every return to the start screen is a checkpoint: the booth records its RSS
+and, with tracemalloc on (TRACEMALLOC_FRAMES > 0; off by default, since
+tracing slows every allocation), the allocation sites that grew most since
+the last checkpoint. Checkpoints are logged and exported as gauges; every
+MEMORY_SNAPSHOT_INTERVAL_SECONDS one is also appended to a JSONL snapshot
+file. Above MAX_RSS_MB the booth restarts itself in place between visitors.
+"""
+
+import json
+import logging
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import NoReturn, Optional
+
+from telemetry.logs import shutdown_logging
+from telemetry.metrics import REGISTRY
+from telemetry.tracing import shutdown_tracing
+
+log = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+REGISTRY.describe("handlebar_process_rss_bytes", "Resident set size at the last start-screen checkpoint.")
+REGISTRY.describe("handlebar_tracemalloc_bytes", "Memory traced by tracemalloc at the last checkpoint.")
+
+# Allocations made by tracemalloc itself and by the import machinery are noise.
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class RecycleProcess(Exception):
+    """Raised between visitors when the process should restart itself."""
+
+    pass
+
+
+def rss_bytes() -> int:
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def restart_process() -> NoReturn:
+    """Replace this process with a fresh copy of itself, keeping the terminal."""
+    log.warning("Restarting booth process %d", os.getpid())
+    shutdown_tracing()
+    shutdown_logging()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.execv(sys.executable, [sys.executable] + sys.argv)
+
+
+class MemoryWatchdog:
+    """Records memory at each checkpoint and decides when to recycle.
+
+    Args:
+        snapshot_file: JSONL file for periodic snapshots (None: log only).
+        snapshot_interval: Minimum seconds between snapshot file records
+            (0 writes one at every checkpoint).
+        top: Allocation sites kept per checkpoint.
+        max_rss_mb: RSS ceiling; over it, over_ceiling() says to recycle.
+        trace_frames: Frames stored per allocation by tracemalloc; 0 (the
+            default) leaves tracemalloc off so checkpoints record RSS only.
+    """
+
+    def __init__(
+        self,
+        snapshot_file: Optional[Path] = None,
+        snapshot_interval: float = 900,
+        top: int = 10,
+        max_rss_mb: Optional[float] = None,
+        trace_frames: int = 0,
+    ) -> None:
+        self.snapshot_file = Path(snapshot_file) if snapshot_file else None
+        self.snapshot_interval = snapshot_interval
+        self.top = top
+        self.max_rss_mb = max_rss_mb
+        self.checkpoints = 0
+        self._last_written: Optional[float] = None
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        if trace_frames > 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(trace_frames)
+
+    @classmethod
+    def from_env(cls, snapshot_file: Optional[Path]) -> "MemoryWatchdog":
+        max_rss = os.environ.get("MAX_RSS_MB", "").strip()
+        return cls(
+            snapshot_file,
+            snapshot_interval=float(os.environ.get("MEMORY_SNAPSHOT_INTERVAL_SECONDS", "900")),
+            top=int(os.environ.get("MEMORY_TOP_ALLOCATIONS", "10")),
+            max_rss_mb=float(max_rss) if max_rss else None,
+            trace_frames=int(os.environ.get("TRACEMALLOC_FRAMES", "0")),
+        )
+
+    def checkpoint(self, label: str = "start") -> dict:
+        """Measure memory now; log it, export it, and maybe write a snapshot."""
+        self.checkpoints += 1
+        rss = rss_bytes()
+        record = {
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "pid": os.getpid(),
+            "label": label,
+            "checkpoint": self.checkpoints,
+            "rss_mb": round(rss / MB, 1),
+        }
+        REGISTRY.set("handlebar_process_rss_bytes", rss)
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            record["traced_mb"] = round(current / MB, 1)
+            record["traced_peak_mb"] = round(peak / MB, 1)
+            record["top"] = self._top_allocations()
+            REGISTRY.set("handlebar_tracemalloc_bytes", current)
+
+        growth = ", ".join(
+            f"{site['where']} {site['size_diff_kb']:+.0f}KB" for site in record.get("top", [])[:3] if "size_diff_kb" in site
+        )
+        log.info(
+            "Memory at %s #%d: RSS %.1fMB, traced %sMB%s",
+            label, self.checkpoints, record["rss_mb"], record.get("traced_mb", "-"),
+            f"; top growth {growth}" if growth else "",
+        )
+        self._maybe_write(record)
+        return record
+
+    def over_ceiling(self, record: dict) -> bool:
+        """Whether ``record`` is over MAX_RSS_MB."""
+        return self.max_rss_mb is not None and record["rss_mb"] > self.max_rss_mb
+
+    def _top_allocations(self) -> list[dict]:
+        """Biggest allocation sites, ranked by growth once there is a previous snapshot."""
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        if self._previous is None:
+            stats = snapshot.statistics("lineno")
+        else:
+            stats = snapshot.compare_to(self._previous, "lineno")
+        # Keeping the snapshot costs a copy of the trace table, but growth
+        # between visits is what points at a leak.
+        self._previous = snapshot
+        top = []
+        for stat in stats[: self.top]:
+            frame = stat.traceback[0]
+            site = {
+                "where": f"{frame.filename}:{frame.lineno}",
+                "size_kb": round(stat.size / 1024, 1),
+                "count": stat.count,
+            }
+            if isinstance(stat, tracemalloc.StatisticDiff):
+                site["size_diff_kb"] = round(stat.size_diff / 1024, 1)
+                site["count_diff"] = stat.count_diff
+            top.append(site)
+        return top
+
+    def _maybe_write(self, record: dict) -> None:
+        if self.snapshot_file is None:
+            return
+        now = time.monotonic()
+        if self._last_written is not None and now - self._last_written < self.snapshot_interval:
+            return
+        self._last_written = now
+        try:
+            self.snapshot_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.snapshot_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError:
+            log.exception("Failed to write memory snapshot to %s", self.snapshot_file)
@@ -0,0 +1,124 @@
+"""In-process counters, gauges and latency histograms with Prometheus text output."""
+
+import threading
+from typing import Optional
+
+# Span latency buckets in seconds. Covers everything from a SQLite insert
+# (single-digit ms) to a slow provider call near the LLM_TIMEOUT ceiling.
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0,
+)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[dict]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+class MetricsRegistry:
+    """Thread-safe store of counters, gauges and histograms keyed by name and labels."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._lock = threading.Lock()
+        self._help: dict[str, str] = {}
+        self._counters: dict[str, dict[LabelKey, float]] = {}
+        self._gauges: dict[str, dict[LabelKey, float]] = {}
+        # name -> labels -> [bucket counts..., sum, count]
+        self._histograms: dict[str, dict[LabelKey, list[float]]] = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        """Attach a HELP line to a metric."""
+        self._help[name] = help_text
+
+    def inc(self, name: str, labels: Optional[dict] = None, value: float = 1.0) -> None:
+        """Increment a counter."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, labels: Optional[dict] = None) -> None:
+        """Set a gauge to its current value."""
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, labels: Optional[dict] = None) -> None:
+        """Record a value (seconds) into a histogram."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            state = series.get(key)
+            if state is None:
+                state = [0.0] * (len(self.buckets) + 2)
+                series[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def observe_span(self, record: dict) -> None:
+        """Fold a finished span record into the standard span metrics."""
+        labels = {"span": record["span"], "status": record["status"]}
+        for attr in ("provider", "model"):
+            if attr in record:
+                labels[attr] = record[attr]
+        self.inc("handlebar_spans_total", labels)
+        self.observe(
+            "handlebar_span_duration_seconds",
+            record["duration_ms"] / 1000.0,
+            {k: v for k, v in labels.items() if k != "status"},
+        )
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: list[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+            for name, series in sorted(self._gauges.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} gauge")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(key)} {value:.15g}")
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, state in sorted(series.items()):
+                    for i, bound in enumerate(self.buckets):
+                        le = ("le", _format_bound(bound))
+                        lines.append(f"{name}_bucket{_format_labels(key, le)} {state[i]:g}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {state[-2]:.6f}")
+                    lines.append(f"{name}_count{_format_labels(key)} {state[-1]:g}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+REGISTRY.describe("handlebar_spans_total", "Finished spans by name and status.")
+REGISTRY.describe("handlebar_span_duration_seconds", "Span latency in seconds.")
@@ -0,0 +1,55 @@
+"""Minimal HTTP endpoint serving metrics in Prometheus text format."""
+
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+from telemetry.metrics import REGISTRY
+
+log = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _make_handler(render: Callable[[], str]) -> type[BaseHTTPRequestHandler]:
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            log.debug("metrics request: " + format, *args)
+
+    return MetricsHandler
+
+
+def start_metrics_server(
+    port: int,
+    host: str = "127.0.0.1",
+    render: Optional[Callable[[], str]] = None,
+) -> Optional[ThreadingHTTPServer]:
+    """Serve ``/metrics`` from a daemon thread.
+
+    Returns None (and logs a warning) if the port is already taken, which is
+    expected when several booth processes share a host: the first one wins.
+    """
+    try:
+        server = ThreadingHTTPServer(
+            (host, port), _make_handler(render or REGISTRY.render_prometheus)
+        )
+    except OSError as e:
+        log.warning("Metrics endpoint not started on %s:%s (%s)", host, port, e)
+        return None
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    log.info("Metrics endpoint listening on http://%s:%s/metrics", host, port)
+    return server
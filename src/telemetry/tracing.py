@@ -0,0 +1,186 @@
+"""Lightweight span tracing with a local JSONL exporter.
+
+Spans are timed with ``time.perf_counter()``, folded into the in-process
+metrics registry, and (optionally) appended to a JSONL file so that the
+booth's traces survive the process and can be tailed or aggregated later.
+No external collector is involved.
+
+Like the application log, the file is written by a background thread, so a
+span costs the UI thread one queue put. Every booth process appends to the
+same file (``python -m telemetry`` follows it), and it rotates by size
+(TRACE_MAX_BYTES, keeping TRACE_BACKUP_COUNT old files) under a lock file
+so that exactly one process rotates and the others follow it to the new file.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, Optional
+
+from telemetry.logs import SharedRotatingFileHandler
+from telemetry.metrics import REGISTRY, MetricsRegistry
+
+log = logging.getLogger(__name__)
+
+_current_span: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar(
+    "handlebar_current_span", default=None
+)
+
+
+REGISTRY.describe("handlebar_trace_spans_dropped_total", "Spans not exported because the trace writer fell behind.")
+
+
+class _SpanFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, default=str)
+
+
+class JsonlExporter:
+    """Append finished span records to a JSONL file, one span per line.
+
+    Encoding and writing happen on a background thread; spans are dropped
+    rather than blocking when ``queue_size`` are already waiting. The file
+    rotates at ``max_bytes`` keeping ``backup_count`` old files (see
+    SharedRotatingFileHandler); with ``max_bytes`` 0 it is never rotated
+    here, only reopened after an external logrotate moves it.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: Optional[int] = None,
+        backup_count: Optional[int] = None,
+        queue_size: int = 10000,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("TRACE_MAX_BYTES", str(50 * 1024 * 1024)))
+        if backup_count is None:
+            backup_count = int(os.environ.get("TRACE_BACKUP_COUNT", "3"))
+        if max_bytes > 0:
+            handler: logging.Handler = SharedRotatingFileHandler(
+                self.path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            )
+        else:
+            handler = logging.handlers.WatchedFileHandler(self.path, encoding="utf-8")
+        handler.setFormatter(_SpanFormatter())
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._listener: Optional[logging.handlers.QueueListener] = logging.handlers.QueueListener(
+            self._queue, handler
+        )
+        self._listener.start()
+
+    def export(self, record: dict) -> None:
+        # The finished record is not touched again, so the writer thread can
+        # encode it later without a copy.
+        try:
+            self._queue.put_nowait(logging.makeLogRecord({"msg": record}))
+        except queue.Full:
+            self.dropped += 1
+            REGISTRY.inc("handlebar_trace_spans_dropped_total")
+
+    def close(self) -> None:
+        """Write out the spans still queued and close the file. Safe to call twice."""
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+
+
+class Tracer:
+    """Creates spans and dispatches finished ones to metrics and an exporter."""
+
+    def __init__(
+        self,
+        registry: MetricsRegistry = REGISTRY,
+        exporter: Optional[JsonlExporter] = None,
+    ) -> None:
+        self.registry = registry
+        self.exporter = exporter
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[dict]:
+        """Time a block of work.
+
+        Yields a mutable attribute dict; anything added to it while the span
+        is open is recorded with the span (e.g. ``model`` or ``rows``).
+        Setting ``status`` marks a handled failure without raising.
+        """
+        parent = _current_span.get()
+        record = {
+            "span": name,
+            "span_id": uuid.uuid4().hex[:16],
+            "trace_id": parent["trace_id"] if parent else uuid.uuid4().hex,
+            "parent_id": parent["span_id"] if parent else None,
+            "pid": os.getpid(),
+        }
+        token = _current_span.set(record)
+        started_at = datetime.now(timezone.utc).isoformat()
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield attrs
+        except BaseException as e:
+            status = "error"
+            attrs.setdefault("error", type(e).__name__)
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000.0
+            _current_span.reset(token)
+            status = attrs.pop("status", status)
+            record.update(attrs)
+            record["start"] = started_at
+            record["duration_ms"] = round(duration_ms, 3)
+            record["status"] = status
+            self._finish(record)
+
+    def _finish(self, record: dict) -> None:
+        try:
+            self.registry.observe_span(record)
+            if self.exporter is not None:
+                self.exporter.export(record)
+        except Exception:
+            # Tracing must never break the booth.
+            log.exception("Failed to record span %s", record.get("span"))
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer."""
+    return _tracer
+
+
+def span(name: str, **attrs):
+    """Open a span on the process-wide tracer. See ``Tracer.span``."""
+    return _tracer.span(name, **attrs)
+
+
+def configure(trace_file: Optional[Path] = None) -> Tracer:
+    """Point the process-wide tracer at a JSONL file (or disable export)."""
+    shutdown_tracing()
+    if trace_file:
+        _tracer.exporter = JsonlExporter(trace_file)
+        atexit.unregister(shutdown_tracing)
+        atexit.register(shutdown_tracing)
+    return _tracer
+
+
+def shutdown_tracing() -> None:
+    """Write out queued spans and stop exporting them."""
+    exporter, _tracer.exporter = _tracer.exporter, None
+    if exporter is not None:
+        exporter.close()
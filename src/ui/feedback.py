@@ -7,6 +7,8 @@ from rich.align import Align
 from rich.console import Console
 from rich.text import Text
 
+from ui.frame import FrameRenderer
+from ui.session import arm_idle_timeout
 from ui.theme import (
     GRADIENT_NEON,
     STYLE_DIM,
@@ -22,54 +24,64 @@ def ask_feedback(
     console: Console,
     nicknames: list[str],
     questions_asked: Optional[list[dict]] = None,
+    frames: Optional[FrameRenderer] = None,
 ) -> Optional[dict]:
     """Show optional feedback form after nickname generation.
 
     Args:
         console: Rich console for output.
         nicknames: List of generated nickname strings.
+        frames: Renderer to write each screen through (default: a new one for ``console``).
 
     Returns:
         Dict with feedback fields, or None if the user skipped.
     """
-    console.print()
-    console.print(styled_rule("quick feedback (optional)"))
-    console.print()
-    console.print(Text("Help us improve!", style="bold white"))
-    console.print()
-
-    opt_in = pt_prompt("Give quick feedback? [Y/n]: ")
+    frames = frames or FrameRenderer(console)
+    with frames.frame("feedback"):
+        console.print()
+        console.print(styled_rule("quick feedback (optional)"))
+        console.print()
+        console.print(Text("Help us improve!", style="bold white"))
+        console.print()
+
+    opt_in = pt_prompt("Give quick feedback? [Y/n]: ", pre_run=arm_idle_timeout)
     if opt_in.strip().lower() == "n":
         return None
 
-    console.print()
+    with frames.frame("feedback_favorite"):
+        console.print()
+        _print_favorite_choices(console, nicknames)
+    favorite_name = _ask_favorite_name(nicknames)
 
-    favorite_name = _ask_favorite_name(console, nicknames)
-
-    console.print(Text("What question(s) would you suggest we ask?", style=STYLE_QUESTION))
-    console.print(Text("Enter to skip", style=STYLE_DIM))
-    suggested_questions = pt_prompt("> ")
-    console.print()
+    with frames.frame("feedback_suggest"):
+        console.print()
+        console.print(Text("What question(s) would you suggest we ask?", style=STYLE_QUESTION))
+        console.print(Text("Enter to skip", style=STYLE_DIM))
+    suggested_questions = pt_prompt("> ", pre_run=arm_idle_timeout)
 
     helpful = _ask_multi_select_questions(
-        console, questions_asked or [], "Which questions were most helpful?"
+        console, frames, questions_asked or [], "Which questions were most helpful?"
     )
     unhelpful = _ask_multi_select_questions(
-        console, questions_asked or [], "Which questions were least helpful?"
+        console, frames, questions_asked or [], "Which questions were least helpful?"
     )
 
-    console.print(Text("What do you think is a good playa name for you?", style=STYLE_QUESTION))
-    console.print(Text("Enter to skip", style=STYLE_DIM))
-    self_suggested_name = pt_prompt("> ")
-    console.print()
+    with frames.frame("feedback_own_name"):
+        console.print()
+        console.print(Text("What do you think is a good playa name for you?", style=STYLE_QUESTION))
+        console.print(Text("Enter to skip", style=STYLE_DIM))
+    self_suggested_name = pt_prompt("> ", pre_run=arm_idle_timeout)
 
-    console.print(Text("Any other feedback?", style=STYLE_QUESTION))
-    console.print(Text("Enter to skip", style=STYLE_DIM))
-    other_feedback = pt_prompt("> ")
-    console.print()
+    with frames.frame("feedback_other"):
+        console.print()
+        console.print(Text("Any other feedback?", style=STYLE_QUESTION))
+        console.print(Text("Enter to skip", style=STYLE_DIM))
+    other_feedback = pt_prompt("> ", pre_run=arm_idle_timeout)
 
-    console.print(Align.center(make_gradient_text("Thanks for the feedback!", GRADIENT_NEON, bold=True)))
-    console.print()
+    with frames.frame("feedback_thanks"):
+        console.print()
+        console.print(Align.center(make_gradient_text("Thanks for the feedback!", GRADIENT_NEON, bold=True)))
+        console.print()
 
     return {
         "favorite_names": favorite_name,
@@ -81,8 +93,7 @@ def ask_feedback(
     }
 
 
-def _ask_favorite_name(console: Console, nicknames: list[str]) -> Optional[list[str]]:
-    """Multi-select for favorite nickname(s)."""
+def _print_favorite_choices(console: Console, nicknames: list[str]) -> None:
     console.print(Text("Which name(s) are your favorite?", style=STYLE_QUESTION))
     console.print(Text("Comma-separated numbers, or Enter to skip", style=STYLE_DIM))
     console.print()
@@ -99,8 +110,10 @@ def _ask_favorite_name(console: Console, nicknames: list[str]) -> Optional[list[
         console.print(line)
     console.print()
 
-    raw = pt_prompt("Enter numbers (e.g. 1,3): ")
-    console.print()
+
+def _ask_favorite_name(nicknames: list[str]) -> Optional[list[str]]:
+    """Multi-select for favorite nickname(s)."""
+    raw = pt_prompt("Enter numbers (e.g. 1,3): ", pre_run=arm_idle_timeout)
 
     if any(p.strip() == "0" for p in raw.split(",")):
         return None
@@ -112,6 +125,7 @@ def _ask_favorite_name(console: Console, nicknames: list[str]) -> Optional[list[
 
 def _ask_multi_select_questions(
     console: Console,
+    frames: FrameRenderer,
     questions: list[dict],
     label: str,
 ) -> list[str]:
@@ -119,18 +133,19 @@ def _ask_multi_select_questions(
     if not questions:
         return []
 
-    console.print(Text(label, style=STYLE_QUESTION))
-    console.print(Text("Comma-separated numbers, or Enter to skip", style=STYLE_DIM))
-    console.print()
-    for i, qa in enumerate(questions, 1):
-        line = Text()
-        line.append(f"  [{i}]", style=STYLE_KEY_BRACKET)
-        line.append(f" {qa['question']}")
-        console.print(line)
-    console.print()
-
-    raw = pt_prompt("Enter numbers (e.g. 1,3): ")
-    console.print()
+    with frames.frame("feedback_questions"):
+        console.print()
+        console.print(Text(label, style=STYLE_QUESTION))
+        console.print(Text("Comma-separated numbers, or Enter to skip", style=STYLE_DIM))
+        console.print()
+        for i, qa in enumerate(questions, 1):
+            line = Text()
+            line.append(f"  [{i}]", style=STYLE_KEY_BRACKET)
+            line.append(f" {qa['question']}")
+            console.print(line)
+        console.print()
+
+    raw = pt_prompt("Enter numbers (e.g. 1,3): ", pre_run=arm_idle_timeout)
 
     indices = _parse_comma_separated_ints(raw, len(questions))
     return [questions[i - 1]["question_id"] for i in indices]
@@ -0,0 +1,263 @@
+"""Frame-buffered screen output.
+
+Each screen is composed off-screen in an in-memory buffer and written to
+the terminal in a single write and flush, so ttyd sends one websocket frame
+per screen instead of one per printed line. Redrawing a full screen that is
+still displayed rewrites only the lines that changed.
+
+Output modes trade color fidelity for bytes: when a bandwidth budget is
+configured (BANDWIDTH_BUDGET_KBPS) or measured from blocking writes, the
+booth picks the richest mode whose start screen still paints within
+SCREEN_PAINT_MS.
+"""
+
+import io
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, NamedTuple, Optional
+
+from rich.color import ColorSystem
+from rich.console import Console, RenderableType
+from rich.style import Style
+
+from telemetry import REGISTRY, span
+
+CLEAR_SCREEN = "\x1b[H\x1b[2J"
+
+# A write+flush slower than this means the terminal link pushed back, so
+# its throughput says something about the link rather than the CPU.
+SLOW_WRITE_SECONDS = 0.01
+
+REGISTRY.describe("handlebar_render_bytes_total", "Bytes written to the terminal by frame.")
+REGISTRY.describe("handlebar_render_writes_total", "Terminal writes by frame.")
+
+
+class OutputMode(NamedTuple):
+    """How screens are colored: a rich color system plus gradient banding."""
+
+    color_system: str
+    bands: int  # 0 = per-character gradients
+
+
+# Richest first; choose_output_mode() walks down until a screen fits.
+OUTPUT_MODES = (
+    OutputMode("truecolor", 0),
+    OutputMode("truecolor", 8),
+    OutputMode("256", 8),
+    OutputMode("standard", 4),
+)
+
+_COLOR_SYSTEMS = {
+    "standard": ColorSystem.STANDARD,
+    "256": ColorSystem.EIGHT_BIT,
+    "truecolor": ColorSystem.TRUECOLOR,
+}
+
+
+def bandwidth_budget_kbps() -> Optional[float]:
+    """BANDWIDTH_BUDGET_KBPS as a number, or None when not configured."""
+    value = os.environ.get("BANDWIDTH_BUDGET_KBPS", "").strip()
+    return float(value) if value else None
+
+
+def color_system_rank(color_system: Optional[str]) -> int:
+    """Order color systems by richness (0 for no color or unknown systems)."""
+    system = _COLOR_SYSTEMS.get(color_system or "")
+    return system.value if system else 0
+
+
+def estimate_bytes(console: Console, renderable: RenderableType, color_system: str) -> int:
+    """Bytes ``renderable`` would take on ``console`` if rendered in ``color_system``.
+
+    Nothing is written. Styles are rebuilt before rendering because rich
+    caches escape codes on each Style instance for the first color system it
+    was rendered in, and the console itself may be using another one.
+    """
+    system = _COLOR_SYSTEMS[color_system]
+    total = 0
+    for segment in console.render(renderable):
+        if segment.control:
+            continue
+        text, style = segment.text, segment.style
+        if style:
+            fresh = Style(
+                color=style.color,
+                bgcolor=style.bgcolor,
+                bold=style.bold,
+                dim=style.dim,
+                italic=style.italic,
+                underline=style.underline,
+                reverse=style.reverse,
+            )
+            text = fresh.render(text, color_system=system)
+        total += len(text.encode("utf-8"))
+    return total
+
+
+def choose_output_mode(measure: Callable[[OutputMode], int], budget_kbps: Optional[float]) -> OutputMode:
+    """Richest mode whose screen, as sized by ``measure``, paints within SCREEN_PAINT_MS.
+
+    Without a budget the richest mode is used. OUTPUT_COLOR_SYSTEM and
+    GRADIENT_BANDS pin their half of the mode. If nothing fits, the
+    cheapest mode is used anyway.
+    """
+    pinned_system = os.environ.get("OUTPUT_COLOR_SYSTEM", "").strip()
+    pinned_bands = os.environ.get("GRADIENT_BANDS", "").strip()
+    modes: list[OutputMode] = []
+    for mode in OUTPUT_MODES:
+        mode = OutputMode(pinned_system or mode.color_system, int(pinned_bands) if pinned_bands else mode.bands)
+        if mode not in modes:
+            modes.append(mode)
+    if budget_kbps is None:
+        return modes[0]
+    paint_ms = float(os.environ.get("SCREEN_PAINT_MS", "200"))
+    budget_bytes = budget_kbps * 1000 / 8 * paint_ms / 1000
+    for mode in modes:
+        if measure(mode) <= budget_bytes:
+            return mode
+    return modes[-1]
+
+
+def diff_frame(old: list[str], new: list[str]) -> str:
+    """Escape sequences that turn screen ``old`` into ``new`` (both start at the top left).
+
+    Changed lines are rewritten in place and erased to the end of the line;
+    leftover lines below a shorter frame are cleared. The cursor ends where a
+    full write of ``new`` would leave it.
+    """
+    parts = []
+    for row, line in enumerate(new):
+        if row < len(old) and old[row] == line:
+            continue
+        parts.append(f"\x1b[{row + 1};1H{line}\x1b[K")
+    if len(new) < len(old):
+        parts.append(f"\x1b[{len(new) + 1};1H\x1b[J")
+    if not parts:
+        return ""
+    # Rich output ends with a newline, so the last "line" is empty and the
+    # cursor belongs at the start of it.
+    parts.append(f"\x1b[{len(new)};1H")
+    return "".join(parts)
+
+
+class _FrameBuffer(io.StringIO):
+    """Collects one frame while looking like the real terminal to rich."""
+
+    def __init__(self, target) -> None:
+        super().__init__()
+        self.target = target
+
+    def isatty(self) -> bool:
+        return self.target.isatty()
+
+    def fileno(self) -> int:
+        return self.target.fileno()
+
+
+class FrameRenderer:
+    """Writes whole screens to ``console`` in one go and counts the cost.
+
+    ``bytes_written``, ``writes`` and ``frames`` accumulate over the
+    renderer's life; each frame is also reported as ``bytes``/``writes``
+    attributes on its ``render.<name>`` span and in the render metrics.
+    Writes that block are timed so measured_kbps() can estimate the link.
+    """
+
+    def __init__(self, console: Console) -> None:
+        self.console = console
+        self.frames = 0
+        self.bytes_written = 0
+        self.writes = 0
+        self._slow_bytes = 0
+        self._slow_seconds = 0.0
+        # Lines of the full-screen frame currently displayed, if known.
+        self._screen: Optional[list[str]] = None
+
+    @contextmanager
+    def frame(self, name: str, clear: bool = False) -> Iterator[Console]:
+        """Compose one frame: everything printed to the console inside is written once on exit.
+
+        With ``clear`` the frame replaces the whole screen and can later be
+        updated in place with redraw().
+        """
+        with span(f"render.{name}") as trace:
+            with self._compose() as buffer:
+                yield self.console
+            text = buffer.getvalue()
+            if clear and self._addressable():
+                self._screen = text.split("\n")
+                self._write(name, CLEAR_SCREEN + text, trace)
+            else:
+                self._screen = None
+                self._write(name, text, trace)
+
+    @contextmanager
+    def redraw(self, name: str) -> Iterator[Console]:
+        """Like ``frame(name, clear=True)``, but only rewrites changed lines.
+
+        Only use it when nothing else has written to the screen since the
+        last full-screen frame; otherwise (or when the frame doesn't fit the
+        terminal) the screen is cleared and written in full.
+        """
+        previous = self._screen
+        with span(f"render.{name}") as trace:
+            with self._compose() as buffer:
+                yield self.console
+            text = buffer.getvalue()
+            lines = text.split("\n")
+            if not self._addressable():
+                self._screen = None
+                data = text
+            elif previous is None or max(len(previous), len(lines)) > self.console.height:
+                self._screen = lines
+                data = CLEAR_SCREEN + text
+            else:
+                self._screen = lines
+                data = diff_frame(previous, lines)
+                trace["diffed"] = True
+            self._write(name, data, trace)
+
+    @contextmanager
+    def _compose(self) -> Iterator[_FrameBuffer]:
+        """Point the console at a buffer; rich itself holds output until the block ends.
+
+        Going through the console's own buffering (rather than capture())
+        keeps recording consoles (``record=True``) recording.
+        """
+        buffer = _FrameBuffer(self.console.file)
+        self.console.file = buffer
+        try:
+            with self.console:
+                yield buffer
+        finally:
+            self.console.file = buffer.target
+
+    def _addressable(self) -> bool:
+        """Whether cursor addressing works (the same test Console.clear() uses)."""
+        return self.console.is_terminal and not self.console.is_dumb_terminal
+
+    def measured_kbps(self) -> Optional[float]:
+        """Throughput of the writes that blocked, or None if none have."""
+        if not self._slow_seconds:
+            return None
+        return self._slow_bytes * 8 / 1000 / self._slow_seconds
+
+    def _write(self, name: str, data: str, trace: dict) -> None:
+        size = len(data.encode("utf-8"))
+        writes = 1 if data else 0
+        if data:
+            started = time.perf_counter()
+            self.console.file.write(data)
+            self.console.file.flush()
+            elapsed = time.perf_counter() - started
+            if elapsed >= SLOW_WRITE_SECONDS:
+                self._slow_bytes += size
+                self._slow_seconds += elapsed
+        self.frames += 1
+        self.bytes_written += size
+        self.writes += writes
+        trace["bytes"] = size
+        trace["writes"] = writes
+        REGISTRY.inc("handlebar_render_bytes_total", {"frame": name}, size)
+        REGISTRY.inc("handlebar_render_writes_total", {"frame": name}, writes)
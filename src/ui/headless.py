@@ -0,0 +1,97 @@
+"""Drive Terminal visits without a TTY (benchmarks and load tests).
+
+Keystrokes are fed through prompt_toolkit pipe input and screen output goes
+to a recording console, so the whole visit -- prompts, rendering, LLM call,
+logging -- runs exactly as at the booth.
+"""
+
+import io
+import random
+import time
+from typing import Optional
+
+from prompt_toolkit.application import create_app_session
+from prompt_toolkit.input import create_pipe_input
+from prompt_toolkit.output import DummyOutput
+from rich.console import Console
+
+from ui.terminal import State, Terminal, truthy_env_var
+
+
+class ScriptedVisitor:
+    """What one visitor does: their answers, style, style switches, rerolls and feedback."""
+
+    def __init__(
+        self,
+        answers: dict[str, str],
+        style: str = "m",
+        num_questions: Optional[int] = None,
+        rerolls: int = 0,
+        switches: tuple[str, ...] = (),
+        feedback: bool = False,
+        think_time: float = 0.0,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.answers = answers
+        self.style = style
+        self.num_questions = num_questions
+        self.rerolls = rerolls
+        # Style keys pressed on the display screen (multi-style mode), before any reroll.
+        self.switches = switches
+        self.feedback = feedback
+        self.think_time = think_time
+        self.rng = rng or random.Random()
+
+    def think(self) -> float:
+        """Seconds spent reading/typing before a screen's input (exponential around think_time)."""
+        return self.rng.expovariate(1 / self.think_time) if self.think_time > 0 else 0.0
+
+    def lines(self, terminal: Terminal) -> list[str]:
+        """Input lines for every prompt of the visit, in order.
+
+        Answers are taken from ``answers`` by question_id (prefill mode), so
+        only the prompts around the questionnaire need scripting.
+        """
+        lines = ["", self.style]
+        if truthy_env_var("ASK_NUM_QUESTIONS", default="1"):
+            lines.append(str(self.num_questions or terminal.max_questions))
+        lines += list(self.switches) + ["r"] * self.rerolls + [""]
+        if truthy_env_var("ASK_FEEDBACK"):
+            if self.feedback:
+                # favorite, suggestion, helpful, unhelpful, own name, other
+                lines += ["y", "1", "", "1", "", "", ""]
+            else:
+                lines.append("n")
+        # Spare lines for the "Press Enter" prompt after a failed generation.
+        return lines + [""] * 3
+
+
+def headless_terminal(logger=None) -> Terminal:
+    """A Terminal that renders into memory instead of the screen."""
+    terminal = Terminal(logger=logger)
+    terminal.console = Console(file=io.StringIO(), width=120, force_terminal=True, color_system="truecolor")
+    return terminal
+
+
+def run_visit(terminal: Terminal, visitor: ScriptedVisitor) -> list[tuple[State, float]]:
+    """Play one visit from START back to START.
+
+    Returns:
+        (state, seconds) for every state handler that ran, excluding the
+        visitor's think time.
+    """
+    terminal.state = State.START
+    terminal.prefill_answers = visitor.answers
+    terminal.console.file = io.StringIO()  # don't accumulate output across visits
+    steps: list[tuple[State, float]] = []
+    with create_pipe_input() as pipe, create_app_session(input=pipe, output=DummyOutput()):
+        pipe.send_text("".join(f"{line}\r" for line in visitor.lines(terminal)))
+        while True:
+            state = terminal.state
+            if state != State.GENERATING:
+                time.sleep(visitor.think())
+            started = time.perf_counter()
+            terminal.step()
+            steps.append((state, time.perf_counter() - started))
+            if terminal.state == State.START:
+                return steps
@@ -0,0 +1,70 @@
+"""Feedback-driven question selection (Thompson sampling over question_id)."""
+
+import logging
+import random
+import time
+from typing import Callable, Optional
+
+log = logging.getLogger(__name__)
+
+QuestionStats = dict[str, dict[str, int]]
+
+
+class QuestionSelector:
+    """Picks questions that visitors find helpful and actually answer.
+
+    Each question's score is a draw from Beta(helpful+1, unhelpful+1) times
+    a draw from Beta(answered+1, skipped+1), so well-rated, rarely-skipped
+    questions win most of the time while uncertain ones still get tried.
+    With probability ``exploration`` a slot is filled uniformly at random
+    instead, so new questions always get a chance.
+    """
+
+    def __init__(
+        self,
+        load_stats: Callable[[], QuestionStats],
+        exploration: float = 0.1,
+        ttl: float = 300.0,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.load_stats = load_stats
+        self.exploration = exploration
+        self.ttl = ttl
+        self.rng = rng or random.Random()
+        self._stats: QuestionStats = {}
+        self._loaded_at: Optional[float] = None
+
+    def stats(self) -> QuestionStats:
+        """Return cached stats, reloading them at most every ``ttl`` seconds."""
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at > self.ttl:
+            try:
+                self._stats = self.load_stats()
+            except Exception:
+                log.exception("Failed to load question stats, keeping previous")
+            self._loaded_at = now
+        return self._stats
+
+    def score(self, question_id: str, stats: QuestionStats) -> float:
+        s = stats.get(question_id, {})
+        helpful = s.get("helpful", 0)
+        unhelpful = s.get("unhelpful", 0)
+        skipped = s.get("skipped", 0)
+        answered = s.get("asked", 0) - skipped
+        return self.rng.betavariate(helpful + 1, unhelpful + 1) * self.rng.betavariate(
+            answered + 1, skipped + 1
+        )
+
+    def select(self, pool: list[dict], n: int) -> list[dict]:
+        """Choose ``n`` questions from ``pool``."""
+        stats = self.stats()
+        remaining = list(pool)
+        chosen: list[dict] = []
+        while remaining and len(chosen) < n:
+            if self.rng.random() < self.exploration:
+                pick = self.rng.choice(remaining)
+            else:
+                pick = max(remaining, key=lambda q: self.score(q["question_id"], stats))
+            chosen.append(pick)
+            remaining.remove(pick)
+        return chosen
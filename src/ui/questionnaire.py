@@ -6,6 +6,8 @@ from prompt_toolkit import prompt as pt_prompt
 from rich.console import Console
 from rich.text import Text
 
+from ui.frame import FrameRenderer
+from ui.session import arm_idle_timeout
 from ui.theme import (
     GRADIENT_NEON,
     STYLE_DIM,
@@ -21,6 +23,7 @@ def ask_questions(
     console: Console,
     questions: list[dict],
     prefill_answers: Optional[dict[str, str]] = None,
+    frames: Optional[FrameRenderer] = None,
 ) -> list[dict]:
     """
     Ask a series of questions and collect answers.
@@ -29,16 +32,20 @@ def ask_questions(
         console: Rich console for output
         questions: List of dicts with 'question_id', 'question', and 'hint' keys
         prefill_answers: Optional dict mapping question_id to answer (non-interactive mode)
+        frames: Renderer to write each screen through (default: a new one for ``console``)
 
     Returns:
         List of dicts with 'q' and 'a' keys (Q/A transcript)
     """
+    frames = frames or FrameRenderer(console)
+
     # Non-interactive mode with prefilled answers
     if prefill_answers is not None:
-        return _prefill_questions(console, questions, prefill_answers)
+        with frames.frame("prefilled_answers"):
+            return _prefill_questions(console, questions, prefill_answers)
 
     # Interactive mode
-    return _interactive_questions(console, questions)
+    return _interactive_questions(console, questions, frames)
 
 
 def _prefill_questions(
@@ -78,32 +85,37 @@ def _prefill_questions(
     return qa_transcript
 
 
-def _interactive_questions(console: Console, questions: list[dict]) -> list[dict]:
-    """Collect answers interactively."""
+def _interactive_questions(console: Console, questions: list[dict], frames: FrameRenderer) -> list[dict]:
+    """Collect answers interactively, one frame per question."""
     qa_transcript = []
 
-    console.print()
-    console.print(styled_rule("questionnaire"))
-    console.print()
-    console.print(Text("Answer a few questions to help generate your playa name.", style="bold white"))
-    console.print(Text("Press Enter to skip any question.", style=STYLE_DIM))
-    console.print()
+    with frames.frame("questionnaire"):
+        console.print()
+        console.print(styled_rule("questionnaire"))
+        console.print()
+        console.print(Text("Answer a few questions to help generate your playa name.", style="bold white"))
+        console.print(Text("Press Enter to skip any question.", style=STYLE_DIM))
+        console.print()
 
     for i, q in enumerate(questions, 1):
         question_id = q["question_id"]
         question_text = q["question"]
         hint = q.get("hint", "")
 
-        progress = make_gradient_text(f"[{i}/{len(questions)}]", GRADIENT_NEON, bold=True)
-        console.print(progress)
-        console.print(Text(question_text, style=STYLE_QUESTION))
-        if hint:
-            console.print(Text(hint, style=STYLE_HINT))
+        with frames.frame("question"):
+            if i > 1:
+                console.print()
+            progress = make_gradient_text(f"[{i}/{len(questions)}]", GRADIENT_NEON, bold=True)
+            console.print(progress)
+            console.print(Text(question_text, style=STYLE_QUESTION))
+            if hint:
+                console.print(Text(hint, style=STYLE_HINT))
 
-        answer = pt_prompt("> ")
+        answer = pt_prompt("> ", pre_run=arm_idle_timeout)
 
         qa_transcript.append({"question_id": question_id, "question": question_text, "answer": answer})
-        console.print()
 
-    console.print(styled_rule())
+    with frames.frame("questionnaire_done"):
+        console.print()
+        console.print(styled_rule())
     return qa_transcript
@@ -0,0 +1,211 @@
+"""Per-visitor session state and idle timeout for kiosk mode."""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from prompt_toolkit.application.current import get_app
+
+from data.styles import DEFAULT_STYLE
+from session_logging import SessionRef
+from llm.parse import EXPECTED_COUNT, clean_names
+from llm.prompt import choose_variant
+
+log = logging.getLogger(__name__)
+
+# Upper bounds on per-visitor state so prompt size and memory stay flat no
+# matter how many times a visitor rerolls or how much they type.
+MAX_AVOID_NAMES = int(os.environ.get("MAX_AVOID_NAMES", "50"))
+MAX_ANSWER_CHARS = int(os.environ.get("MAX_ANSWER_CHARS", "500"))
+MAX_CANDIDATES = int(os.environ.get("MAX_CANDIDATES", "25"))
+
+# Candidate pool mode: ask for this many names per LLM call and show
+# EXPECTED_COUNT at a time, so rerolls are served locally (0 disables).
+CANDIDATE_POOL_SIZE = int(os.environ.get("CANDIDATE_POOL_SIZE", "0"))
+# Start a background request once this many unseen names or fewer remain
+# (default: one more screen).
+POOL_REFILL_AT = int(os.environ.get("POOL_REFILL_AT", str(EXPECTED_COUNT)))
+
+# Multi-style mode: once the answers are in, also generate names for every
+# other style, STYLE_CONCURRENCY at a time, so the display screen can switch
+# styles with one key.
+MULTI_STYLE = os.environ.get("MULTI_STYLE", "false").lower() in ("1", "true", "yes")
+STYLE_CONCURRENCY = int(os.environ.get("STYLE_CONCURRENCY", "2"))
+
+
+class IdleTimeout(Exception):
+    """Raised when a visitor walks away mid-session."""
+
+    pass
+
+
+def idle_timeout_seconds() -> float:
+    """Seconds of inactivity before an abandoned session is reset (0 disables)."""
+    return float(os.environ.get("IDLE_TIMEOUT_SECONDS", "300"))
+
+
+def arm_idle_timeout() -> None:
+    """prompt_toolkit ``pre_run`` hook that aborts the prompt after the idle timeout.
+
+    Each ``prompt()`` call runs its own event loop, so the timer is discarded
+    along with the loop once the visitor answers.
+    """
+    timeout = idle_timeout_seconds()
+    if timeout <= 0:
+        return
+    app = get_app()
+
+    def expire():
+        if app.is_running:
+            app.exit(exception=IdleTimeout())
+
+    asyncio.get_running_loop().call_later(timeout, expire)
+
+
+class Alternate:
+    """Names generated for a style other than the one on screen (multi-style mode).
+
+    Logged once, when we know whether the visitor saw them: as shown when
+    they switch to the style, or as an unseen alternate when the visit
+    moves on without it. ``log_generation(alternate)`` does the logging and
+    returns the session id; None means it is already logged.
+    """
+
+    def __init__(
+        self,
+        names: list[str],
+        log_generation: Optional[Callable[[bool], Optional[SessionRef]]] = None,
+        session_id: Optional[SessionRef] = None,
+    ) -> None:
+        self.names = names
+        self.session_id = session_id
+        self._log_generation = log_generation
+        self._lock = threading.Lock()
+
+    def log(self, shown: bool) -> Optional[SessionRef]:
+        """Log the generation (first call only) and return its session id."""
+        with self._lock:
+            if self._log_generation is not None:
+                log_generation, self._log_generation = self._log_generation, None
+                self.session_id = log_generation(not shown)
+        return self.session_id
+
+
+def _log_unseen(future: Future) -> None:
+    if future.cancelled() or future.exception() is not None:
+        return
+    try:
+        future.result().log(shown=False)
+    except Exception:
+        log.exception("Failed to log an unseen style generation")
+
+
+class VisitorSession:
+    """Everything that belongs to one visitor, created at START and discarded after."""
+
+    def __init__(self, num_questions: int, style: str = DEFAULT_STYLE) -> None:
+        self.style = style
+        self.num_questions = num_questions
+        self.questions_asked: list[dict] = []
+        self.qa_transcript: list[dict] = []
+        self.avoid_list: list[str] = []
+        self.candidates: list[str] = []
+        # A SessionTicket rather than a row id when logging is asynchronous.
+        self.session_id: Optional[SessionRef] = None
+        self.started_at = time.monotonic()
+        # Logged with every generation so analytics can count visits, not rows.
+        self.visit_id = uuid.uuid4().hex
+        # Fixed for the whole visit so rerolls stay in the same A/B arm.
+        self.prompt_variant = choose_variant()
+        self.rerolls = 0
+        # Names generated but not shown yet, each with the id of the logged
+        # generation it came from, and the background request refilling it.
+        self.pool: list[tuple[str, Optional[SessionRef]]] = []
+        self.refill: Optional[Future] = None
+        # Multi-style mode: style key -> Future[Alternate] for the styles
+        # not on screen, pending or done.
+        self.alternates: dict[str, Future] = {}
+
+    def set_transcript(self, qa_transcript: list[dict]) -> None:
+        """Store the visitor's answers, truncating overly long ones."""
+        self.qa_transcript = [
+            {**qa, "answer": qa["answer"][:MAX_ANSWER_CHARS]} for qa in qa_transcript
+        ]
+
+    def set_candidates(self, nicknames: list[str]) -> None:
+        self.candidates = list(nicknames[:MAX_CANDIDATES])
+
+    def reroll(self) -> None:
+        """Move the shown names onto the avoid list, keeping only the most recent."""
+        self.avoid_list.extend(self.candidates)
+        del self.avoid_list[:-MAX_AVOID_NAMES]
+        self.candidates = []
+        self.rerolls += 1
+
+    def seen_names(self) -> list[str]:
+        """Names shown, on screen or pooled, most recent last: the avoid list for a refill."""
+        return (self.avoid_list + self.candidates + [name for name, _ in self.pool])[-MAX_AVOID_NAMES:]
+
+    def add_to_pool(self, names: list[str], session_id: Optional[SessionRef]) -> int:
+        """Pool valid names that aren't already shown or pooled; return how many were added."""
+        exclude = self.avoid_list + self.candidates + [name for name, _ in self.pool]
+        fresh = clean_names(names, exclude)
+        self.pool.extend((name, session_id) for name in fresh)
+        return len(fresh)
+
+    def draw(self) -> bool:
+        """Show the next screen of names from the pool; False if it is empty.
+
+        session_id follows the generation the names came from, so feedback
+        is attached to the right logged session.
+        """
+        if not self.pool:
+            return False
+        batch, self.pool = self.pool[:EXPECTED_COUNT], self.pool[EXPECTED_COUNT:]
+        self.candidates = [name for name, _ in batch]
+        self.session_id = batch[0][1]
+        return True
+
+    def pool_low(self) -> bool:
+        return len(self.pool) <= POOL_REFILL_AT
+
+    def switch_style(self, style: str, names: list[str], session_id: Optional[SessionRef]) -> None:
+        """Show ``style``'s names instead; the old style's pool and refill no longer apply.
+
+        The names on screen are kept as a finished alternate, so switching
+        back is just as quick.
+        """
+        shown: Future = Future()
+        shown.set_result(Alternate(self.candidates, session_id=self.session_id))
+        self.alternates[self.style] = shown
+        del self.alternates[style]
+        self.style = style
+        if self.refill is not None:
+            self.refill.cancel()
+            self.refill = None
+        self.pool = []
+        self.set_candidates(names)
+        self.session_id = session_id
+
+    def cancel_background(self) -> int:
+        """Cancel the refill and style generations that haven't started; return how many were cancelled.
+
+        Requests already in flight run to completion and are logged; style
+        generations the visitor never switched to are logged as alternates.
+        """
+        cancelled = 0
+        for future in self.alternates.values():
+            if future.cancel():
+                cancelled += 1
+            else:
+                future.add_done_callback(_log_unseen)
+        if self.refill is not None:
+            cancelled += self.refill.cancel()
+        self.alternates = {}
+        self.refill = None
+        return cancelled
@@ -4,29 +4,55 @@ import json
 import logging
 import os
 import random
+import select
 import sys
 import termios
+import threading
 import tty
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum, auto
-from typing import Optional
+from typing import Optional, Union
 
 log = logging.getLogger(__name__)
 
-from session_logging import SessionLogger
+from session_logging import SessionLogger, SessionRef, SessionWriter
 
 import pyfiglet
 from prompt_toolkit import prompt as pt_prompt
 from rich.align import Align
-from rich.console import Console
+from rich.console import Console, Group
+from rich.style import Style
 from rich.syntax import Syntax
 from rich.text import Text
 
-from llm.prompt import build_prompt
+from llm.parse import EXPECTED_COUNT, ResponseParseError, parse_nicknames
+from llm.prompt import build_prompt, estimate_tokens
+from llm.ratelimit import waiting_callback
 from data.questions import QUESTIONS, REAL_NAME_QUESTION
 from data.styles import DEFAULT_STYLE, STYLES
-from llm import get_client, FallbackClient, LLMError
+from llm import get_client, FallbackClient, GenerationResult, LLMClient, LLMError
+from telemetry import REGISTRY, MemoryWatchdog, RecycleProcess, set_log_session, span
 from ui.feedback import ask_feedback
+from ui.frame import (
+    FrameRenderer,
+    OutputMode,
+    bandwidth_budget_kbps,
+    choose_output_mode,
+    color_system_rank,
+    estimate_bytes,
+)
+from ui.question_selector import QuestionSelector
 from ui.questionnaire import ask_questions
+from ui.session import (
+    CANDIDATE_POOL_SIZE,
+    Alternate,
+    MULTI_STYLE,
+    STYLE_CONCURRENCY,
+    IdleTimeout,
+    VisitorSession,
+    arm_idle_timeout,
+    idle_timeout_seconds,
+)
 from ui.theme import (
     FIGLET_FONT_TITLE,
     GRADIENT_FIRE,
@@ -38,10 +64,15 @@ from ui.theme import (
     STYLE_KEY_DESC,
     STYLE_KEY_NAME,
     gradient_color_at,
+    gradient_bands,
     make_gradient_text,
+    set_gradient_bands,
     styled_rule,
 )
 
+REGISTRY.describe("handlebar_visits_rendered_total", "Visits by output mode.")
+REGISTRY.describe("handlebar_visit_render_bytes_total", "Bytes written to the terminal per output mode, summed over visits.")
+
 def truthy_env_var(var_name: str, default: str = "0") -> bool:
     return os.environ.get(var_name, default).lower() in ("1", "true", "yes")
 
@@ -63,27 +94,122 @@ class Terminal:
     def __init__(
         self,
         prefill_answers: Optional[dict[str, str]] = None,
-        logger: Optional[SessionLogger] = None,
+        logger: Optional[SessionLogger | SessionWriter] = None,
+        memory: Optional[MemoryWatchdog] = None,
     ):
         self.console = Console()
+        # Output modes never go richer than what the terminal was detected as.
+        self._native_color_system = self.console.color_system
         self.state = State.START
-        self.style = DEFAULT_STYLE
-        self.qa_transcript: list[dict] = []
-        self.avoid_list: list[str] = []
-        self.candidates: list[str] = []
-        self.current_session_id: Optional[int] = None
         self.prefill_answers = prefill_answers
         self.logger = logger
+        self.memory = memory
         max_q = os.environ.get("MAX_QUESTIONS")
         total = 1 + len(QUESTIONS)  # real_name + pool
-        self.num_questions = min(int(max_q), total) if max_q else total
+        self.max_questions = min(int(max_q), total) if max_q else total
+        self.session = VisitorSession(self.max_questions)
+        self.question_selector: Optional[QuestionSelector] = None
+        # Created on first use and kept, so connections and tier state persist.
+        self.client: Optional[LLMClient] = None
+        self._frames: Optional[FrameRenderer] = None
+        self._measured_kbps: Optional[float] = None
+        # Renderer counters when the current visit started.
+        self._visit_mark: Optional[tuple[FrameRenderer, int, int]] = None
+        # Set when the names on screen are replaced in place (pooled reroll).
+        self._redraw_display = False
+        # Shown once under the names on the next display screen.
+        self._display_notice: Optional[Text] = None
+        # Refills the candidate pool while the visitor reads their names.
+        self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="candidate-pool")
+        # Generates the other styles in multi-style mode; its size is the concurrency limit.
+        self._styles = ThreadPoolExecutor(max_workers=STYLE_CONCURRENCY, thread_name_prefix="style-generation")
+        if logger is not None and truthy_env_var("ADAPTIVE_QUESTIONS", default="1"):
+            # Reads the rollups as the last idle maintenance pass left them;
+            # refreshing here would scan new sessions on the UI thread.
+            self.question_selector = QuestionSelector(
+                logger.question_stats,
+                exploration=float(os.environ.get("ADAPTIVE_EXPLORATION", "0.1")),
+            )
+
+    @property
+    def frames(self) -> FrameRenderer:
+        """Frame renderer for the current console (rebuilt if the console is swapped)."""
+        if self._frames is None or self._frames.console is not self.console:
+            self._frames = FrameRenderer(self.console)
+        return self._frames
+
+    def new_session(self) -> None:
+        """Throw away the previous visitor's state and start fresh."""
+        self._cancel_background()
+        self._report_visit_bandwidth()
+        self._apply_output_mode()
+        self.session = VisitorSession(self.max_questions)
+        self._visit_mark = (self.frames, self.frames.bytes_written, self.frames.writes)
+
+    def _cancel_background(self) -> None:
+        cancelled = self.session.cancel_background()
+        if cancelled:
+            log.info("[%s] Cancelled %d queued background generations", self.session.session_id or "N/A", cancelled)
+
+    def _output_mode(self) -> OutputMode:
+        return OutputMode(self.console.color_system or "", gradient_bands())
+
+    def _report_visit_bandwidth(self) -> None:
+        """Log and count what the visit that just ended sent to the terminal."""
+        if self._visit_mark is None:
+            return
+        frames, start_bytes, start_writes = self._visit_mark
+        sent = frames.bytes_written - start_bytes
+        writes = frames.writes - start_writes
+        if not writes:
+            return
+        mode = self._output_mode()
+        labels = {"color_system": mode.color_system, "bands": str(mode.bands)}
+        REGISTRY.inc("handlebar_visits_rendered_total", labels)
+        REGISTRY.inc("handlebar_visit_render_bytes_total", labels, sent)
+        log.info(
+            "Visit sent %d bytes in %d writes (session %s, %s/%d bands)",
+            sent, writes, self.session.session_id, mode.color_system, mode.bands,
+        )
+
+    def _apply_output_mode(self) -> None:
+        """Pick colors and gradient banding for the next visitor from the bandwidth budget."""
+        if self._native_color_system is None:
+            return  # not a color terminal; nothing to trade
+        measured = self.frames.measured_kbps()
+        if measured is not None:
+            self._measured_kbps = measured
+        budget = bandwidth_budget_kbps() or self._measured_kbps
+        mode = choose_output_mode(
+            lambda m: estimate_bytes(self.console, self._start_screen(m.bands), m.color_system), budget
+        )
+        if color_system_rank(mode.color_system) > color_system_rank(self._native_color_system):
+            mode = mode._replace(color_system=self._native_color_system)
+        if mode == self._output_mode():
+            return
+        log.info("Output mode: %s colors, %d gradient bands (budget %s kbps)", mode.color_system, mode.bands, budget)
+        set_gradient_bands(mode.bands)
+        if mode.color_system != self.console.color_system:
+            # Parsed styles keep the escape codes of the first color system
+            # they were rendered in; drop them so the new console re-renders.
+            Style.parse.cache_clear()
+            self.console = Console(color_system=mode.color_system)
 
     def _read_key(self) -> str:
-        """Read a single keypress without waiting for Enter."""
+        """Read a single keypress without waiting for Enter.
+
+        Raises IdleTimeout if nothing is pressed within the idle timeout.
+        """
+        if not sys.stdin.isatty():
+            # Headless (pipe input): one line per keypress.
+            return pt_prompt("", pre_run=arm_idle_timeout)[:1]
         fd = sys.stdin.fileno()
         old_settings = termios.tcgetattr(fd)
+        timeout = idle_timeout_seconds()
         try:
             tty.setraw(fd)
+            if timeout > 0 and not select.select([fd], [], [], timeout)[0]:
+                raise IdleTimeout()
             ch = sys.stdin.read(1)
         finally:
             termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
@@ -91,96 +217,119 @@ class Terminal:
 
     def show_start_screen(self):
         """Display the start screen."""
-        self.console.clear()
-        self.console.print()
+        self.new_session()
+        if self.memory is not None:
+            # Between visitors: the last visit's state has just been dropped.
+            record = self.memory.checkpoint()
+            if self.memory.over_ceiling(record):
+                raise RecycleProcess(f"RSS {record['rss_mb']}MB over MAX_RSS_MB={self.memory.max_rss_mb:g}")
+        with self.frames.frame("start", clear=True):
+            self._render_start_screen()
+        if self.logger:
+            # The booth is idle until someone presses Enter.
+            self.logger.idle_maintenance()
+        pt_prompt("")
+        self.state = State.STYLE_SELECT
 
+    def _render_start_screen(self):
+        self.console.print(self._start_screen())
+
+    def _start_screen(self, bands: Optional[int] = None) -> Group:
+        """The start screen; also used to size output modes, hence ``bands``."""
         # Render ASCII art title
         title_art = pyfiglet.figlet_format("H A N D L E B A R", font=FIGLET_FONT_TITLE, width=200)
 
-        self.console.print(styled_rule())
-        self.console.print()
-        self.console.print(Align.center(make_gradient_text(title_art.rstrip("\n"), GRADIENT_SUNSET, bold=True)))
-        self.console.print()
-        self.console.print(Align.center(make_gradient_text("~ get your playa name ~", GRADIENT_NEON)))
-        self.console.print()
-        self.console.print(styled_rule())
-        self.console.print()
-
-        self.console.print(Align.center(Text(f"Welcome! We'll ask you {self.num_questions} quick questions, then propose a new playa name.", style=STYLE_DIM)))
-        self.console.print(Align.center(Text("Skip any question by pressing ENTER.", style=STYLE_DIM)))
-        self.console.print()
-
-        self.console.print(Align.center(Text("press ENTER to begin", style=STYLE_DIM)))
-        self.console.print()
-        pt_prompt("")
-        self.state = State.STYLE_SELECT
+        return Group(
+            "",
+            styled_rule(),
+            "",
+            Align.center(make_gradient_text(title_art.rstrip("\n"), GRADIENT_SUNSET, bold=True, bands=bands)),
+            "",
+            Align.center(make_gradient_text("~ get your playa name ~", GRADIENT_NEON, bands=bands)),
+            "",
+            styled_rule(),
+            "",
+            Align.center(Text(f"Welcome! We'll ask you {self.max_questions} quick questions, then propose a new playa name.", style=STYLE_DIM)),
+            Align.center(Text("Skip any question by pressing ENTER.", style=STYLE_DIM)),
+            "",
+            Align.center(Text("press ENTER to begin", style=STYLE_DIM)),
+            "",
+        )
 
     def show_style_selector(self):
         """Display style selection options."""
-        self.console.print()
-        self.console.print(styled_rule("choose your vibe"))
-        self.console.print()
+        with self.frames.frame("style_select"):
+            self.console.print()
+            self.console.print(styled_rule("choose your vibe"))
+            self.console.print()
 
-        for key, style in STYLES.items():
-            line = Text()
-            line.append("  [", style=STYLE_KEY_BRACKET)
-            line.append(key, style=STYLE_KEY_BRACKET)
-            line.append("] ", style=STYLE_KEY_BRACKET)
-            line.append(style["name"].title(), style=STYLE_KEY_NAME)
-            line.append(f" - {style['description']}", style=STYLE_KEY_DESC)
-            self.console.print(line)
+            for key, style in STYLES.items():
+                line = Text()
+                line.append("  [", style=STYLE_KEY_BRACKET)
+                line.append(key, style=STYLE_KEY_BRACKET)
+                line.append("] ", style=STYLE_KEY_BRACKET)
+                line.append(style["name"].title(), style=STYLE_KEY_NAME)
+                line.append(f" - {style['description']}", style=STYLE_KEY_DESC)
+                self.console.print(line)
 
-        self.console.print()
-        self.console.print(Align.center(Text("type one letter to pick your style and press enter", style=STYLE_DIM)))
-        self.console.print()
-        self.console.print(styled_rule())
-        self.console.print()
+            self.console.print()
+            self.console.print(Align.center(Text("type one letter to pick your style and press enter", style=STYLE_DIM)))
+            self.console.print()
+            self.console.print(styled_rule())
+            self.console.print()
         while True:
-            choice = pt_prompt(f"Style [{DEFAULT_STYLE}]: ") or DEFAULT_STYLE
+            choice = pt_prompt(f"Style [{DEFAULT_STYLE}]: ", pre_run=arm_idle_timeout) or DEFAULT_STYLE
             if choice in STYLES:
                 break
             self.console.print(Text(f"Invalid choice. Use: {', '.join(STYLES.keys())}", style=STYLE_ERROR))
-        self.style = choice
+        self.session.style = choice
         self.state = State.QUESTIONNAIRE
 
     def run_questionnaire(self):
         """Run the questionnaire flow."""
         # Check if ASK_NUM_QUESTIONS is truthy, default to true.
         if truthy_env_var("ASK_NUM_QUESTIONS", default="1"):
-            max_q = self.num_questions
-            self.console.print()
-            self.console.print(Text(f"How many questions would you like to answer? (1-{max_q})", style=STYLE_DIM))
+            max_q = self.max_questions
+            with self.frames.frame("num_questions"):
+                self.console.print()
+                self.console.print(Text(f"How many questions would you like to answer? (1-{max_q})", style=STYLE_DIM))
             while True:
-                answer = pt_prompt(f"Number of questions [{max_q}]: ") or str(max_q)
+                answer = pt_prompt(f"Number of questions [{max_q}]: ", pre_run=arm_idle_timeout) or str(max_q)
                 try:
                     n = int(answer)
-                    self.num_questions = max(1, min(n, max_q))
+                    self.session.num_questions = max(1, min(n, max_q))
                     break
                 except ValueError:
                     self.console.print(Text(f"Please enter a number between 1 and {max_q}.", style=STYLE_ERROR))
 
         pool = list(QUESTIONS)
+        n = self.session.num_questions - 1
         if truthy_env_var("RANDOMIZE_QUESTIONS", default="1"):
-            random.shuffle(pool)
-        pool = pool[: self.num_questions - 1]
-        self.questions_asked = [REAL_NAME_QUESTION] + pool
-        self.qa_transcript = ask_questions(
-            self.console, self.questions_asked, prefill_answers=self.prefill_answers
-        )
+            if self.question_selector is not None:
+                pool = self.question_selector.select(pool, n)
+            else:
+                random.shuffle(pool)
+        pool = pool[:n]
+        self.session.questions_asked = [REAL_NAME_QUESTION] + pool
+        self.session.set_transcript(ask_questions(
+            self.console, self.session.questions_asked, prefill_answers=self.prefill_answers, frames=self.frames
+        ))
         self.state = State.GENERATING
 
     def show_generating(self):
         """Show generating state and call LLM."""
-        self.console.print()
+        with span("generate_names", style=self.session.style):
+            self._generate()
 
-        # Build prompt
-        prompt_messages = build_prompt(
-            self.qa_transcript, self.style, self.avoid_list or None
-        )
+        if self.session.candidates:
+            self.state = State.DISPLAY
+        else:
+            self.console.print()
+            pt_prompt("Press Enter to continue: ", pre_run=arm_idle_timeout)
+            self.state = State.START
 
-        # Try to call LLM
-        try:
-            client = get_client()
+    def _print_generating_banner(self) -> None:
+        with self.frames.frame("generating"):
             self.console.print(styled_rule("conjuring your name from the dust"))
             self.console.print()
             self.console.print(
@@ -188,96 +337,324 @@ class Terminal:
             )
             self.console.print()
 
+    def _show_fallback(self) -> None:
+        # Background pool refills fall back silently.
+        if threading.current_thread() is threading.main_thread():
+            self.console.print(Align.center(Text("OFFLINE FALLBACK", style="bold red")))
+
+    def _generate(self):
+        session = self.session
+        self.console.print()
+
+        if CANDIDATE_POOL_SIZE and session.refill is not None:
+            # A refill is already in flight; wait for it rather than ask twice.
+            self._print_generating_banner()
+            with span("wait_refill"):
+                self._merge_refill(wait=True)
+            if session.draw():
+                self._start_refill_if_low()
+                return
+
+        # Build prompt
+        prompt_messages = build_prompt(
+            session.qa_transcript,
+            session.style,
+            session.seen_names() or None,
+            variant=session.prompt_variant,
+            count=CANDIDATE_POOL_SIZE or EXPECTED_COUNT,
+        )
+
+        # Try to call LLM
+        try:
+            if self.client is None:
+                self.client = get_client()
+            client = self.client
+            self._print_generating_banner()
+            if MULTI_STYLE and not session.alternates and not session.rerolls:
+                self._start_alternates()
+
             if isinstance(client, FallbackClient):
-                client.on_fallback = lambda: self.console.print(
-                    Align.center(Text("OFFLINE FALLBACK", style="bold red"))
-                )
+                client.on_fallback = self._show_fallback
 
-            response = client.generate(prompt_messages)
+            queue_shown: list[int] = []
+
+            def show_queued(ahead: int, wait_seconds: float) -> None:
+                # Once per queue position, not on every poll.
+                if queue_shown and queue_shown[-1] == ahead:
+                    return
+                queue_shown.append(ahead)
+                if ahead:
+                    message = f"{ahead} visitor{'s' if ahead > 1 else ''} ahead of you..."
+                else:
+                    message = f"You're next! (about {max(wait_seconds, 1):.0f}s)"
+                self.console.print(Align.center(Text(message, style=STYLE_KEY_DESC)))
+
+            with waiting_callback(show_queued):
+                result = client.generate(prompt_messages)
+            response = result.text
 
-            # Try to pretty-print JSON response
             try:
-                response_obj = json.loads(response)
-
-                nicknames = response_obj.get("nicknames", [])
-                self.candidates = nicknames
-
-                if not nicknames:
-                    # Debug JSON output
-                    response_json = json.dumps(response_obj, indent=2)
-                    self.console.print(Text("debug: raw LLM response", style=STYLE_DIM))
-                    self.console.print(Syntax(response_json, "json", theme="monokai", word_wrap=True))
-
-                if self.logger:
-                    logged_transcript = [
-                        {"question_id": qa["question_id"], "answer": qa["answer"]}
-                        for qa in self.qa_transcript
-                    ]
-
-                    self.current_session_id = self.logger.log_session(
-                        style=self.style,
-                        qa_transcript=logged_transcript,
-                        nicknames=nicknames,
-                        llm_response_raw=response,
-                    )
-                    if self.current_session_id is None:
-                        log.error("log_session returned None — session was NOT saved")
-                    else:
-                        log.info("Session logged with id=%s", self.current_session_id)
-            except json.JSONDecodeError:
+                with span("parse_response"):
+                    nicknames = parse_nicknames(response)
+            except ResponseParseError as e:
+                log.warning("Unusable LLM response (variant=%s): %s", session.prompt_variant, e)
                 self.console.print(response)
+                session.session_id = self._log_generation(session, prompt_messages, result, [], parse_error=True)
+                return
+
+            session_id = self._log_generation(session, prompt_messages, result, nicknames, parse_error=False)
+            if CANDIDATE_POOL_SIZE:
+                session.add_to_pool(nicknames, session_id)
+                session.draw()
+                self._start_refill_if_low()
+            else:
+                session.set_candidates(nicknames)
+                session.session_id = session_id
+
+            if not session.candidates:
+                # Debug JSON output
+                self.console.print(Text("debug: raw LLM response", style=STYLE_DIM))
+                self.console.print(Syntax(response, "json", theme="monokai", word_wrap=True))
 
         except LLMError as e:
             # No API key or API error - show prompt instead
-            self.console.print(styled_rule("conjuring your name from the dust"))
-            self.console.print()
-            self.console.print(
-                Align.center(make_gradient_text("Generating your playa names...", GRADIENT_FIRE, bold=True))
+            self._print_generating_banner()
+            with self.frames.frame("prompt_preview"):
+                self.console.print(Text(str(e), style=STYLE_DIM))
+                self.console.print()
+                self.console.print(Text("Prompt that would be sent to LLM:", style="bold white"))
+                self.console.print()
+
+                for msg in prompt_messages:
+                    self.console.print(Text(msg["role"].upper() + ":", style=STYLE_KEY_BRACKET))
+                    try:
+                        content_obj = json.loads(msg["content"])
+                        content_json = json.dumps(content_obj, indent=2)
+                        self.console.print(Syntax(content_json, "json", theme="monokai", word_wrap=True))
+                    except (json.JSONDecodeError, TypeError):
+                        self.console.print(msg["content"])
+                    self.console.print()
+
+    def _start_refill_if_low(self) -> None:
+        """Request another pool-sized batch in the background if the pool is running low."""
+        session = self.session
+        if session.refill is not None or not session.pool_low() or self.client is None:
+            return
+        prompt_messages = build_prompt(
+            session.qa_transcript,
+            session.style,
+            session.seen_names() or None,
+            variant=session.prompt_variant,
+            count=CANDIDATE_POOL_SIZE,
+        )
+        session.refill = self._background.submit(
+            self._generate_in_background, "refill_pool", session, session.style, prompt_messages
+        )
+
+    def _start_alternates(self) -> None:
+        """Queue a generation for every style other than the visitor's (multi-style mode)."""
+        session = self.session
+        for key in STYLES:
+            if key == session.style:
+                continue
+            prompt_messages = build_prompt(
+                session.qa_transcript, key, variant=session.prompt_variant, count=EXPECTED_COUNT
+            )
+            session.alternates[key] = self._styles.submit(
+                self._generate_in_background, "generate_alternate", session, key, prompt_messages, defer_log=True
             )
-            self.console.print()
-            self.console.print(Text(str(e), style=STYLE_DIM))
-            self.console.print()
-            self.console.print(Text("Prompt that would be sent to LLM:", style="bold white"))
-            self.console.print()
 
-            for msg in prompt_messages:
-                self.console.print(Text(msg["role"].upper() + ":", style=STYLE_KEY_BRACKET))
-                try:
-                    content_obj = json.loads(msg["content"])
-                    content_json = json.dumps(content_obj, indent=2)
-                    self.console.print(Syntax(content_json, "json", theme="monokai", word_wrap=True))
-                except (json.JSONDecodeError, TypeError):
-                    self.console.print(msg["content"])
-                self.console.print()
+    def _generate_in_background(
+        self,
+        name: str,
+        session: VisitorSession,
+        style: str,
+        prompt_messages: list[dict],
+        defer_log: bool = False,
+    ) -> Union[tuple[list[str], Optional[SessionRef]], Alternate]:
+        """Runs on a background executor; returns the new names and their logged session id.
+
+        With ``defer_log`` (style alternates) it returns an Alternate instead,
+        logged once it is known whether the visitor saw it. Shares
+        ``self.client`` (and so its connection pool and rate limits) with the
+        foreground generation.
+        """
+        try:
+            with span(name, style=style):
+                result = self.client.generate(prompt_messages)
+        except LLMError as e:
+            log.warning("Background generation %s (style %s) failed: %s", name, style, e)
+            return Alternate([]) if defer_log else ([], None)
+        try:
+            nicknames = parse_nicknames(result.text)
+            parse_error = False
+        except ResponseParseError as e:
+            log.warning("Unusable %s response (variant=%s): %s", name, session.prompt_variant, e)
+            nicknames, parse_error = [], True
+
+        def log_generation(alternate: bool = False) -> Optional[SessionRef]:
+            return self._log_generation(
+                session, prompt_messages, result, nicknames, parse_error=parse_error, style=style, alternate=alternate
+            )
 
-        if self.candidates:
-            self.state = State.DISPLAY
+        if defer_log:
+            return Alternate(nicknames, log_generation)
+        return nicknames, log_generation()
+
+    def _merge_refill(self, wait: bool) -> None:
+        """Add a finished (or, with ``wait``, the pending) refill to the pool."""
+        session = self.session
+        future = session.refill
+        if future is None or not (wait or future.done()):
+            return
+        session.refill = None
+        try:
+            names, session_id = future.result()
+        except Exception:
+            log.exception("Candidate pool refill crashed")
+            return
+        session.add_to_pool(names, session_id)
+
+    def _log_generation(
+        self,
+        session: VisitorSession,
+        prompt_messages: list[dict],
+        result: GenerationResult,
+        nicknames: list[str],
+        parse_error: bool,
+        style: Optional[str] = None,
+        alternate: bool = False,
+    ) -> Optional[SessionRef]:
+        """Log one LLM call for ``session`` (in ``style``, default the session's); returns the new session_id.
+
+        ``alternate`` marks a multi-style generation the visitor never saw.
+        Returns None if the call was not logged.
+        """
+        if not self.logger:
+            return None
+        logged_transcript = [
+            {"question_id": qa["question_id"], "answer": qa["answer"]}
+            for qa in session.qa_transcript
+        ]
+        metadata = result.metadata()
+        # Estimate tokens for providers that report no usage.
+        if metadata["input_tokens"] is None:
+            metadata["input_tokens"] = sum(estimate_tokens(m["content"]) for m in prompt_messages)
+        if metadata["output_tokens"] is None:
+            metadata["output_tokens"] = estimate_tokens(result.text)
+        session_id = self.logger.log_session(
+            style=style or session.style,
+            qa_transcript=logged_transcript,
+            nicknames=nicknames,
+            llm_response_raw=result.text,
+            prompt_variant=session.prompt_variant,
+            reroll_index=session.rerolls,
+            visit_id=session.visit_id,
+            alternate=alternate,
+            parse_error=parse_error,
+            **metadata,
+        )
+        if session_id is None:
+            log.error("log_session returned None — session was NOT saved")
         else:
-            self.console.print()
-            pt_prompt("Press Enter to continue: ")
-            self.state = State.START
+            log.info("Session logged with id=%s", session_id)
+        return session_id
 
     def show_display(self):
         """Display generated names and offer reroll or continue."""
-        self.console.print(styled_rule("your playa names"))
-        self.console.print()
-        for i, name in enumerate(self.candidates):
-            t = i / max(len(self.candidates) - 1, 1)
-            r, g, b = gradient_color_at(GRADIENT_NEON, t)
-            self.console.print(Align.center(Text(name, style=f"bold rgb({r},{g},{b})")))
-        self.console.print()
+        candidates = self.session.candidates
+        if self._redraw_display:
+            # Only the names changed since the last screen; rewrite just those lines.
+            screen = self.frames.redraw("display")
+        else:
+            screen = self.frames.frame("display", clear=True)
+        self._redraw_display = False
+        with screen:
+            self.console.print(styled_rule("your playa names"))
+            self.console.print()
+            for i, name in enumerate(candidates):
+                t = i / max(len(candidates) - 1, 1)
+                r, g, b = gradient_color_at(GRADIENT_NEON, t)
+                self.console.print(Align.center(Text(name, style=f"bold rgb({r},{g},{b})")))
+            self.console.print()
 
-        self.console.print(Align.center(Text("press ENTER to continue, or 'r' to reroll", style=STYLE_DIM)))
-        self.console.print()
+            if self.session.alternates:
+                hint = "press ENTER to continue, 'r' to reroll, or a style key to switch"
+            else:
+                hint = "press ENTER to continue, or 'r' to reroll"
+            self.console.print(Align.center(Text(hint, style=STYLE_DIM)))
+            if self.session.alternates:
+                self.console.print(Align.center(self._style_switcher()))
+            if self._display_notice is not None:
+                self.console.print(Align.center(self._display_notice))
+                self._display_notice = None
+            self.console.print()
         choice = self._read_key().lower()
 
+        if choice in self.session.alternates:
+            self._switch_style(choice)
+            return
+
         if choice == "r":
-            self.avoid_list.extend(self.candidates)
-            self.candidates = []
+            self.session.reroll()
+            if CANDIDATE_POOL_SIZE:
+                self._merge_refill(wait=False)
+                if self.session.draw():
+                    # Served from the pool: no round trip.
+                    self._start_refill_if_low()
+                    self._redraw_display = True
+                    return
             self.state = State.GENERATING
         else:
+            # The visitor has picked; drop the styles nobody will look at.
+            self._cancel_background()
             self.state = State.FEEDBACK
 
+    def _style_switcher(self) -> Text:
+        """One-key style menu for the display screen; styles still generating are dimmed."""
+        line = Text()
+        for key, style in STYLES.items():
+            if key == self.session.style:
+                line.append(f" [{key}] {style['name']} ", style=f"reverse {STYLE_KEY_NAME}")
+            elif self.session.alternates[key].done():
+                line.append(f" [{key}] ", style=STYLE_KEY_BRACKET)
+                line.append(f"{style['name']} ", style=STYLE_KEY_NAME)
+            else:
+                line.append(f" [{key}] {style['name']}... ", style=STYLE_DIM)
+        return line
+
+    def _switch_style(self, key: str) -> None:
+        """Show the names generated for style ``key``, waiting for them if necessary."""
+        session = self.session
+        future = session.alternates[key]
+        ready = future.done()
+        if not ready:
+            with self.frames.frame("style_wait"):
+                self.console.print()
+                self.console.print(
+                    Align.center(make_gradient_text(f"Conjuring {STYLES[key]['name']} names...", GRADIENT_FIRE, bold=True))
+                )
+        try:
+            with span("switch_style", style=key, waited=not ready):
+                alternate = future.result()
+        except Exception:
+            log.exception("Style generation crashed")
+            alternate = Alternate([])
+        names = alternate.names
+        # Unless we had to wait, nothing was printed since the names screen:
+        # update it in place.
+        self._redraw_display = ready
+        if not names:
+            alternate.log(shown=False)
+            del session.alternates[key]
+            self._display_notice = Text(f"No {STYLES[key]['name']} names this time.", style=STYLE_ERROR)
+            return
+        session_id = alternate.log(shown=True)
+        session.switch_style(key, names, session_id)
+        log.info("[%s] Switched style to %s", session_id or "N/A", key)
+        if CANDIDATE_POOL_SIZE:
+            self._start_refill_if_low()
+
     def show_feedback(self):
         """Show optional feedback form after nickname generation."""
         if not truthy_env_var("ASK_FEEDBACK"):
@@ -286,18 +663,45 @@ class Terminal:
 
         feedback_data = ask_feedback(
             self.console,
-            nicknames=self.candidates,
-            questions_asked=getattr(self, "questions_asked", None),
+            nicknames=self.session.candidates,
+            questions_asked=self.session.questions_asked,
+            frames=self.frames,
         )
 
-        if feedback_data is not None and self.logger and self.current_session_id:
+        if feedback_data is not None and self.logger and self.session.session_id:
             self.logger.log_feedback(
-                session_id=self.current_session_id,
+                session_id=self.session.session_id,
                 **feedback_data,
             )
 
         self.state = State.START
 
+    def step(self) -> None:
+        """Run the handler for the current state once."""
+        set_log_session(self.session.session_id)
+        log.info("[%s] State starting: %s", self.session.session_id or "N/A", self.state.name)
+        state = self.state
+        try:
+            if state == State.START:
+                self.show_start_screen()
+            elif state == State.STYLE_SELECT:
+                self.show_style_selector()
+            elif state == State.QUESTIONNAIRE:
+                self.run_questionnaire()
+            elif state == State.GENERATING:
+                self.show_generating()
+            elif state == State.DISPLAY:
+                self.show_display()
+            elif state == State.FEEDBACK:
+                self.show_feedback()
+            else:
+                self.state = State.START
+        except IdleTimeout:
+            log.info("[%s] Idle timeout in %s, resetting session", self.session.session_id or "N/A", state.name)
+            self.state = State.START
+        set_log_session(self.session.session_id)
+        log.info("[%s] State finished: %s", self.session.session_id or "N/A", state.name)
+
     def run(self):
         """Main application loop."""
         # Skip to questionnaire if prefill answers provided
@@ -306,23 +710,7 @@ class Terminal:
 
         try:
             while True:
-                log.info("[%s] State starting: %s", self.current_session_id or "N/A", self.state.name)
-                state = self.state
-                if state == State.START:
-                    self.show_start_screen()
-                elif state == State.STYLE_SELECT:
-                    self.show_style_selector()
-                elif state == State.QUESTIONNAIRE:
-                    self.run_questionnaire()
-                elif state == State.GENERATING:
-                    self.show_generating()
-                elif state == State.DISPLAY:
-                    self.show_display()
-                elif state == State.FEEDBACK:
-                    self.show_feedback()
-                else:
-                    state = State.START
-                log.info("[%s] State finished: %s", self.current_session_id or "N/A", state.name)
+                self.step()
         except KeyboardInterrupt:
             log.info("Interrupted by user")
             self.console.print()
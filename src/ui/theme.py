@@ -4,6 +4,9 @@ Desert sunset palette with neon playa accents, gradient utilities,
 and pyfiglet configuration for the terminal UI.
 """
 
+import os
+from typing import Optional
+
 from rich.rule import Rule
 from rich.text import Text
 
@@ -77,6 +80,26 @@ FIGLET_FONT_TITLE = "slant"
 FIGLET_FONT_TITLE_NARROW = "small_slant"
 FIGLET_FONT_NICKNAME = "big"
 
+# ---------------------------------------------------------------------------
+# Gradient banding
+# ---------------------------------------------------------------------------
+
+# 0 gives every visible character its own color (one escape sequence each);
+# N > 0 snaps gradients to N colors and styles each same-color run once.
+# Terminal adjusts this per visitor to fit the bandwidth budget.
+_gradient_bands = int(os.environ.get("GRADIENT_BANDS", "0"))
+
+
+def gradient_bands() -> int:
+    """Number of color bands gradients are currently quantized to (0 = smooth)."""
+    return _gradient_bands
+
+
+def set_gradient_bands(bands: int) -> None:
+    """Set the default banding used by make_gradient_text()."""
+    global _gradient_bands
+    _gradient_bands = max(0, bands)
+
 # ---------------------------------------------------------------------------
 # Utility functions
 # ---------------------------------------------------------------------------
@@ -105,17 +128,31 @@ def gradient_color_at(gradient: list[tuple[int, int, int]], t: float) -> tuple[i
     return _lerp_color(gradient[idx], gradient[idx + 1], frac)
 
 
+def _quantize(t: float, bands: int) -> float:
+    """Snap gradient position *t* to the nearest of *bands* evenly spaced stops."""
+    if bands < 2:
+        return 0.0
+    return round(t * (bands - 1)) / (bands - 1)
+
+
 def make_gradient_text(
     text: str,
     gradient: list[tuple[int, int, int]],
     bold: bool = False,
+    bands: Optional[int] = None,
 ) -> Text:
     """Apply per-character RGB gradient across *text*.
 
     Works with multi-line strings (e.g. pyfiglet output) by treating
     only visible characters for position calculation while preserving
     newlines and spaces.
+
+    With *bands* (default: gradient_bands()) the gradient is reduced to
+    that many colors and each run of same-colored characters, including
+    the spaces inside it, becomes a single span.
     """
+    if bands is None:
+        bands = _gradient_bands
     result = Text()
     # Collect all visible (non-whitespace) character positions
     visible_chars: list[tuple[int, str]] = []
@@ -135,19 +172,47 @@ def make_gradient_text(
     for vi, (ci, _) in enumerate(visible_chars):
         vis_positions[ci] = vi / max(total_visible - 1, 1)
 
+    if bands > 0:
+        return _banded_text(all_chars, vis_positions, gradient, bold, bands)
+
     for i, ch in enumerate(all_chars):
         if i in vis_positions:
-            r, g, b = gradient_color_at(gradient, vis_positions[i])
-            style = f"rgb({r},{g},{b})"
-            if bold:
-                style = f"bold {style}"
-            result.append(ch, style=style)
+            result.append(ch, style=_gradient_style(gradient, vis_positions[i], bold))
         else:
             result.append(ch)
 
     return result
 
 
+def _gradient_style(gradient: list[tuple[int, int, int]], t: float, bold: bool) -> str:
+    r, g, b = gradient_color_at(gradient, t)
+    style = f"rgb({r},{g},{b})"
+    return f"bold {style}" if bold else style
+
+
+def _banded_text(
+    chars: list[str],
+    vis_positions: dict[int, float],
+    gradient: list[tuple[int, int, int]],
+    bold: bool,
+    bands: int,
+) -> Text:
+    """Build gradient text with one span per run of same-colored characters."""
+    result = Text()
+    run: list[str] = []
+    run_style: Optional[str] = None
+    for i, ch in enumerate(chars):
+        if i in vis_positions:
+            style = _gradient_style(gradient, _quantize(vis_positions[i], bands), bold)
+            if style != run_style:
+                if run:
+                    result.append("".join(run), style=run_style)
+                run, run_style = [], style
+        run.append(ch)
+    result.append("".join(run), style=run_style)
+    return result
+
+
 def styled_rule(title: str = "") -> Rule:
     """Return a ``~``-character Rule in orange (desert heat shimmer)."""
     return Rule(title=title, characters="~", style=DEEP_ORANGE)
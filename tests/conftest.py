@@ -0,0 +1,12 @@
+"""Shared fixtures."""
+
+import pytest
+
+import llm
+
+
+@pytest.fixture(autouse=True)
+def isolated_rate_limiter(tmp_path, monkeypatch):
+    """Keep the host-wide rate limiter's database out of the repo's logs/ directory."""
+    monkeypatch.setenv("RATE_LIMIT_DB", str(tmp_path / "ratelimit.db"))
+    monkeypatch.setattr(llm, "_rate_limiter", None)
@@ -0,0 +1,95 @@
+"""Tests for frame-buffered rendering."""
+
+import io
+
+from rich.console import Console
+
+from ui.frame import CLEAR_SCREEN, OUTPUT_MODES, FrameRenderer, choose_output_mode, diff_frame, estimate_bytes
+from ui.theme import GRADIENT_NEON, make_gradient_text
+
+
+class _CountingFile(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.write_calls = 0
+
+    def write(self, s):
+        self.write_calls += 1
+        return super().write(s)
+
+
+def _console():
+    return Console(
+        file=_CountingFile(), width=40, height=20, force_terminal=True, color_system="truecolor", highlight=False
+    )
+
+
+def test_frame_writes_once_and_counts_bytes():
+    """A whole screen of prints should reach the terminal in one write."""
+    console = _console()
+    frames = FrameRenderer(console)
+    with frames.frame("start", clear=True):
+        for i in range(10):
+            console.print(f"line {i}", style="bold")
+
+    output = console.file.getvalue()
+    assert console.file.write_calls == 1
+    assert output.startswith(CLEAR_SCREEN)
+    assert "line 9" in output
+    assert (frames.frames, frames.writes, frames.bytes_written) == (1, 1, len(output.encode()))
+
+
+def test_redraw_rewrites_only_changed_lines():
+    """Redrawing a displayed screen should only send the lines that changed."""
+    console = _console()
+    frames = FrameRenderer(console)
+    with frames.frame("display", clear=True):
+        for name in ["Dusty", "Glimmer", "Nova"]:
+            console.print(name)
+    full = frames.bytes_written
+
+    with frames.redraw("display"):
+        for name in ["Dusty", "Sprocket", "Nova"]:
+            console.print(name)
+
+    update = console.file.getvalue()[full:]
+    assert "Sprocket" in update
+    assert "Dusty" not in update and "Nova" not in update
+    assert frames.bytes_written - full < full
+
+    with frames.redraw("display"):
+        for name in ["Dusty", "Sprocket", "Nova"]:
+            console.print(name)
+    assert frames.writes == 2  # nothing changed, nothing written
+
+
+def test_diff_frame_clears_leftover_lines():
+    assert diff_frame(["a", "b", "c", ""], ["a", ""]) == "\x1b[2;1H\x1b[K\x1b[3;1H\x1b[J\x1b[2;1H"
+    assert diff_frame(["a", ""], ["a", ""]) == ""
+
+
+def test_banded_gradient_merges_runs_and_shrinks_output():
+    text = "HANDLEBAR " * 8
+    smooth = make_gradient_text(text, GRADIENT_NEON, bold=True, bands=0)
+    banded = make_gradient_text(text, GRADIENT_NEON, bold=True, bands=4)
+
+    assert banded.plain == smooth.plain
+    assert len(banded.spans) == 4
+    assert len({span.style for span in banded.spans}) == 4
+    console = _console()
+    assert estimate_bytes(console, banded, "truecolor") < estimate_bytes(console, smooth, "truecolor") / 4
+
+
+def test_choose_output_mode_falls_back_to_fit_budget(monkeypatch):
+    monkeypatch.delenv("OUTPUT_COLOR_SYSTEM", raising=False)
+    monkeypatch.delenv("GRADIENT_BANDS", raising=False)
+    monkeypatch.setenv("SCREEN_PAINT_MS", "1000")
+    sizes = {mode: 4000 // (i + 1) for i, mode in enumerate(OUTPUT_MODES)}
+
+    assert choose_output_mode(sizes.get, None) == OUTPUT_MODES[0]
+    assert choose_output_mode(sizes.get, 32) == OUTPUT_MODES[0]  # 4000 bytes per second
+    assert choose_output_mode(sizes.get, 12) == OUTPUT_MODES[2]
+    assert choose_output_mode(sizes.get, 1) == OUTPUT_MODES[-1]
+
+    monkeypatch.setenv("OUTPUT_COLOR_SYSTEM", "256")
+    assert choose_output_mode(sizes.get, None).color_system == "256"
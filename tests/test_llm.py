@@ -0,0 +1,170 @@
+"""Tests for LLM client results and fallback routing."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from llm import FallbackClient, GenerationResult, LLMError
+from llm.claude_client import ClaudeClient
+from llm.openai_client import result_from_completion
+from llm.parse import ResponseParseError, parse_nicknames, rule_violations
+from llm.ratelimit import RateLimitedClient, RateLimiter, RateLimitTimeout, waiting_callback
+from llm.tiering import TIER_FAST, TIER_QUALITY, TierController, TieredClient
+
+
+class _StubClient:
+    def __init__(self, provider, fail=False, model="m", latency_ms=5):
+        self.provider = provider
+        self.fail = fail
+        self.model = model
+        self.latency_ms = latency_ms
+
+    def generate(self, messages):
+        if self.fail:
+            raise LLMError(f"{self.provider} down")
+        return GenerationResult(
+            text='{"nicknames": []}', provider=self.provider, model=self.model, latency_ms=self.latency_ms
+        )
+
+
+def test_fallback_marks_backup_results():
+    """Results served by the backup should say so and include the failed attempt."""
+    client = FallbackClient(_StubClient("claude", fail=True), _StubClient("ollama"))
+    result = client.generate([])
+    assert result.provider == "ollama"
+    assert result.used_backup is True
+    assert client.used_backup is True
+
+    with pytest.raises(LLMError, match="claude down"):
+        FallbackClient(_StubClient("claude", fail=True), _StubClient("ollama", fail=True)).generate([])
+
+
+def test_result_from_completion_reads_usage():
+    """OpenAI-compatible usage should map onto the result's token fields."""
+    response = SimpleNamespace(
+        id="chatcmpl-1",
+        model="gpt-test",
+        choices=[SimpleNamespace(message=SimpleNamespace(content="hi"))],
+        usage=SimpleNamespace(
+            prompt_tokens=120,
+            completion_tokens=30,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=100),
+        ),
+    )
+    result = result_from_completion(response, "openai", started=0.0)
+    assert result.metadata() | {"latency_ms": None} == {
+        "provider": "openai",
+        "model": "gpt-test",
+        "request_id": "chatcmpl-1",
+        "input_tokens": 120,
+        "output_tokens": 30,
+        "cache_read_tokens": 100,
+        "cache_write_tokens": None,
+        "latency_ms": None,
+        "used_backup": False,
+        "model_tier": None,
+    }
+    assert result.text == "hi"
+
+
+def test_empty_claude_response_raises_llm_error():
+    """A response with no content should fail over like any other API error."""
+    client = ClaudeClient.__new__(ClaudeClient)
+    client.model = "claude-test"
+    response = SimpleNamespace(id="msg_1", model="claude-test", content=[], usage=None)
+    raw = SimpleNamespace(parse=lambda: response, headers={})
+    client.client = SimpleNamespace(
+        messages=SimpleNamespace(with_raw_response=SimpleNamespace(create=lambda **kwargs: raw))
+    )
+
+    with pytest.raises(LLMError, match="Malformed Claude response"):
+        client.generate([{"role": "user", "content": "hi"}])
+    assert FallbackClient(client, _StubClient("ollama")).generate([]).provider == "ollama"
+    with pytest.raises(LLMError):
+        result_from_completion(SimpleNamespace(id="x", model="m", choices=[], usage=None), "openai", 0.0)
+
+
+def test_parse_nicknames_tolerates_fences_unless_strict():
+    """A fenced response parses leniently but fails strict JSON validation."""
+    fenced = '```json\n{"nicknames": ["Dusty", "Glimmer"]}\n```'
+    assert parse_nicknames(fenced) == ["Dusty", "Glimmer"]
+    with pytest.raises(ResponseParseError):
+        parse_nicknames(fenced, strict=True)
+    with pytest.raises(ResponseParseError):
+        parse_nicknames('{"nicknames": "Dusty"}')
+
+    names = ["Dusty", "Glimmer", "Sprocket", "Zephyr", "Wobble", "Nova", "Tinsel"]
+    assert rule_violations(names) == []
+    assert rule_violations(names[:6] + ["Dusty"]) == ["duplicate names"]
+    assert "'Big Dust Bunny': more than 2 words" in rule_violations(names[:6] + ["Big Dust Bunny"])
+
+
+def test_tiered_client_degrades_and_recovers():
+    """Breaching the SLO moves to the fast tier; fast probes move back."""
+    quality = _StubClient("claude", model="big", latency_ms=3000)
+    fast = _StubClient("claude", model="small", latency_ms=400)
+    controller = TierController(slo_ms=2000, window=4, min_samples=2, probe_every=2)
+    client = TieredClient({TIER_QUALITY: quality, TIER_FAST: fast}, controller)
+
+    tiers = [client.generate([]).model_tier for _ in range(3)]
+    assert tiers == [TIER_QUALITY, TIER_QUALITY, TIER_FAST]
+    assert controller.tier == TIER_FAST
+
+    quality.latency_ms = 800
+    tiers = [client.generate([]).model_tier for _ in range(5)]
+    # Every second generation probes the quality tier; two fast probes recover it.
+    assert tiers == [TIER_QUALITY, TIER_FAST, TIER_QUALITY, TIER_QUALITY, TIER_QUALITY]
+    assert controller.tier == TIER_QUALITY
+
+
+def test_rate_limiter_shares_buckets_across_processes(tmp_path):
+    """Two limiters on one file (two booth processes) draw from the same bucket."""
+    booth_a = RateLimiter(tmp_path / "rl.db", rpm=2, max_wait=0.1)
+    booth_b = RateLimiter(tmp_path / "rl.db", rpm=2, max_wait=0.1)
+    booth_a.acquire("claude:m", 100)
+    booth_b.acquire("claude:m", 100)
+    with pytest.raises(RateLimitTimeout):
+        booth_a.acquire("claude:m", 100)
+    # Other models have their own bucket.
+    booth_b.acquire("claude:other", 100)
+
+    booth_a.observe("openai:m", {"x-ratelimit-limit-tokens": "1000", "retry-after-ms": "5000"})
+    waits = []
+    with pytest.raises(RateLimitTimeout):
+        booth_b.acquire("openai:m", 10, on_wait=lambda ahead, wait: waits.append(wait))
+    assert waits == []  # retry-after exceeds max_wait, so it fails without queueing
+
+
+def test_rate_limited_client_requeues_after_429(tmp_path):
+    """A 429 is recorded for every process and retried once after retry-after."""
+
+    class _TooManyRequests(Exception):
+        response = SimpleNamespace(status_code=429, headers={"retry-after": "0.2"})
+
+    class _Flaky(_StubClient):
+        calls = 0
+
+        def generate(self, messages):
+            self.calls += 1
+            if self.calls == 1:
+                raise LLMError("rate limited") from _TooManyRequests()
+            return super().generate(messages)
+
+    limiter = RateLimiter(tmp_path / "rl.db", max_wait=5)
+    inner = _Flaky("claude")
+    client = RateLimitedClient(inner, limiter, "claude:m")
+    waits = []
+    with waiting_callback(lambda ahead, wait: waits.append(ahead)):
+        result = client.generate([{"role": "user", "content": "hi"}])
+    assert result.provider == "claude"
+    assert inner.calls == 2
+    assert waits and waits[0] == 0
+
+
+def test_rate_limited_client_fails_open_when_limiter_storage_breaks(tmp_path):
+    """An unusable limiter database lets generations through instead of raising."""
+    (tmp_path / "corrupt.db").write_bytes(b"not a sqlite database" * 100)
+    (tmp_path / "not-a-dir").write_text("")
+    for path in (tmp_path / "corrupt.db", tmp_path / "not-a-dir" / "rl.db"):
+        client = RateLimitedClient(_StubClient("claude"), RateLimiter(path), "claude:m")
+        assert client.generate([{"role": "user", "content": "hi"}]).provider == "claude"
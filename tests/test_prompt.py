@@ -0,0 +1,31 @@
+"""Tests for prompt building and variant selection."""
+
+import random
+
+from llm.prompt import PROMPT_VARIANTS, build_prompt, choose_variant, variant_weights
+
+
+def test_variant_weights_ignore_unknown_and_default_to_baseline(monkeypatch):
+    """Bad entries should be dropped, falling back to the baseline variant."""
+    monkeypatch.setenv("PROMPT_VARIANT_WEIGHTS", "nope=5,short-v1=0")
+    assert variant_weights() == {"baseline": 1.0}
+
+    monkeypatch.setenv("PROMPT_VARIANT_WEIGHTS", "baseline=3, short-v1=1")
+    assert variant_weights() == {"baseline": 3.0, "short-v1": 1.0}
+    picks = {choose_variant(random.Random(seed)) for seed in range(50)}
+    assert picks == {"baseline", "short-v1"}
+
+
+def test_build_prompt_uses_variant_system_prompt():
+    """The chosen variant's text should be the system message."""
+    qa = [{"question_id": "vibe", "question": "Vibe?", "answer": "dusty"}]
+    messages = build_prompt(qa, "m", variant="short-v1")
+    assert messages[0]["content"] == PROMPT_VARIANTS["short-v1"].replace("{count}", "7")
+    assert "Exactly 7 candidates" in messages[0]["content"]
+
+
+def test_build_prompt_requests_pool_sized_batches():
+    """A larger count asks for that many names in one call."""
+    qa = [{"question_id": "vibe", "question": "Vibe?", "answer": "dusty"}]
+    messages = build_prompt(qa, "m", count=21)
+    assert "Generate exactly 21 nickname candidates" in messages[0]["content"]
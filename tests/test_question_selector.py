@@ -0,0 +1,52 @@
+"""Tests for question selector module."""
+
+import random
+
+from ui.question_selector import QuestionSelector
+
+POOL = [{"question_id": qid, "question": qid, "hint": ""} for qid in ["good", "bad", "skipped"]]
+
+STATS = {
+    "good": {"asked": 200, "skipped": 5, "helpful": 90, "unhelpful": 2},
+    "bad": {"asked": 200, "skipped": 10, "helpful": 3, "unhelpful": 80},
+    "skipped": {"asked": 200, "skipped": 180, "helpful": 5, "unhelpful": 5},
+}
+
+
+def test_select_returns_requested_number_without_duplicates():
+    """Should pick n distinct questions from the pool."""
+    selector = QuestionSelector(lambda: {}, rng=random.Random(1))
+
+    chosen = selector.select(POOL, 2)
+
+    assert len(chosen) == 2
+    assert len({q["question_id"] for q in chosen}) == 2
+
+
+def test_select_favors_helpful_answered_questions():
+    """Without exploration, the strong question should almost always come first."""
+    selector = QuestionSelector(lambda: STATS, exploration=0.0, rng=random.Random(7))
+
+    firsts = [selector.select(POOL, 1)[0]["question_id"] for _ in range(200)]
+
+    assert firsts.count("good") > 190
+
+
+def test_select_keeps_exploring():
+    """With exploration, weaker questions should still be picked sometimes."""
+    selector = QuestionSelector(lambda: STATS, exploration=0.5, rng=random.Random(3))
+
+    firsts = {selector.select(POOL, 1)[0]["question_id"] for _ in range(200)}
+
+    assert firsts == {"good", "bad", "skipped"}
+
+
+def test_stats_are_cached_between_sessions():
+    """Stats should be loaded once per ttl, not once per visitor."""
+    calls = []
+    selector = QuestionSelector(lambda: calls.append(1) or STATS, ttl=60)
+
+    selector.select(POOL, 2)
+    selector.select(POOL, 2)
+
+    assert len(calls) == 1
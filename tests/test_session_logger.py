@@ -0,0 +1,588 @@
+"""Tests for session logging module."""
+
+import io
+import json
+import multiprocessing
+import os
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from session_logging import SessionLogger, SessionWriter
+from session_logging.export import write_json_array, write_ndjson
+from session_logging.maintenance import archive_sessions, maintain
+from session_logging.migrations import LATEST_VERSION, current_version
+from session_logging.rollups import read_stats, refresh_rollups
+from session_logging.schema import (
+    feedback_table,
+    llm_responses_table,
+    schema_version_table,
+    sessions_table,
+    spool_progress_table,
+    sync_state_table,
+)
+from session_logging.sync import SyncWorker
+from session_logging.variants import variant_report
+
+
+@pytest.fixture
+def logger(tmp_path, monkeypatch):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    return SessionLogger(db_path=tmp_path / "sessions.db")
+
+
+def _log_session(target, style="w"):
+    return target.log_session(
+        style=style,
+        qa_transcript=[{"question_id": "vibe", "answer": "dusty"}],
+        nicknames=["Dustbunny", "Glimmer"],
+        llm_response_raw='{"nicknames": ["Dustbunny", "Glimmer"]}',
+    )
+
+
+def _log_feedback(target, session_id):
+    return target.log_feedback(
+        session_id=session_id,
+        favorite_names=["Glimmer"],
+        helpful_questions=["vibe"],
+        unhelpful_questions=[],
+        suggested_questions="",
+        self_suggested_name="",
+    )
+
+
+def test_log_session_and_feedback_round_trip(logger):
+    """Logged sessions should come back from dump_sessions with feedback."""
+    session_id = _log_session(logger)
+    _log_feedback(logger, session_id)
+
+    sessions = json.loads(logger.dump_sessions())
+    assert len(sessions) == 1
+    assert sessions[0]["nicknames"] == ["Dustbunny", "Glimmer"]
+    assert sessions[0]["feedback"][0]["favorite_names"] == ["Glimmer"]
+
+
+def test_writer_links_feedback_to_pending_session(logger):
+    """Feedback given a SessionTicket should attach to that session's row."""
+    writer = SessionWriter(logger)
+    ticket = _log_session(writer)
+    _log_feedback(writer, ticket)
+    writer.close()
+
+    assert ticket.result() == 1
+    sessions = json.loads(logger.dump_sessions())
+    assert sessions[0]["feedback"][0]["helpful_questions"] == ["vibe"]
+
+
+def test_writer_spools_when_database_fails_and_replays(logger):
+    """Records should survive a database outage via the spool file."""
+    writer = SessionWriter(logger)
+    with patch.object(logger, "insert_session", side_effect=RuntimeError("db down")):
+        ticket = _log_session(writer)
+        _log_feedback(writer, ticket)
+        writer.flush()
+
+    assert ticket.result() is None
+    assert writer.spool_path.exists()
+
+    _log_session(writer, style="c")
+    writer.close()
+
+    assert not writer.spool_path.exists()
+    sessions = json.loads(logger.dump_sessions())
+    assert [s["style"] for s in sessions] == ["w", "c"]
+    assert sessions[0]["feedback"][0]["favorite_names"] == ["Glimmer"]
+
+
+def test_writer_adopts_spools_of_exited_processes_only(logger, tmp_path):
+    """A writer should replay spools whose process is gone and leave live ones alone."""
+    values = logger.session_values("w", [], ["Orphan"], "")
+    (tmp_path / "sessions.spool.jsonl").write_text(
+        json.dumps({"kind": "session", "ref": "legacy", "values": values}) + "\n"
+    )
+    live = tmp_path / f"sessions.spool.{os.getppid()}.jsonl"
+    live.write_text(json.dumps({"kind": "session", "ref": "live", "values": values}) + "\n")
+
+    writer = SessionWriter(logger)
+    writer.close()
+
+    assert writer.spool_path.name == f"sessions.spool.{os.getpid()}.jsonl"
+    assert len(json.loads(logger.dump_sessions())) == 1
+    assert live.exists()
+    assert not (tmp_path / "sessions.spool.jsonl").exists()
+
+
+def test_writer_adopts_spools_left_mid_adoption_by_dead_writer(logger, tmp_path):
+    """A spool a crashed writer had claimed but not finished should be adopted again."""
+    values = logger.session_values("w", [], ["Orphan"], "")
+    stale = tmp_path / f"sessions.spool.{os.getppid()}.jsonl.999999999.adopting"
+    stale.write_text(json.dumps({"kind": "session", "ref": "stale", "values": values}) + "\n")
+
+    writer = SessionWriter(logger)
+    writer.close()
+
+    assert not stale.exists()
+    assert [s["nicknames"] for s in json.loads(logger.dump_sessions())] == [["Orphan"]]
+
+
+def test_writer_dead_letters_records_rejected_on_their_own(logger):
+    """One record the database always rejects should not hold up the rest of the spool."""
+    writer = SessionWriter(logger)
+    insert_session = logger.insert_session
+
+    def reject_bad_style(conn, values):
+        if values["style"] == "bad":
+            raise RuntimeError("rejected")
+        return insert_session(conn, values)
+
+    with patch.object(logger, "insert_session", side_effect=RuntimeError("db down")):
+        _log_session(writer, style="w")
+        _log_session(writer, style="bad")
+        _log_session(writer, style="c")
+        writer.flush()
+    with patch.object(logger, "insert_session", side_effect=reject_bad_style):
+        _log_session(writer, style="y")
+        writer.close()
+
+    assert not writer.spool_path.exists()
+    assert [s["style"] for s in json.loads(logger.dump_sessions())] == ["w", "c", "y"]
+    dead = [json.loads(line) for line in writer.dead_letter_path.read_text().splitlines()]
+    assert [r["values"]["style"] for r in dead] == ["bad"]
+
+
+def test_writer_does_not_replay_records_committed_before_a_crash(logger, tmp_path):
+    """Records already counted in spool_progress should be skipped if the spool file survived."""
+    values = logger.session_values("w", [], ["Once"], "")
+    spool = tmp_path / "sessions.spool.999999999.jsonl"
+    spool.write_text(
+        json.dumps({"kind": "header", "spool_id": "abc"}) + "\n"
+        + json.dumps({"kind": "session", "ref": "a", "values": values}) + "\n"
+        + json.dumps({"kind": "session", "ref": "b", "values": {**values, "style": "c"}}) + "\n"
+    )
+    with logger.engine.begin() as conn:
+        logger.insert_session(conn, values)
+        conn.execute(spool_progress_table.insert().values(spool_id="abc", records=1))
+
+    writer = SessionWriter(logger)
+    writer.close()
+
+    assert not spool.exists()
+    assert [s["style"] for s in json.loads(logger.dump_sessions())] == ["w", "c"]
+    with logger.engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(spool_progress_table)).scalar() == 0
+
+
+def test_migrations_normalize_legacy_string_json(tmp_path, monkeypatch):
+    """Legacy rows with string-encoded JSON should be decoded once at migration."""
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    db_path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        """
+        CREATE TABLE sessions (session_id INTEGER PRIMARY KEY, process_id TEXT,
+            timestamp TEXT, style TEXT, qa_transcript JSON, nicknames JSON,
+            llm_response_raw TEXT);
+        CREATE TABLE feedback (feedback_id INTEGER PRIMARY KEY, session_id INTEGER,
+            timestamp TEXT, favorite_name TEXT, favorite_names JSON,
+            helpful_questions JSON, unhelpful_questions JSON,
+            suggested_questions TEXT, self_suggested_name TEXT, other_feedback TEXT);
+        """
+    )
+    conn.execute(
+        "INSERT INTO sessions VALUES (1, 'p', 't', 'w', ?, ?, '')",
+        (json.dumps(json.dumps([{"question_id": "vibe", "answer": "x"}])), json.dumps(json.dumps(["Ember"]))),
+    )
+    conn.commit()
+    conn.close()
+
+    logger = SessionLogger(db_path=db_path)
+
+    assert current_version(logger.engine) == LATEST_VERSION
+    sessions = json.loads(logger.dump_sessions())
+    assert sessions[0]["nicknames"] == ["Ember"]
+    assert sessions[0]["qa_transcript"] == [{"question_id": "vibe", "answer": "x"}]
+
+
+def _open_in_process(db_path, barrier):
+    barrier.wait(30)
+    SessionLogger(db_path=db_path).engine.dispose()
+
+
+def test_concurrent_startup_migrates_once(tmp_path, monkeypatch):
+    """Booth processes starting together on a new database should all come up."""
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(6)
+    workers = [
+        context.Process(target=_open_in_process, args=(tmp_path / "sessions.db", barrier)) for _ in range(6)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+
+    engine = SessionLogger(db_path=tmp_path / "sessions.db").engine
+    with engine.connect() as conn:
+        versions = conn.execute(select(schema_version_table.c.version)).scalars().all()
+    assert sorted(versions) == list(range(1, LATEST_VERSION + 1))
+
+
+def test_iter_sessions_pages_and_filters(logger):
+    """iter_sessions should page by session_id and apply filters."""
+    for style in ["w", "c", "w", "y", "w"]:
+        _log_session(logger, style=style)
+
+    assert [s["session_id"] for s in logger.iter_sessions(page_size=2)] == [1, 2, 3, 4, 5]
+    assert [s["session_id"] for s in logger.iter_sessions(style="w", page_size=2)] == [1, 3, 5]
+    assert [s["session_id"] for s in logger.iter_sessions(since=3)] == [4, 5]
+    assert list(logger.iter_sessions(end="2000-01-01")) == []
+
+
+def test_write_ndjson_returns_watermark(logger):
+    """NDJSON export should write one record per line and return the last id."""
+    _log_session(logger)
+    _log_session(logger, style="c")
+    out = io.StringIO()
+
+    last_id = write_ndjson(logger.iter_sessions(), out)
+
+    lines = out.getvalue().splitlines()
+    assert last_id == 2
+    assert [json.loads(line)["style"] for line in lines] == ["w", "c"]
+
+
+def test_write_json_array_matches_dump_sessions(logger):
+    """The streaming pretty-printer should produce the same document."""
+    _log_session(logger)
+    _log_session(logger, style="c")
+    out = io.StringIO()
+
+    write_json_array(logger.iter_sessions(), out)
+
+    assert json.loads(out.getvalue()) == json.loads(logger.dump_sessions())
+
+
+def test_multiple_feedback_rows_do_not_duplicate_session(logger):
+    """A session with several feedback rows should appear once, with all of them."""
+    session_id = _log_session(logger)
+    _log_feedback(logger, session_id)
+    _log_feedback(logger, session_id)
+    _log_session(logger, style="c")
+
+    sessions = logger.query_sessions()
+
+    assert [s["session_id"] for s in sessions] == [1, 2]
+    assert len(sessions[0]["feedback"]) == 2
+    assert sessions[1]["feedback"] == []
+
+
+def test_query_sessions_filters_on_feedback_and_paginates(logger):
+    """has_feedback and after_id should narrow the page."""
+    for _ in range(4):
+        _log_session(logger)
+    _log_feedback(logger, 2)
+    _log_feedback(logger, 4)
+
+    assert [s["session_id"] for s in logger.query_sessions(has_feedback=True)] == [2, 4]
+    assert [s["session_id"] for s in logger.query_sessions(has_feedback=False)] == [1, 3]
+    assert [s["session_id"] for s in logger.query_sessions(after_id=2, limit=1)] == [3]
+    assert logger.count_sessions(has_feedback=True) == 2
+
+
+def test_rollups_fold_incrementally(logger):
+    """Refreshing twice should only count new rows once."""
+    session_id = _log_session(logger)
+    logger.log_session(
+        style="c",
+        qa_transcript=[{"question_id": "vibe", "answer": ""}],
+        nicknames=["Zap"],
+        llm_response_raw="",
+    )
+    _log_feedback(logger, session_id)
+    refresh_rollups(logger.engine)
+    _log_feedback(logger, session_id)
+    refresh_rollups(logger.engine)
+
+    stats = read_stats(logger.engine)
+    assert stats["sessions"] == 2
+    assert stats["feedback"] == 2
+    assert stats["sessions_with_feedback"] == 1
+    assert stats["questions"]["vibe"] == {"asked": 2, "skipped": 1, "helpful": 2, "unhelpful": 0}
+    assert stats["styles"]["w"] == {"sessions": 1, "sessions_with_feedback": 1}
+    assert stats["favorite_positions"] == {2: 2}
+
+
+def test_rollups_count_visits_not_generations(logger):
+    """Rerolls and other styles of one visit should count as one visit."""
+    for reroll, style in ((0, "w"), (1, "w"), (0, "c")):
+        logger.log_session(
+            style=style,
+            qa_transcript=[{"question_id": "vibe", "answer": "dusty"}],
+            nicknames=["Zap"],
+            llm_response_raw="",
+            visit_id="visit-1",
+            reroll_index=reroll,
+        )
+        # Split the visit across refreshes.
+        refresh_rollups(logger.engine)
+    logger.log_session(style="w", qa_transcript=[], nicknames=["Old"], llm_response_raw="", reroll_index=2)
+    refresh_rollups(logger.engine)
+
+    stats = read_stats(logger.engine)
+    assert stats["sessions"] == 4
+    assert stats["visits"] == 1
+    assert stats["questions"]["vibe"]["asked"] == 1
+    assert stats["styles"]["w"]["sessions"] == 1
+    assert stats["styles"]["c"]["sessions"] == 1
+
+
+def _refresh_in_process(db_path):
+    logger = SessionLogger(db_path=db_path)
+    refresh_rollups(logger.engine, batch_size=50)
+    logger.engine.dispose()
+
+
+def test_concurrent_refreshes_do_not_double_count(logger, tmp_path):
+    """Booth processes refreshing at once should fold each row exactly once."""
+    logger.engine.dispose()
+    with logger.engine.begin() as conn:
+        conn.execute(
+            sessions_table.insert(),
+            [
+                {
+                    "process_id": "seed",
+                    "timestamp": "2026-01-01T00:00:00",
+                    "style": "w",
+                    "qa_transcript": [{"question_id": "vibe", "answer": "dusty"}],
+                    "nicknames": ["Zap"],
+                    "llm_response_raw": "",
+                    "visit_id": f"visit-{i}",
+                }
+                for i in range(2000)
+            ],
+        )
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_refresh_in_process, args=(tmp_path / "sessions.db",)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+
+    stats = read_stats(logger.engine)
+    assert stats["sessions"] == 2000
+    assert stats["visits"] == 2000
+    assert stats["questions"]["vibe"]["asked"] == 2000
+
+
+def test_question_stats_reads_rollups_until_idle_maintenance(logger):
+    """question_stats should not refresh on its own; idle maintenance does."""
+    _log_session(logger)
+    assert logger.question_stats() == {}
+
+    logger.maintainer.interval = 0.001
+    logger.maintainer._last_run -= 1
+    logger.maintainer.run_idle().join()
+    assert logger.question_stats()["vibe"]["asked"] == 1
+
+
+def test_raw_responses_are_compressed_and_deduplicated(logger):
+    """Identical raw responses should be stored once and decoded on read."""
+    _log_session(logger)
+    _log_session(logger)
+
+    with logger.engine.connect() as conn:
+        stored = conn.execute(select(func.count()).select_from(llm_responses_table)).scalar_one()
+        inline = conn.execute(select(sessions_table.c.llm_response_raw)).scalars().all()
+    assert stored == 1
+    assert inline == ["", ""]
+
+    sessions = json.loads(logger.dump_sessions(include_raw=True))
+    assert [s["llm_response_raw"] for s in sessions] == ['{"nicknames": ["Dustbunny", "Glimmer"]}'] * 2
+
+
+def test_compact_responses_converts_inline_rows(logger):
+    """compact_responses should move existing inline payloads into the store."""
+    logger.response_encoding = None
+    _log_session(logger)
+    _log_session(logger)
+
+    totals = logger.compact_responses()
+
+    assert totals["rows"] == 2
+    assert totals["stored_payloads"] == 1
+    assert logger.response_encoding is None
+    sessions = logger.query_sessions(include_raw=True)
+    assert sessions[0]["llm_response_raw"] == '{"nicknames": ["Dustbunny", "Glimmer"]}'
+
+
+def test_archive_sessions_moves_old_rows_to_dated_database(logger, tmp_path):
+    """Old sessions, their feedback and responses should move to the archive."""
+    old_id = _log_session(logger)
+    _log_feedback(logger, old_id)
+    _log_session(logger)
+    with logger.engine.begin() as conn:
+        conn.execute(
+            sessions_table.update()
+            .where(sessions_table.c.session_id == old_id)
+            .values(timestamp="2026-01-02T03:04:05+00:00")
+        )
+
+    totals = archive_sessions(logger.engine, 7, tmp_path / "archive")
+
+    assert totals == {"sessions": 1, "feedback": 1}
+    assert [s["session_id"] for s in logger.query_sessions()] == [old_id + 1]
+    assert read_stats(logger.engine)["sessions"] == 2
+    archived = SessionLogger(db_path=tmp_path / "archive" / "sessions-2026-01-02.db")
+    sessions = archived.query_sessions(include_raw=True)
+    assert [s["session_id"] for s in sessions] == [old_id]
+    assert sessions[0]["llm_response_raw"] == '{"nicknames": ["Dustbunny", "Glimmer"]}'
+    assert len(sessions[0]["feedback"]) == 1
+
+
+def test_archive_keeps_unsynced_rows_in_hybrid_mode(tmp_path, monkeypatch):
+    """Hybrid booths should only archive rows that reached the central database."""
+    remote_url = f"sqlite:///{tmp_path / 'central.db'}"
+    monkeypatch.setenv("DATABASE_URL", remote_url)
+    monkeypatch.setenv("HYBRID_SYNC", "true")
+    local = SessionLogger(db_path=tmp_path / "booth.db", sync=False)
+    synced_id = _log_session(local)
+    pending_feedback_id = _log_session(local)
+    worker = SyncWorker(local.engine, remote_url)
+    worker.sync_once()
+    _log_feedback(local, pending_feedback_id)
+    unsynced_id = _log_session(local)
+    with local.engine.begin() as conn:
+        conn.execute(sessions_table.update().values(timestamp="2026-01-02T03:04:05+00:00"))
+
+    assert archive_sessions(local.engine, 7, tmp_path / "archive") == {"sessions": 1, "feedback": 0}
+    assert [s["session_id"] for s in local.query_sessions()] == [pending_feedback_id, unsynced_id]
+    assert synced_id not in {s["session_id"] for s in local.query_sessions()}
+
+
+def test_maintain_enables_incremental_vacuum(tmp_path):
+    """maintain should convert a legacy database to auto_vacuum=INCREMENTAL."""
+    db_path = tmp_path / "legacy.db"
+    sqlite3.connect(db_path).close()
+    logger = SessionLogger(db_path=db_path)
+    with logger.engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA auto_vacuum=NONE")
+        conn.exec_driver_sql("VACUUM")
+
+    report = maintain(logger.engine)
+
+    assert report["converted_to_incremental_vacuum"] is True
+    assert maintain(logger.engine)["converted_to_incremental_vacuum"] is False
+    with logger.engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2
+
+
+def test_transaction_retries_on_lock_contention(logger, monkeypatch):
+    """A "database is locked" error should be retried, other errors raised."""
+    monkeypatch.setattr("session_logging.session_logger.time.sleep", lambda _: None)
+    calls = []
+
+    def work(conn):
+        calls.append(1)
+        if len(calls) < 3:
+            raise OperationalError("INSERT", {}, sqlite3.OperationalError("database is locked"))
+        return "done"
+
+    assert logger.transaction(work) == "done"
+    assert len(calls) == 3
+
+    def broken(conn):
+        raise OperationalError("INSERT", {}, sqlite3.OperationalError("no such table: x"))
+
+    with pytest.raises(OperationalError):
+        logger.transaction(broken)
+
+
+def test_sync_worker_replicates_idempotently(tmp_path, monkeypatch):
+    """Hybrid mode writes locally and replays safely after a lost watermark."""
+    remote_url = f"sqlite:///{tmp_path / 'central.db'}"
+    monkeypatch.setenv("DATABASE_URL", remote_url)
+    monkeypatch.setenv("HYBRID_SYNC", "true")
+    local = SessionLogger(db_path=tmp_path / "booth.db", sync=False)
+    assert local.engine.url.database == str(tmp_path / "booth.db")
+    session_id = _log_session(local)
+    _log_feedback(local, session_id)
+
+    worker = SyncWorker(local.engine, remote_url)
+    assert worker.sync_once() == {"sessions": 1, "feedback": 1}
+    assert worker.sync_once() == {"sessions": 0, "feedback": 0}
+    # Simulate a crash between the remote commit and the watermark update.
+    with local.engine.begin() as conn:
+        conn.execute(sync_state_table.delete())
+    worker.sync_once()
+
+    with worker.remote().connect() as conn:
+        sessions = conn.execute(select(sessions_table)).fetchall()
+        feedback = conn.execute(select(feedback_table)).fetchall()
+    assert [(s.process_id, s.origin_session_id) for s in sessions] == [(local.process_id, session_id)]
+    assert [(f.session_id, f.origin_process_id) for f in feedback] == [(sessions[0].session_id, local.process_id)]
+    monkeypatch.delenv("HYBRID_SYNC")
+    central = SessionLogger(db_path=tmp_path / "unused.db")
+    assert central.query_sessions(include_raw=True)[0]["llm_response_raw"] == '{"nicknames": ["Dustbunny", "Glimmer"]}'
+
+
+def test_sync_holds_back_feedback_until_its_session_replicates(tmp_path, monkeypatch):
+    """Feedback whose session is not on the remote yet must not be skipped for good."""
+    remote_url = f"sqlite:///{tmp_path / 'central.db'}"
+    monkeypatch.setenv("DATABASE_URL", remote_url)
+    monkeypatch.setenv("HYBRID_SYNC", "true")
+    local = SessionLogger(db_path=tmp_path / "booth.db", sync=False)
+    session_id = _log_session(local)
+    feedback_id = _log_feedback(local, session_id)
+    worker = SyncWorker(local.engine, remote_url)
+    # Pretend the session went out already, so its feedback finds no match.
+    with local.engine.begin() as conn:
+        conn.execute(sync_state_table.insert().values(name="last_session_id", value=session_id))
+
+    assert worker.sync_once() == {"sessions": 0, "feedback": 0}
+    with local.engine.begin() as conn:
+        assert conn.execute(select(sync_state_table.c.name)).scalars().all() == ["last_session_id"]
+        conn.execute(sync_state_table.delete())
+    assert worker.sync_once() == {"sessions": 1, "feedback": 1}
+    with worker.remote().connect() as conn:
+        assert conn.execute(select(feedback_table.c.origin_feedback_id)).scalars().all() == [feedback_id]
+
+
+def test_variant_report_compares_variants(logger):
+    """Generations should be grouped by prompt variant with their metrics."""
+    first = logger.log_session(
+        style="w", qa_transcript=[], nicknames=["Zap"], llm_response_raw="{}",
+        prompt_variant="baseline", reroll_index=0, latency_ms=900, input_tokens=800,
+        output_tokens=40, parse_error=False,
+    )
+    logger.log_session(
+        style="w", qa_transcript=[], nicknames=["Zip"], llm_response_raw="{}",
+        prompt_variant="baseline", reroll_index=1, latency_ms=1100, input_tokens=820,
+        output_tokens=40, parse_error=False,
+    )
+    logger.log_session(
+        style="w", qa_transcript=[], nicknames=[], llm_response_raw="oops",
+        prompt_variant="short-v1", reroll_index=0, latency_ms=400, input_tokens=300,
+        output_tokens=2, parse_error=True,
+    )
+    _log_feedback(logger, first)
+
+    report = variant_report(logger.engine)
+
+    assert set(report) == {"baseline", "short-v1"}
+    baseline = report["baseline"]
+    assert baseline["generations"] == 2
+    assert baseline["avg_latency_ms"] == 1000
+    assert baseline["reroll_rate"] == 0.5
+    assert baseline["favorite_rate"] == 1.0
+    assert baseline["p50_latency_ms"] == 1100
+    assert report["short-v1"]["p95_latency_ms"] == 400
+    assert report["short-v1"]["parse_error_rate"] == 1.0
+    assert report["short-v1"]["favorite_rate"] is None
+    # Averages are plain floats (not Postgres Decimals) so --json can dump them.
+    assert isinstance(baseline["avg_input_tokens"], float)
+    json.dumps(report)
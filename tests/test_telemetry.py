@@ -0,0 +1,193 @@
+"""Tests for telemetry module."""
+
+import json
+import logging
+import logging.handlers
+import os
+import tracemalloc
+
+import pytest
+
+from telemetry import (
+    JsonlExporter,
+    MemoryWatchdog,
+    MetricsRegistry,
+    SharedRotatingFileHandler,
+    Tracer,
+    configure_logging,
+    set_log_session,
+    shutdown_logging,
+)
+
+
+def test_span_exports_jsonl_record(tmp_path):
+    """Finished spans should be appended to the JSONL file with timing."""
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(MetricsRegistry(), JsonlExporter(path))
+
+    with tracer.span("build_prompt", answers=3) as attrs:
+        attrs["avoid"] = 0
+    tracer.exporter.close()
+
+    record = json.loads(path.read_text().splitlines()[0])
+    assert record["span"] == "build_prompt"
+    assert record["status"] == "ok"
+    assert record["answers"] == 3
+    assert record["avoid"] == 0
+    assert record["duration_ms"] >= 0
+
+
+def test_nested_spans_share_trace_id(tmp_path):
+    """Child spans should point at their parent and reuse its trace_id."""
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(MetricsRegistry(), JsonlExporter(path))
+
+    with tracer.span("generate_names"):
+        with tracer.span("llm.generate", provider="fake"):
+            pass
+    tracer.exporter.close()
+
+    child, parent = [json.loads(line) for line in path.read_text().splitlines()]
+    assert child["trace_id"] == parent["trace_id"]
+    assert child["parent_id"] == parent["span_id"]
+    assert parent["parent_id"] is None
+
+
+def test_exporter_rotates_trace_file(tmp_path):
+    """The trace file should roll over at max_bytes instead of growing forever."""
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(MetricsRegistry(), JsonlExporter(path, max_bytes=2000, backup_count=2))
+
+    for i in range(100):
+        with tracer.span("render", frame=i):
+            pass
+    tracer.exporter.close()
+
+    files = sorted(f for f in tmp_path.iterdir() if f.suffix != ".lock")
+    assert [f.name for f in files] == ["traces.jsonl", "traces.jsonl.1", "traces.jsonl.2"]
+    assert all(f.stat().st_size <= 2000 for f in files)
+    assert json.loads(path.read_text().splitlines()[-1])["frame"] == 99
+
+
+def test_writers_sharing_a_trace_file_rotate_once(tmp_path):
+    """A writer should follow another process's rotation instead of rotating again."""
+    path = tmp_path / "traces.jsonl"
+    writers = [SharedRotatingFileHandler(path, maxBytes=500, backupCount=20) for _ in range(2)]
+    for i in range(20):
+        for n, writer in enumerate(writers):
+            writer.emit(logging.makeLogRecord({"msg": f"{n}:{i}:{'x' * 40}"}))
+    for writer in writers:
+        writer.close()
+
+    files = [f for f in tmp_path.iterdir() if f.suffix != ".lock"]
+    lines = [line for f in files for line in f.read_text().splitlines()]
+    assert sorted(lines) == sorted(f"{n}:{i}:{'x' * 40}" for i in range(20) for n in range(2))
+    assert all(f.stat().st_size <= 500 for f in files)
+    # Both writers end up in the current file, not one in a rotated copy.
+    assert {line[:5] for line in path.read_text().splitlines()[-2:]} == {"0:19:", "1:19:"}
+
+
+def test_span_marks_errors_and_reraises():
+    """Exceptions should be recorded as error status and propagate."""
+    registry = MetricsRegistry()
+    tracer = Tracer(registry)
+
+    with pytest.raises(ValueError):
+        with tracer.span("parse_response"):
+            raise ValueError("bad json")
+
+    output = registry.render_prometheus()
+    assert 'handlebar_spans_total{span="parse_response",status="error"} 1' in output
+
+
+def test_prometheus_histogram_buckets_are_cumulative():
+    """Histogram buckets should be cumulative and end with +Inf."""
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.observe("latency_seconds", 0.05, {"span": "db"})
+    registry.observe("latency_seconds", 0.5, {"span": "db"})
+
+    output = registry.render_prometheus()
+    assert 'latency_seconds_bucket{span="db",le="0.1"} 1' in output
+    assert 'latency_seconds_bucket{span="db",le="1.0"} 2' in output
+    assert 'latency_seconds_bucket{span="db",le="+Inf"} 2' in output
+    assert 'latency_seconds_count{span="db"} 2' in output
+
+
+def test_memory_checkpoints_track_growth_and_ceiling(tmp_path):
+    """Checkpoints should record RSS and allocation growth, writing snapshots at most every interval."""
+    path = tmp_path / "memory.jsonl"
+    was_tracing = tracemalloc.is_tracing()
+    watchdog = MemoryWatchdog(path, snapshot_interval=3600, top=5, max_rss_mb=1, trace_frames=1)
+    try:
+        first = watchdog.checkpoint()
+        leak = [bytearray(1024) for _ in range(2000)]
+        second = watchdog.checkpoint()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    assert first["rss_mb"] > 0 and "size_diff_kb" not in first["top"][0]
+    assert "test_telemetry.py" in second["top"][0]["where"]
+    assert second["top"][0]["size_diff_kb"] >= 2000
+    assert watchdog.over_ceiling(second)
+    assert [json.loads(line)["checkpoint"] for line in path.read_text().splitlines()] == [1]
+    assert len(leak) == 2000
+
+
+def test_memory_watchdog_records_rss_only_by_default(monkeypatch):
+    """tracemalloc slows every allocation, so it stays off unless TRACEMALLOC_FRAMES asks for it."""
+    if tracemalloc.is_tracing():
+        pytest.skip("tracemalloc already running")
+    monkeypatch.delenv("TRACEMALLOC_FRAMES", raising=False)
+    record = MemoryWatchdog.from_env(None).checkpoint()
+    assert not tracemalloc.is_tracing()
+    assert "top" not in record and record["rss_mb"] > 0
+
+
+def test_json_logs_carry_session_and_respect_module_levels(tmp_path, monkeypatch):
+    """Queued JSON logs should reach the file with pid and session id, filtered per module."""
+    monkeypatch.setenv("LOG_FORMAT", "json")
+    monkeypatch.setenv("LOG_LEVELS", "noisy.lib=WARNING")
+    path = tmp_path / "app.log"
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    try:
+        listener = configure_logging(path)
+        # Every ttyd booth process shares app.log, so rotation must be multi-process safe.
+        assert isinstance(listener.handlers[0], SharedRotatingFileHandler)
+        set_log_session(42)
+        logging.getLogger("ui.terminal").info("State starting: %s", "START")
+        logging.getLogger("noisy.lib").info("chatter")
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("ui.terminal").exception("Terminal crashed")
+        shutdown_logging(flush_handlers=False)
+    finally:
+        set_log_session(None)
+        root.handlers[:] = handlers
+        root.setLevel(level)
+        logging.getLogger("noisy.lib").setLevel(logging.NOTSET)
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["message"] for r in records] == ["State starting: START", "Terminal crashed"]
+    assert {r["session_id"] for r in records} == {42}
+    assert records[0]["pid"] > 0
+    assert "ValueError: boom" in records[1]["exc"]
+
+
+def test_log_file_per_process_or_external_rotation(tmp_path, monkeypatch):
+    """{pid} should give each process its own file; LOG_MAX_BYTES=0 leaves rotation to logrotate."""
+    monkeypatch.setenv("LOG_MAX_BYTES", "0")
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    try:
+        listener = configure_logging(tmp_path / "app.{pid}.log")
+        assert isinstance(listener.handlers[0], logging.handlers.WatchedFileHandler)
+        logging.getLogger("ui.terminal").warning("hello")
+        shutdown_logging(flush_handlers=False)
+    finally:
+        root.handlers[:] = handlers
+        root.setLevel(level)
+
+    assert "hello" in (tmp_path / f"app.{os.getpid()}.log").read_text()
@@ -2,8 +2,11 @@
 
 from unittest.mock import patch, MagicMock
 
+import pytest
 from rich.console import Console
 
+from telemetry import MemoryWatchdog, RecycleProcess
+from ui.session import MAX_AVOID_NAMES, IdleTimeout
 from ui.terminal import State, Terminal
 from data.styles import DEFAULT_STYLE
 
@@ -23,10 +26,10 @@ def test_terminal_initializes_with_defaults():
     terminal = Terminal()
 
     assert terminal.state == State.START
-    assert terminal.style == DEFAULT_STYLE
-    assert terminal.qa_transcript == []
-    assert terminal.avoid_list == []
-    assert terminal.candidates == []
+    assert terminal.session.style == DEFAULT_STYLE
+    assert terminal.session.qa_transcript == []
+    assert terminal.session.avoid_list == []
+    assert terminal.session.candidates == []
 
 
 def test_terminal_has_console():
@@ -46,6 +49,18 @@ def test_show_start_screen_transitions_to_style_select():
     assert terminal.state == State.STYLE_SELECT
 
 
+def test_start_screen_recycles_over_rss_ceiling():
+    """Over MAX_RSS_MB the booth should recycle before showing the next visitor anything."""
+    terminal = Terminal(memory=MemoryWatchdog(max_rss_mb=1, trace_frames=0))
+    terminal.console = Console(record=True)
+
+    with patch("ui.terminal.pt_prompt", return_value="") as prompt, pytest.raises(RecycleProcess):
+        terminal.show_start_screen()
+
+    prompt.assert_not_called()
+    assert terminal.console.export_text() == ""
+
+
 def test_show_style_selector_transitions_to_questionnaire():
     """show_style_selector should transition state to QUESTIONNAIRE."""
     terminal = Terminal()
@@ -56,7 +71,7 @@ def test_show_style_selector_transitions_to_questionnaire():
         terminal.show_style_selector()
 
     assert terminal.state == State.QUESTIONNAIRE
-    assert terminal.style == "m"
+    assert terminal.session.style == "m"
 
 
 def test_run_questionnaire_transitions_to_generating():
@@ -66,11 +81,12 @@ def test_run_questionnaire_transitions_to_generating():
     terminal.state = State.QUESTIONNAIRE
 
     transcript = [{"question_id": "q1", "question": "Q?", "answer": "A"}]
-    with patch("ui.terminal.ask_questions", return_value=transcript):
+    with patch("ui.terminal.ask_questions", return_value=transcript), \
+            patch("ui.terminal.pt_prompt", return_value=""):
         terminal.run_questionnaire()
 
     assert terminal.state == State.GENERATING
-    assert terminal.qa_transcript == transcript
+    assert terminal.session.qa_transcript == transcript
 
 
 def test_show_generating_transitions_to_start():
@@ -78,9 +94,166 @@ def test_show_generating_transitions_to_start():
     terminal = Terminal()
     terminal.console = Console(record=True)
     terminal.state = State.GENERATING
-    terminal.qa_transcript = [{"question_id": "q1", "question": "Q?", "answer": "A"}]
+    terminal.session.qa_transcript = [{"question_id": "q1", "question": "Q?", "answer": "A"}]
 
     with patch("ui.terminal.pt_prompt", return_value=""):
         terminal.show_generating()
 
     assert terminal.state == State.START
+
+
+def test_start_screen_discards_previous_visitor():
+    """Returning to START should give the next visitor a clean session."""
+    terminal = Terminal()
+    terminal.console = Console(record=True)
+    terminal.session.avoid_list = ["Dusty"]
+    terminal.session.candidates = ["Sparkle"]
+    terminal.session.session_id = 7
+    terminal.session.num_questions = 2
+
+    with patch("ui.terminal.pt_prompt", return_value=""):
+        terminal.show_start_screen()
+
+    assert terminal.session.avoid_list == []
+    assert terminal.session.candidates == []
+    assert terminal.session.session_id is None
+    assert terminal.session.num_questions == terminal.max_questions
+
+
+def test_reroll_keeps_avoid_list_bounded():
+    """Repeated rerolls should never grow the avoid list past its cap."""
+    terminal = Terminal()
+    for i in range(MAX_AVOID_NAMES):
+        terminal.session.set_candidates([f"Name{i}-{j}" for j in range(7)])
+        terminal.session.reroll()
+
+    assert len(terminal.session.avoid_list) == MAX_AVOID_NAMES
+    assert terminal.session.avoid_list[-1] == f"Name{MAX_AVOID_NAMES - 1}-6"
+
+
+def test_idle_timeout_resets_to_start():
+    """An abandoned session should be reset back to START."""
+    terminal = Terminal()
+    terminal.console = Console(record=True)
+    terminal.state = State.STYLE_SELECT
+
+    def walk_away(*args, **kwargs):
+        if terminal.state == State.START:
+            raise KeyboardInterrupt
+        raise IdleTimeout()
+
+    with patch("ui.terminal.pt_prompt", side_effect=walk_away):
+        terminal.run()
+
+    assert terminal.state == State.START
+
+
+def test_headless_visit_with_fake_client(tmp_path, monkeypatch):
+    """A scripted visit should run end to end and log its generations."""
+    from session_logging import SessionLogger
+    from session_logging.rollups import read_stats, refresh_rollups
+    from ui.headless import ScriptedVisitor, headless_terminal, run_visit
+
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    monkeypatch.setenv("LLM_PROVIDER", "fake")
+    monkeypatch.setenv("LLM_PROVIDER_BACKUP", "")
+    monkeypatch.setenv("FAKE_LLM_LATENCY_MS", "0")
+    monkeypatch.setenv("FAKE_LLM_JITTER_MS", "0")
+    logger = SessionLogger(db_path=tmp_path / "sessions.db")
+    terminal = headless_terminal(logger)
+
+    steps = run_visit(terminal, ScriptedVisitor({"real_name": "Alex"}, style="c", rerolls=1))
+
+    assert [state for state, _ in steps].count(State.GENERATING) == 2
+    assert terminal.state == State.START
+    sessions = logger.query_sessions()
+    assert [(s["style"], s["reroll_index"], s["provider"]) for s in sessions] == [("c", 0, "fake"), ("c", 1, "fake")]
+
+
+def test_candidate_pool_serves_rerolls_without_generating(tmp_path, monkeypatch):
+    """In pool mode one call covers several screens; rerolls draw locally."""
+    from session_logging import SessionLogger
+    from ui.headless import ScriptedVisitor, headless_terminal, run_visit
+
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    monkeypatch.setenv("LLM_PROVIDER", "fake")
+    monkeypatch.setenv("LLM_PROVIDER_BACKUP", "")
+    monkeypatch.setenv("FAKE_LLM_LATENCY_MS", "0")
+    monkeypatch.setenv("FAKE_LLM_JITTER_MS", "0")
+    monkeypatch.setattr("ui.terminal.CANDIDATE_POOL_SIZE", 21)
+    logger = SessionLogger(db_path=tmp_path / "sessions.db")
+    terminal = headless_terminal(logger)
+    shown = []
+    show_display = terminal.show_display
+
+    def record_display():
+        shown.append(list(terminal.session.candidates))
+        show_display()
+
+    terminal.show_display = record_display
+
+    steps = run_visit(terminal, ScriptedVisitor({"real_name": "Alex"}, rerolls=2))
+
+    assert [state for state, _ in steps].count(State.GENERATING) == 1
+    assert [len(names) for names in shown] == [7, 7, 7]
+    assert len({name for names in shown for name in names}) == 21
+    # The first reroll left one screen in the pool, so a refill went out.
+    if terminal.session.refill is not None:
+        terminal.session.refill.result()
+    assert len(logger.query_sessions()) == 2
+
+
+def test_multi_style_switches_without_generating(tmp_path, monkeypatch):
+    """In multi-style mode every style is generated up front and one key switches to it."""
+    from data.styles import STYLES
+    from session_logging import SessionLogger
+    from session_logging.rollups import read_stats, refresh_rollups
+    from ui.headless import ScriptedVisitor, headless_terminal, run_visit
+
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    monkeypatch.setenv("LLM_PROVIDER", "fake")
+    monkeypatch.setenv("LLM_PROVIDER_BACKUP", "")
+    monkeypatch.setenv("FAKE_LLM_LATENCY_MS", "0")
+    monkeypatch.setenv("FAKE_LLM_JITTER_MS", "0")
+    monkeypatch.setattr("ui.terminal.MULTI_STYLE", True)
+    monkeypatch.setattr("ui.terminal.STYLE_CONCURRENCY", len(STYLES))
+    logger = SessionLogger(db_path=tmp_path / "sessions.db")
+    terminal = headless_terminal(logger)
+    shown = []
+    show_display = terminal.show_display
+
+    def record_display():
+        shown.append((terminal.session.style, terminal.session.session_id))
+        show_display()
+
+    terminal.show_display = record_display
+
+    steps = run_visit(terminal, ScriptedVisitor({"real_name": "Alex"}, style="c", switches=("y", "c")))
+    terminal._styles.shutdown(wait=True)
+
+    assert [state for state, _ in steps].count(State.GENERATING) == 1
+    assert [style for style, _ in shown] == ["c", "y", "c"]
+    assert shown[0][1] == shown[2][1] != shown[1][1]
+    sessions = logger.query_sessions()
+    assert sorted(s["style"] for s in sessions) == sorted(STYLES)
+    assert {s["session_id"]: s["style"] for s in sessions}[shown[1][1]] == "y"
+    # Only the styles the visitor looked at count; the rest are alternates.
+    assert {s["style"] for s in sessions if not s["alternate"]} == {"c", "y"}
+    refresh_rollups(logger.engine)
+    stats = read_stats(logger.engine)
+    assert stats["visits"] == 1
+    assert {style: row["sessions"] for style, row in stats["styles"].items() if row["sessions"]} == {"c": 1, "y": 1}
+
+
+def test_pool_drops_invalid_and_repeated_names():
+    """Pooled names are validated and never repeat what was already shown."""
+    terminal = Terminal()
+    session = terminal.session
+    session.set_candidates(["Dusty"])
+    session.reroll()
+    added = session.add_to_pool(["dusty", "Glimmer", "glimmer", "X", "Way Too Many Words", "Nova"], 5)
+    assert added == 2
+    assert session.draw()
+    assert session.candidates == ["Glimmer", "Nova"]
+    assert session.session_id == 5
+    assert not session.draw()